@@ -4,16 +4,55 @@ DeepSeek AI 内容生成模块
 """
 
 import os
+import re
 import json
-from typing import List, Dict, Optional
-from dataclasses import dataclass
-from openai import OpenAI
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import heapq
+import difflib
+import functools
+import unicodedata
+import weakref
+from collections import Counter, deque
+from pathlib import Path
+from typing import List, Dict, Optional, Callable, Tuple
+from dataclasses import dataclass, asdict, field, replace
+import openai
+from openai import OpenAI, AsyncOpenAI
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception_type, before_sleep_log
 import logging
 
 logger = logging.getLogger(__name__)
 
+# orjson 为可选依赖，未安装时回退到标准库 json
+try:
+    import orjson
 
-@dataclass
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+    _loads = json.loads
+
+# 缓存键只需要分布均匀，不是安全用途，优先使用更快的 xxhash（可选依赖）
+try:
+    import xxhash
+
+    def _cache_hash(data: bytes) -> str:
+        return xxhash.xxh3_128(data).hexdigest()
+except ImportError:
+    def _cache_hash(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass(slots=True)
 class XiaohongshuContent:
     """小红书内容数据结构"""
     title: str
@@ -23,6 +62,267 @@ class XiaohongshuContent:
     keywords: List[str]  # 使用的关键词
 
 
+@dataclass(slots=True)
+class ContentItem:
+    """待审核内容（写入飞书表格、发送审核卡片时使用）"""
+    id: str
+    title: str
+    content: str
+    tags: List[str]
+    summary: str
+    keywords: List[str]
+    image_paths: List[str] = field(default_factory=list)
+
+
+# 流式输出时提前取出的字符串字段：匹配字段开头（到值的起始引号为止），
+# 之后只在新到达的文本中查找值的结束引号，整个响应只扫描一遍
+_STREAM_FIELDS = ('title', 'content', 'summary')
+_JSON_FIELD_START = re.compile(r'"(title|content|summary)"\s*:\s*"')
+_JSON_STRING_SPECIAL = re.compile(r'["\\]')
+# 未找到字段开头时，只保留末尾这么多字符参与下一次匹配（字段开头可能被拆在两个分片中）
+_FIELD_START_OVERLAP = 64
+
+
+# 可重试的 API 异常：限流、网络连接、超时和服务端 5xx
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+_api_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+
+
+class AsyncRateLimiter:
+    """异步限流器：保证相邻两次请求的间隔不小于 60/rpm 秒"""
+    
+    def __init__(self, rpm: int):
+        self.interval = 60.0 / rpm
+        self._next_time = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+    
+    async def acquire(self):
+        """等待直到允许发出下一次请求"""
+        # generate_batch 每次都会新建事件循环，锁需要跟随当前循环重建
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_time = max(now, self._next_time) + self.interval
+
+
+class ResponseCache:
+    """
+    生成结果缓存（精确匹配）
+    以请求参数的规范化哈希（非加密哈希）为键，存储在 SQLite 中，支持 TTL 和 LRU 淘汰
+    """
+    
+    def __init__(self, db_path: Path, ttl: int = 7 * 86400, max_entries: int = 1000):
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB, model TEXT, "
+            "created_at REAL, accessed_at REAL)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(payload: Dict) -> str:
+        """根据请求参数生成缓存键"""
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        canonical = unicodedata.normalize('NFC', canonical)
+        return _cache_hash(canonical.encode('utf-8'))
+    
+    def get(self, key: str) -> Optional[XiaohongshuContent]:
+        """读取缓存，过期则删除并返回 None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            
+            value, created_at = row
+            if created_at + self.ttl < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        
+        return XiaohongshuContent(**_loads(value))
+    
+    def set(self, key: str, content: XiaohongshuContent, model: str = ''):
+        """写入缓存，超出容量时淘汰最久未访问的条目"""
+        now = time.time()
+        value = _dumps(asdict(content))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, model, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, model, now, now)
+            )
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+
+class SemanticCache:
+    """
+    近似语义缓存
+    对「关键词 + 参考信息」做字符二元组向量化，余弦相似度超过阈值时直接复用已生成内容，
+    用于命中「AI人工智能」/「人工智能AI」这类近似重复请求
+    """
+    
+    # 规范化时去掉的口语填充词
+    FILLER_WORDS = ('请', '帮我', '帮忙', '一下', '一篇', '关于')
+    
+    def __init__(self,
+                 threshold: float = 0.9,
+                 top_k: int = 5,
+                 max_entries: int = 500,
+                 canonicalize_prompt: bool = True):
+        self.threshold = threshold
+        self.top_k = top_k
+        self.canonicalize_prompt = canonicalize_prompt
+        self._lock = threading.Lock()
+        # 每个条目: (分区, 向量, 向量范数, 内容)
+        self._entries = deque(maxlen=max_entries)
+    
+    def canonicalize(self, text: str) -> str:
+        """规范化文本：统一 Unicode 形式、小写、去掉空白/标点和填充词"""
+        text = unicodedata.normalize('NFKC', text).lower()
+        if self.canonicalize_prompt:
+            for word in self.FILLER_WORDS:
+                text = text.replace(word, '')
+        return ''.join(ch for ch in text if ch.isalnum())
+    
+    def _embed(self, text: str):
+        """字符二元组词袋向量"""
+        text = self.canonicalize(text)
+        vector = Counter(text[i:i + 2] for i in range(len(text) - 1)) or Counter(text)
+        norm = sum(v * v for v in vector.values()) ** 0.5
+        return vector, norm
+    
+    @staticmethod
+    def _cosine(a: Counter, a_norm: float, b: Counter, b_norm: float) -> float:
+        if not a_norm or not b_norm:
+            return 0.0
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(v * b.get(k, 0) for k, v in a.items()) / (a_norm * b_norm)
+    
+    def lookup(self, partition: tuple, text: str) -> Optional[XiaohongshuContent]:
+        """查找相似度最高且超过阈值的缓存内容"""
+        vector, norm = self._embed(text)
+        with self._lock:
+            candidates = [entry for entry in self._entries if entry[0] == partition]
+        
+        scored = heapq.nlargest(
+            self.top_k,
+            ((self._cosine(vector, norm, entry[1], entry[2]), i) for i, entry in enumerate(candidates))
+        )
+        if scored and scored[0][0] >= self.threshold:
+            score, index = scored[0]
+            logger.debug(f"语义缓存相似度: {score:.3f}")
+            return candidates[index][3]
+        return None
+    
+    def add(self, partition: tuple, text: str, content: XiaohongshuContent):
+        """加入缓存（超出容量时淘汰最早的条目）"""
+        vector, norm = self._embed(text)
+        with self._lock:
+            self._entries.append((partition, vector, norm, content))
+
+
+class GenerativeCache:
+    """
+    生成式缓存
+    大部分请求只有关键词和参考信息不同，其余提示词完全一致。
+    生成成功后把提示词和结果中的关键词替换为占位符保存为模板；
+    新请求的提示词模板足够相似时，直接用新关键词填充模板结果，不再调用 API
+    """
+    
+    SLOT = '\x00KEYWORD\x00'
+    
+    def __init__(self, threshold: float = 0.9, max_entries: int = 200):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # 每个条目: (分区, 提示词模板, 结果模板)
+        self._entries = deque(maxlen=max_entries)
+    
+    def _skeleton(self, text: str, keyword: str) -> str:
+        return text.replace(keyword, self.SLOT) if keyword else text
+    
+    def lookup(self, partition: tuple, prompt: str, keyword: str) -> Optional[XiaohongshuContent]:
+        """查找结构相似的提示词模板，命中则用新关键词渲染结果"""
+        skeleton = self._skeleton(prompt, keyword)
+        with self._lock:
+            candidates = [entry for entry in self._entries if entry[0] == partition]
+        
+        best_score, best = 0.0, None
+        for entry in candidates:
+            matcher = difflib.SequenceMatcher(None, skeleton, entry[1], autojunk=False)
+            if matcher.real_quick_ratio() < self.threshold or matcher.quick_ratio() < self.threshold:
+                continue
+            score = matcher.ratio()
+            if score > best_score:
+                best_score, best = score, entry
+        
+        if best is None or best_score < self.threshold:
+            return None
+        
+        logger.debug(f"生成式缓存相似度: {best_score:.3f}")
+        template = best[2]
+        return XiaohongshuContent(
+            title=template.title.replace(self.SLOT, keyword),
+            content=template.content.replace(self.SLOT, keyword),
+            tags=[tag.replace(self.SLOT, keyword) for tag in template.tags],
+            summary=template.summary.replace(self.SLOT, keyword),
+            keywords=[keyword]
+        )
+    
+    def add(self, partition: tuple, prompt: str, keyword: str, content: XiaohongshuContent):
+        """保存提示词模板和结果模板（结果中不含关键词时无法改写，跳过）"""
+        if not keyword or (keyword not in content.title and keyword not in content.content):
+            return
+        
+        template = XiaohongshuContent(
+            title=self._skeleton(content.title, keyword),
+            content=self._skeleton(content.content, keyword),
+            tags=[self._skeleton(tag, keyword) for tag in content.tags],
+            summary=self._skeleton(content.summary, keyword),
+            keywords=[self.SLOT]
+        )
+        with self._lock:
+            self._entries.append((partition, self._skeleton(prompt, keyword), template))
+
+
 class DeepSeekContentGenerator:
     """基于 DeepSeek API 的小红书内容生成器"""
     
@@ -34,6 +334,78 @@ class DeepSeekContentGenerator:
         'story': """故事叙述风格，有开头、发展、高潮、结尾，引人入胜。"""
     }
     
+    # 流式生成时提前回调的字段
+    STREAM_FIELDS = ('title', 'content', 'summary')
+    
+    # 系统提示词模板
+    SYSTEM_PROMPT_TEMPLATE = """你是一位专业的小红书内容创作者，擅长将信息转化为吸引眼球的社交媒体内容。
+
+你的创作原则：
+1. 标题党但不做作，让人一眼就想点开
+2. 内容有价值，读完有收获感
+3. 语言生动活泼，避免生硬广告感
+4. 善用 emoji 和排版，提升阅读体验
+5. 符合小红书社区规范，不涉及敏感内容
+
+风格定位：{style}
+目标受众：{target_audience}
+
+输出必须是合法的 JSON 格式。"""
+    
+    # 用户提示词模板
+    USER_PROMPT_TEMPLATE = """
+请基于以下信息，创作一篇关于「{keyword}」的小红书笔记。
+
+=== 参考信息 ===
+{reference_info}
+
+=== 创作要求 ===
+1. 标题要吸睛，使用 emoji，控制在 20 字以内
+2. 正文结构清晰，使用 emoji 分段，控制在 300-800 字
+3. 语言风格：{style}
+4. 目标受众：{target_audience}
+5. 结尾要有互动引导（点赞/收藏/评论/关注）
+6. 生成 5-8 个相关标签（带 # 号）
+
+请以 JSON 格式输出：
+{{
+    "title": "笔记标题",
+    "content": "正文内容",
+    "tags": ["标签1", "标签2", ...],
+    "summary": "内容一句话摘要"
+}}
+"""
+    
+    # 多篇合并生成的用户提示词模板
+    MULTI_USER_PROMPT_TEMPLATE = """
+请分别基于以下 {count} 组信息，各创作一篇小红书笔记，共 {count} 篇，顺序与输入一致。
+
+{inputs}
+
+=== 创作要求（每篇都适用）===
+1. 标题要吸睛，使用 emoji，控制在 20 字以内
+2. 正文结构清晰，使用 emoji 分段，控制在 300-800 字
+3. 语言风格：{style}
+4. 目标受众：{target_audience}
+5. 结尾要有互动引导（点赞/收藏/评论/关注）
+6. 生成 5-8 个相关标签（带 # 号）
+
+请以 JSON 格式输出，notes 数组长度必须为 {count}：
+{{
+    "notes": [
+        {{
+            "title": "笔记标题",
+            "content": "正文内容",
+            "tags": ["标签1", "标签2", ...],
+            "summary": "内容一句话摘要"
+        }}
+    ]
+}}
+"""
+    
+    # 单次请求输出 token 上限
+    MAX_OUTPUT_TOKENS = 8192
+    
     def __init__(self, config: Dict):
         self.config = config
         self.api_key = config.get('api_key') or os.getenv('DEEPSEEK_API_KEY')
@@ -41,15 +413,58 @@ class DeepSeekContentGenerator:
         self.model = config.get('model', 'deepseek-chat')
         self.temperature = config.get('temperature', 0.7)
         self.max_tokens = config.get('max_tokens', 2000)
+        self.max_concurrency = config.get('max_concurrency', 4)
+        
+        # 每分钟请求数上限（仅作用于异步批量生成），未配置则不限流
+        rpm = config.get('rate_limit_rpm')
+        self.rate_limiter = AsyncRateLimiter(rpm) if rpm else None
         
         if not self.api_key:
             raise ValueError("DeepSeek API Key 未配置")
         
-        # 初始化 DeepSeek 客户端（兼容 OpenAI 格式）
+        # 生成结果缓存（相同参数直接返回，不重复调用 API）
+        self.cache = None
+        if config.get('cache_enabled', True):
+            app_dir = Path(os.getenv('APP_DIR', Path(__file__).parent.parent))
+            cache_file = config.get('cache_file') or app_dir / 'data' / 'deepseek_cache.db'
+            try:
+                self.cache = ResponseCache(
+                    cache_file,
+                    ttl=config.get('cache_ttl', 7 * 86400),
+                    max_entries=config.get('cache_max_entries', 1000)
+                )
+            except Exception as e:
+                logger.warning(f"生成缓存初始化失败，将不使用缓存: {e}")
+        
+        # 近似语义缓存（默认关闭，命中时会复用相近关键词的内容）
+        self.semantic_cache = None
+        if config.get('semantic_cache', False):
+            self.semantic_cache = SemanticCache(
+                threshold=config.get('semantic_threshold', 0.9),
+                top_k=config.get('semantic_top_k', 5),
+                max_entries=config.get('semantic_max_entries', 500),
+                canonicalize_prompt=config.get('canonicalize_prompt', True)
+            )
+        
+        # 生成式缓存（默认关闭，命中时用新关键词改写已有结果）
+        self.generative_cache = None
+        if config.get('generative_cache', False):
+            self.generative_cache = GenerativeCache(
+                threshold=config.get('generative_threshold', 0.9),
+                max_entries=config.get('generative_max_entries', 200)
+            )
+        
+        # 初始化 DeepSeek 客户端（兼容 OpenAI 格式）；重试统一由 _api_retry 负责，
+        # 关闭 SDK 自带的重试（max_retries=0），避免两层重试叠加
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url=self.base_url
+            base_url=self.base_url,
+            max_retries=0
         )
+        # AsyncOpenAI 的 httpx 连接池绑定创建时的事件循环，generate_batch 每次都会新建事件循环，
+        # 因此按事件循环分别创建客户端（见 async_client）
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_clients_lock = threading.Lock()
         
         logger.info(f"DeepSeek 生成器初始化完成，模型: {self.model}")
     
@@ -57,7 +472,9 @@ class DeepSeekContentGenerator:
                  search_results: List[Dict], 
                  keyword: str,
                  content_style: str = 'casual',
-                 target_audience: str = '25-35岁职场人士') -> XiaohongshuContent:
+                 target_audience: str = '25-35岁职场人士',
+                 bypass_cache: bool = False,
+                 on_partial: Optional[Callable[[str, str], None]] = None) -> XiaohongshuContent:
         """
         基于搜索结果生成小红书内容
         
@@ -66,73 +483,328 @@ class DeepSeekContentGenerator:
             keyword: 核心关键词
             content_style: 内容风格
             target_audience: 目标受众描述
+            bypass_cache: 是否跳过缓存强制重新生成
+            on_partial: 流式回调 (字段名, 字段值)，title/content/summary 一生成完就回调，
+                        便于调用方在生成结束前开始渲染预览
             
         Returns:
             XiaohongshuContent: 生成的小红书内容
         """
-        # 构建参考信息
-        reference_info = self._build_reference(search_results)
-        
-        # 构建系统提示词
-        system_prompt = self._build_system_prompt(content_style, target_audience)
+        cache_key, cached = self._lookup_cache(
+            search_results, keyword, content_style, target_audience, bypass_cache
+        )
+        if cached:
+            if on_partial:
+                for name in self.STREAM_FIELDS:
+                    on_partial(name, getattr(cached, name))
+            return cached
         
-        # 构建用户提示词
-        user_prompt = f"""
-请基于以下信息，创作一篇关于「{keyword}」的小红书笔记。
-
-=== 参考信息 ===
-{reference_info}
-
-=== 创作要求 ===
-1. 标题要吸睛，使用 emoji，控制在 20 字以内
-2. 正文结构清晰，使用 emoji 分段，控制在 300-800 字
-3. 语言风格：{self.STYLE_TEMPLATES.get(content_style, self.STYLE_TEMPLATES['casual'])}
-4. 目标受众：{target_audience}
-5. 结尾要有互动引导（点赞/收藏/评论/关注）
-6. 生成 5-8 个相关标签（带 # 号）
-
-请以 JSON 格式输出：
-{{
-    "title": "笔记标题",
-    "content": "正文内容",
-    "tags": ["标签1", "标签2", ...],
-    "summary": "内容一句话摘要"
-}}
-"""
+        messages = self._build_messages(search_results, keyword, content_style, target_audience)
         
         try:
             logger.info(f"开始生成内容，关键词: {keyword}")
             
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=messages,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                stream=on_partial is not None
             )
             
-            # 解析响应
-            result_text = response.choices[0].message.content
-            result_json = json.loads(result_text)
+            if on_partial:
+                result_text = self._consume_stream(response, on_partial)
+            else:
+                result_text = response.choices[0].message.content
+            
+            content = self._parse_content(result_text, keyword)
+            logger.info(f"内容生成成功: {content.title[:30]}...")
             
-            content = XiaohongshuContent(
-                title=result_json.get('title', ''),
-                content=result_json.get('content', ''),
-                tags=result_json.get('tags', []),
-                summary=result_json.get('summary', ''),
-                keywords=[keyword]
+            self._store_cache(cache_key, content, search_results, content_style, target_audience)
+            return content
+            
+        except Exception as e:
+            logger.error(f"内容生成失败: {e}")
+            raise
+    
+    async def generate_async(self,
+                             search_results: List[Dict],
+                             keyword: str,
+                             content_style: str = 'casual',
+                             target_audience: str = '25-35岁职场人士',
+                             bypass_cache: bool = False) -> XiaohongshuContent:
+        """generate 的异步版本，使用 AsyncOpenAI 客户端"""
+        cache_key, cached = self._lookup_cache(
+            search_results, keyword, content_style, target_audience, bypass_cache
+        )
+        if cached:
+            return cached
+        
+        messages = self._build_messages(search_results, keyword, content_style, target_audience)
+        
+        try:
+            logger.info(f"开始生成内容，关键词: {keyword}")
+            
+            response = await self._acreate_completion(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                response_format={"type": "json_object"}
             )
             
+            content = self._parse_content(response.choices[0].message.content, keyword)
             logger.info(f"内容生成成功: {content.title[:30]}...")
+            
+            self._store_cache(cache_key, content, search_results, content_style, target_audience)
             return content
             
         except Exception as e:
             logger.error(f"内容生成失败: {e}")
             raise
     
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """当前事件循环使用的 AsyncOpenAI 客户端（每个事件循环一个）"""
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+                self._async_clients[loop] = client
+        return client
+    
+    async def close_async_client(self):
+        """关闭当前事件循环的 AsyncOpenAI 客户端（应在事件循环结束前调用）"""
+        with self._async_clients_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+    
+    @_api_retry
+    def _create_completion(self, **kwargs):
+        """调用 Chat Completions 接口（限流/网络/5xx 错误自动指数退避重试）"""
+        return self.client.chat.completions.create(**kwargs)
+    
+    @_api_retry
+    async def _acreate_completion(self, **kwargs):
+        """_create_completion 的异步版本，配置了 rate_limit_rpm 时先经过限流器"""
+        if self.rate_limiter:
+            await self.rate_limiter.acquire()
+        return await self.async_client.chat.completions.create(**kwargs)
+    
+    def _consume_stream(self, response, on_partial: Callable[[str, str], None]) -> str:
+        """读取流式响应，字段值闭合时立即回调，返回完整文本"""
+        parts = []
+        buffer = ''
+        emitted = set()
+        scan_from = 0       # 下一次查找字段开头的位置
+        field = None        # 正在读取值的字段名
+        value_start = pos = 0
+        
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            if len(emitted) == len(_STREAM_FIELDS):
+                continue
+            buffer += delta
+            
+            while True:
+                if field is None:
+                    match = _JSON_FIELD_START.search(buffer, scan_from)
+                    if not match:
+                        scan_from = max(scan_from, len(buffer) - _FIELD_START_OVERLAP)
+                        break
+                    field, value_start = match.group(1), match.end()
+                    pos = value_start
+                
+                # 从上次停下的位置继续找未转义的结束引号
+                closed = False
+                while True:
+                    special = _JSON_STRING_SPECIAL.search(buffer, pos)
+                    if not special:
+                        pos = len(buffer)
+                        break
+                    i = special.start()
+                    if buffer[i] == '"':
+                        closed = True
+                        pos = i
+                        break
+                    if i + 1 >= len(buffer):
+                        # 转义符后的字符还没到，下次从转义符处继续
+                        pos = i
+                        break
+                    pos = i + 2
+                if not closed:
+                    break
+                
+                if field not in emitted:
+                    emitted.add(field)
+                    try:
+                        on_partial(field, _loads(f'"{buffer[value_start:pos]}"'))
+                    except Exception as e:
+                        logger.warning(f"流式回调失败 ({field}): {e}")
+                field = None
+                scan_from = pos + 1
+        
+        return ''.join(parts)
+    
+    def _lookup_cache(self,
+                      search_results: List[Dict],
+                      keyword: str,
+                      content_style: str,
+                      target_audience: str,
+                      bypass_cache: bool = False):
+        """查询生成缓存，返回 (cache_key, 命中的内容)"""
+        cache_key = None
+        if self.cache:
+            cache_key = self._cache_key(search_results, keyword, content_style, target_audience)
+        
+        if bypass_cache:
+            return cache_key, None
+        
+        if cache_key:
+            try:
+                cached = self.cache.get(cache_key)
+            except Exception as e:
+                logger.warning(f"读取生成缓存失败: {e}")
+                cached = None
+            
+            if cached:
+                logger.info(f"命中生成缓存，关键词: {keyword}")
+                return cache_key, cached
+        
+        if self.semantic_cache:
+            cached = self.semantic_cache.lookup(
+                self._semantic_partition(content_style, target_audience),
+                self._semantic_text(search_results, keyword)
+            )
+            if cached:
+                logger.info(f"命中语义缓存，关键词: {keyword}")
+                return cache_key, replace(cached, keywords=[keyword])
+        
+        if self.generative_cache:
+            cached = self.generative_cache.lookup(
+                self._semantic_partition(content_style, target_audience),
+                self._generative_prompt(search_results, keyword, content_style, target_audience),
+                keyword
+            )
+            if cached:
+                logger.info(f"命中生成式缓存，关键词: {keyword}")
+                return cache_key, cached
+        
+        return cache_key, None
+    
+    def _store_cache(self,
+                     cache_key: Optional[str],
+                     content: XiaohongshuContent,
+                     search_results: List[Dict] = None,
+                     content_style: str = 'casual',
+                     target_audience: str = ''):
+        """写入生成缓存"""
+        if self.cache and cache_key:
+            try:
+                self.cache.set(cache_key, content, self.model)
+            except Exception as e:
+                logger.warning(f"写入生成缓存失败: {e}")
+        
+        if self.semantic_cache and content.keywords:
+            self.semantic_cache.add(
+                self._semantic_partition(content_style, target_audience),
+                self._semantic_text(search_results, content.keywords[0]),
+                content
+            )
+        
+        if self.generative_cache and content.keywords:
+            keyword = content.keywords[0]
+            self.generative_cache.add(
+                self._semantic_partition(content_style, target_audience),
+                self._generative_prompt(search_results, keyword, content_style, target_audience),
+                keyword,
+                content
+            )
+    
+    def _semantic_partition(self, content_style: str, target_audience: str) -> tuple:
+        """近似缓存分区：只在模型、风格、受众完全一致的请求之间复用"""
+        return (self.model, content_style, target_audience)
+    
+    def _semantic_text(self, search_results: List[Dict], keyword: str) -> str:
+        """语义缓存比较的文本"""
+        return f"{keyword}\n{self._build_reference(search_results)}"
+    
+    def _generative_prompt(self,
+                           search_results: List[Dict],
+                           keyword: str,
+                           content_style: str,
+                           target_audience: str) -> str:
+        """生成式缓存比较的提示词（即实际发送的用户提示词）"""
+        return self._build_messages(search_results, keyword, content_style, target_audience)[-1]['content']
+    
+    def _build_messages(self,
+                        search_results: List[Dict],
+                        keyword: str,
+                        content_style: str,
+                        target_audience: str) -> List[Dict]:
+        """构建对话消息"""
+        # 构建参考信息
+        reference_info = self._build_reference(search_results)
+        
+        # 构建系统提示词
+        system_prompt = self._build_system_prompt(content_style, target_audience)
+        
+        # 构建用户提示词
+        user_prompt = self.USER_PROMPT_TEMPLATE.format(
+            keyword=keyword,
+            reference_info=reference_info,
+            style=self.STYLE_TEMPLATES.get(content_style, self.STYLE_TEMPLATES['casual']),
+            target_audience=target_audience
+        )
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _parse_content(self, result_text: str, keyword: str) -> XiaohongshuContent:
+        """解析模型返回的 JSON 文本"""
+        result_json = _loads(result_text)
+        
+        return XiaohongshuContent(
+            title=result_json.get('title', ''),
+            content=result_json.get('content', ''),
+            tags=result_json.get('tags', []),
+            summary=result_json.get('summary', ''),
+            keywords=[keyword]
+        )
+    
+    def _cache_key(self,
+                   search_results: List[Dict],
+                   keyword: str,
+                   content_style: str,
+                   target_audience: str) -> str:
+        """构建生成缓存键（只包含会影响提示词和生成结果的字段）"""
+        references = [
+            {
+                'title': result.get('title', ''),
+                'snippet': result.get('snippet', '') or result.get('content', '')[:200]
+            }
+            for result in (search_results or [])[:5]
+        ]
+        return ResponseCache.make_key({
+            'model': self.model,
+            'temperature': self.temperature,
+            'max_tokens': self.max_tokens,
+            'content_style': content_style,
+            'target_audience': target_audience,
+            'keyword': keyword,
+            'references': references
+        })
+    
     def _build_reference(self, search_results: List[Dict]) -> str:
         """构建参考信息文本"""
         if not search_results:
@@ -146,21 +818,14 @@ class DeepSeekContentGenerator:
         
         return '\n\n'.join(references)
     
-    def _build_system_prompt(self, content_style: str, target_audience: str) -> str:
-        """构建系统提示词"""
-        return f"""你是一位专业的小红书内容创作者，擅长将信息转化为吸引眼球的社交媒体内容。
-
-你的创作原则：
-1. 标题党但不做作，让人一眼就想点开
-2. 内容有价值，读完有收获感
-3. 语言生动活泼，避免生硬广告感
-4. 善用 emoji 和排版，提升阅读体验
-5. 符合小红书社区规范，不涉及敏感内容
-
-风格定位：{self.STYLE_TEMPLATES.get(content_style, self.STYLE_TEMPLATES['casual'])}
-目标受众：{target_audience}
-
-输出必须是合法的 JSON 格式。"""
+    @classmethod
+    @functools.lru_cache(maxsize=32)
+    def _build_system_prompt(cls, content_style: str, target_audience: str) -> str:
+        """构建系统提示词（按风格和受众缓存）"""
+        return cls.SYSTEM_PROMPT_TEMPLATE.format(
+            style=cls.STYLE_TEMPLATES.get(content_style, cls.STYLE_TEMPLATES['casual']),
+            target_audience=target_audience
+        )
     
     def generate_batch(self,
                       keyword_results: Dict[str, List[Dict]],
@@ -177,17 +842,141 @@ class DeepSeekContentGenerator:
         Returns:
             List[XiaohongshuContent]: 内容列表
         """
+        async def run_batch():
+            try:
+                return await self.generate_batch_async(keyword_results, content_style, target_audience)
+            finally:
+                await self.close_async_client()
+        
+        return asyncio.run(run_batch())
+    
+    async def generate_batch_async(self,
+                                   keyword_results: Dict[str, List[Dict]],
+                                   content_style: str = 'casual',
+                                   target_audience: str = '25-35岁职场人士',
+                                   max_concurrency: Optional[int] = None) -> List[XiaohongshuContent]:
+        """
+        并发生成多个关键词的内容
+        
+        Args:
+            keyword_results: 关键词到搜索结果的映射
+            content_style: 内容风格
+            target_audience: 目标受众
+            max_concurrency: 最大并发请求数，默认取配置中的 max_concurrency
+            
+        Returns:
+            List[XiaohongshuContent]: 内容列表（按关键词顺序，失败的关键词会被跳过）
+        """
+        sem = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        
+        async def run(keyword: str, results: List[Dict]) -> XiaohongshuContent:
+            async with sem:
+                return await self.generate_async(results, keyword, content_style, target_audience)
+        
+        keywords = list(keyword_results.keys())
+        outcomes = await asyncio.gather(
+            *[run(keyword, keyword_results[keyword]) for keyword in keywords],
+            return_exceptions=True
+        )
+        
         contents = []
+        for keyword, outcome in zip(keywords, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"生成关键词 '{keyword}' 的内容失败: {outcome}")
+                continue
+            contents.append(outcome)
+        
+        return contents
+    
+    def generate_multi(self,
+                       keywords_and_refs: List[Tuple[str, List[Dict]]],
+                       content_style: str = 'casual',
+                       target_audience: str = '25-35岁职场人士') -> List[XiaohongshuContent]:
+        """
+        把多个关键词合并为一次请求生成，系统提示词只发送一次
         
-        for keyword, results in keyword_results.items():
+        Args:
+            keywords_and_refs: [(关键词, 搜索结果列表)]
+            content_style: 内容风格
+            target_audience: 目标受众
+            
+        Returns:
+            List[XiaohongshuContent]: 与输入顺序一致的内容列表（失败的关键词会被跳过）
+        """
+        results: List[Optional[XiaohongshuContent]] = [None] * len(keywords_and_refs)
+        cache_keys: List[Optional[str]] = [None] * len(keywords_and_refs)
+        misses = []
+        
+        for i, (keyword, refs) in enumerate(keywords_and_refs):
+            cache_keys[i], results[i] = self._lookup_cache(refs, keyword, content_style, target_audience)
+            if results[i] is None:
+                misses.append(i)
+        
+        if len(misses) == 1:
+            # 只有一篇未命中时合并请求没有收益，直接单独生成
+            return self._fill_one_by_one(results, keywords_and_refs, misses, content_style, target_audience)
+        
+        if misses:
+            inputs = '\n\n'.join(
+                f"=== 第 {n} 篇：关键词「{keywords_and_refs[i][0]}」===\n{self._build_reference(keywords_and_refs[i][1])}"
+                for n, i in enumerate(misses, 1)
+            )
+            user_prompt = self.MULTI_USER_PROMPT_TEMPLATE.format(
+                count=len(misses),
+                inputs=inputs,
+                style=self.STYLE_TEMPLATES.get(content_style, self.STYLE_TEMPLATES['casual']),
+                target_audience=target_audience
+            )
+            
+            notes = None
+            try:
+                logger.info(f"开始合并生成 {len(misses)} 篇内容")
+                response = self._create_completion(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": self._build_system_prompt(content_style, target_audience)},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=self.temperature,
+                    max_tokens=min(self.max_tokens * len(misses), self.MAX_OUTPUT_TOKENS),
+                    response_format={"type": "json_object"}
+                )
+                notes = _loads(response.choices[0].message.content).get('notes')
+            except Exception as e:
+                logger.error(f"合并生成失败: {e}")
+            
+            if isinstance(notes, list) and len(notes) == len(misses):
+                for note, i in zip(notes, misses):
+                    keyword, refs = keywords_and_refs[i]
+                    results[i] = XiaohongshuContent(
+                        title=note.get('title', ''),
+                        content=note.get('content', ''),
+                        tags=note.get('tags', []),
+                        summary=note.get('summary', ''),
+                        keywords=[keyword]
+                    )
+                    self._store_cache(cache_keys[i], results[i], refs, content_style, target_audience)
+            else:
+                logger.warning("合并生成结果数量不匹配，改为逐篇生成")
+                self._fill_one_by_one(results, keywords_and_refs, misses, content_style, target_audience)
+        
+        return [content for content in results if content]
+    
+    def _fill_one_by_one(self,
+                         results: List[Optional[XiaohongshuContent]],
+                         keywords_and_refs: List[Tuple[str, List[Dict]]],
+                         indexes: List[int],
+                         content_style: str,
+                         target_audience: str) -> List[XiaohongshuContent]:
+        """逐篇生成指定位置的内容，结果写回 results"""
+        for i in indexes:
+            keyword, refs = keywords_and_refs[i]
             try:
-                content = self.generate(results, keyword, content_style, target_audience)
-                contents.append(content)
+                results[i] = self.generate(refs, keyword, content_style, target_audience)
             except Exception as e:
                 logger.error(f"生成关键词 '{keyword}' 的内容失败: {e}")
-                continue
         
-        return contents
+        return [content for content in results if content]
     
     def optimize_content(self, content: XiaohongshuContent, feedback: str) -> XiaohongshuContent:
         """
@@ -222,7 +1011,7 @@ class DeepSeekContentGenerator:
 """
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
                 messages=[
                     {"role": "user", "content": user_prompt}
@@ -232,7 +1021,7 @@ class DeepSeekContentGenerator:
                 response_format={"type": "json_object"}
             )
             
-            result_json = json.loads(response.choices[0].message.content)
+            result_json = _loads(response.choices[0].message.content)
             
             return XiaohongshuContent(
                 title=result_json.get('title', content.title),
@@ -6,19 +6,55 @@
 """
 import json
 import os
+import re
+import sys
 import logging
 import time
 import hashlib
+import asyncio
+import threading
+import aiohttp
 import requests
-from typing import Optional, Dict, List, Callable
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, List, Callable, Tuple, Union
 from datetime import datetime
 from dataclasses import dataclass, field
 
+from cachetools import TTLCache
 import lark_oapi as lark
 from lark_oapi.api.im.v1 import *
 
 logger = logging.getLogger(__name__)
 
+# orjson 为可选依赖，未安装时回退到标准库 json
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+    _loads = json.loads
+
+
+def _create_session() -> requests.Session:
+    """创建带连接池和重试策略的 HTTP 会话，复用到飞书的 TCP/TLS 连接"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=50,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 
 @dataclass
 class ApprovalResult:
@@ -33,7 +69,7 @@ class ApprovalResult:
     share_url: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ContentForApproval:
     """待审核内容"""
     id: str
@@ -45,11 +81,202 @@ class ContentForApproval:
     provider: str = ""
     model: str = ""
     created_at: str = ""
+    # 派生展示字符串的缓存（同一内容常被多次渲染：群聊 + 私聊、重发、状态更新）
+    _previews: Optional[Dict[int, str]] = field(init=False, default=None, repr=False, compare=False)
+    _tags_str: Optional[str] = field(init=False, default=None, repr=False, compare=False)
+    
+    def preview(self, limit: int = 200) -> str:
+        """正文预览，超过 limit 字符时截断并加省略号"""
+        if self._previews is None:
+            self._previews = {}
+        text = self._previews.get(limit)
+        if text is None:
+            text = self.content[:limit] + "..." if len(self.content) > limit else self.content
+            self._previews[limit] = text
+        return text
+    
+    @property
+    def tags_str(self) -> str:
+        """前 5 个标签拼成的 "#标签" 字符串，无标签时为空串"""
+        if self._tags_str is None:
+            self._tags_str = " ".join([f"#{tag}" for tag in self.tags[:5]])
+        return self._tags_str
+
+
+# 卡片元素 tag 常量（驻留字符串，所有卡片共享同一对象）
+_TAG_DIV = sys.intern("div")
+_TAG_PT = sys.intern("plain_text")
+_TAG_MD = sys.intern("lark_md")
+_TAG_HR = sys.intern("hr")
+_TAG_ACTION = sys.intern("action")
+_TAG_BUTTON = sys.intern("button")
+_TAG_NOTE = sys.intern("note")
+
+# 直接发送已编码 JSON 请求体时使用的请求头
+_JSON_HEADERS = {"Content-Type": "application/json; charset=utf-8"}
+
+
+def _compile_card_template(skeleton: dict) -> str:
+    """
+    把卡片骨架预编译为 str.format 模板
+    骨架中的 "__NAME__" 占位符变为 {name}，填充时传入已编码的 JSON 值，
+    渲染卡片不再需要构建嵌套 dict 再整体序列化
+    """
+    template = json.dumps(skeleton, ensure_ascii=False, separators=(',', ':'))
+    template = template.replace('{', '{{').replace('}', '}}')
+    return re.sub(r'"__([A-Z_]+)__"', lambda m: '{' + m.group(1).lower() + '}', template)
 
 
 class FeishuApprovalBot:
     """飞书审核机器人"""
     
+    # token 过期前多少秒由后台线程提前刷新
+    TOKEN_PREFETCH_SECONDS = 300
+    
+    # 待审核内容/审核结果的容量和保留时间，避免长期运行时无限增长
+    CACHE_MAXSIZE = 10000
+    PENDING_TTL = 7 * 86400
+    RESULT_TTL = 30 * 86400
+    
+    # 发送卡片的 IO 线程数（不超过 session 连接池大小）
+    IO_WORKERS = 16
+    
+    # 模型提供商显示名称
+    _PROVIDER_NAMES = {
+        'deepseek': 'DeepSeek',
+        'openai': 'OpenAI',
+        'anthropic': 'Anthropic',
+        'moonshot': '月之暗面',
+        'zhipu': '智谱AI',
+        'baidu': '百度',
+        'ali': '阿里云',
+        'tencent': '腾讯',
+        'doubao': '字节跳动'
+    }
+    
+    # 审核卡片静态骨架，"__NAME__" 为内容占位符，类加载时预编译为 JSON 字符串模板
+    _CARD_SKELETON = {
+        "config": {
+            "wide_screen_mode": True,
+            "enable_forward": True,
+            "update_multi": True
+        },
+        "header": {
+            "title": {
+                "tag": _TAG_PT,
+                "content": "📋 内容审核通知"
+            },
+            "subtitle": {
+                "tag": _TAG_PT,
+                "content": "__SUBTITLE__"
+            },
+            "template": "blue",
+            "icon": {
+                "tag": "standard_icon",
+                "token": "icon_checklist"
+            }
+        },
+        "elements": [
+            {
+                "tag": _TAG_DIV,
+                "text": {
+                    "tag": _TAG_MD,
+                    "content": "__TITLE__"
+                }
+            },
+            {
+                "tag": _TAG_HR
+            },
+            {
+                "tag": _TAG_DIV,
+                "text": {
+                    "tag": _TAG_MD,
+                    "content": "__PREVIEW__"
+                }
+            },
+            {
+                "tag": _TAG_DIV,
+                "text": {
+                    "tag": _TAG_MD,
+                    "content": "__TAGS__"
+                }
+            },
+            {
+                "tag": _TAG_DIV,
+                "text": {
+                    "tag": _TAG_MD,
+                    "content": "__KEYWORDS__"
+                }
+            },
+            {
+                "tag": _TAG_HR
+            },
+            {
+                "tag": _TAG_NOTE,
+                "elements": [
+                    {
+                        "tag": _TAG_PT,
+                        "content": "__CREATED_AT__"
+                    }
+                ]
+            },
+            {
+                "tag": _TAG_HR
+            },
+            {
+                "tag": _TAG_ACTION,
+                "actions": [
+                    {
+                        "tag": _TAG_BUTTON,
+                        "text": {
+                            "tag": _TAG_PT,
+                            "content": "✅ 通过"
+                        },
+                        "type": "primary",
+                        "value": {
+                            "action": "approve",
+                            "content_id": "__CONTENT_ID__"
+                        }
+                    },
+                    {
+                        "tag": _TAG_BUTTON,
+                        "text": {
+                            "tag": _TAG_PT,
+                            "content": "❌ 不通过"
+                        },
+                        "type": "danger",
+                        "value": {
+                            "action": "reject",
+                            "content_id": "__CONTENT_ID__"
+                        }
+                    },
+                    {
+                        "tag": _TAG_BUTTON,
+                        "text": {
+                            "tag": _TAG_PT,
+                            "content": "📝 编辑后通过"
+                        },
+                        "type": "default",
+                        "value": {
+                            "action": "edit",
+                            "content_id": "__CONTENT_ID__"
+                        }
+                    }
+                ]
+            },
+            {
+                "tag": _TAG_NOTE,
+                "elements": [
+                    {
+                        "tag": _TAG_PT,
+                        "content": "💡 点击「通过」将自动发布到小红书，点击「不通过」将删除此内容"
+                    }
+                ]
+            }
+        ]
+    }
+    _CARD_TEMPLATE = _compile_card_template(_CARD_SKELETON)
+    
     def __init__(self, app_id: str = '', app_secret: str = '', verify_token: str = '', encrypt_key: str = ''):
         self.app_id = app_id or os.getenv('FEISHU_APP_ID', '')
         self.app_secret = app_secret or os.getenv('FEISHU_APP_SECRET', '')
@@ -61,13 +288,28 @@ class FeishuApprovalBot:
         self.client = None
         self.tenant_access_token = None
         self.token_expire_time = 0
+        self._token_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.session = _create_session()
+        # 发送卡片等阻塞 IO 的线程池，与 session 共享连接池
+        self._io_pool = ThreadPoolExecutor(max_workers=self.IO_WORKERS, thread_name_prefix='feishu-io')
         
-        self.pending_contents: Dict[str, ContentForApproval] = {}
-        self.approval_results: Dict[str, ApprovalResult] = {}
+        self.pending_contents: Dict[str, ContentForApproval] = TTLCache(maxsize=self.CACHE_MAXSIZE, ttl=self.PENDING_TTL)
+        self.approval_results: Dict[str, ApprovalResult] = TTLCache(maxsize=self.CACHE_MAXSIZE, ttl=self.RESULT_TTL)
+        self._cache_lock = threading.RLock()
+        # 已序列化的卡片内容 {content_id: json}，同一内容发给多人时复用；与 pending_contents 同样的容量和过期时间
+        self._card_json_cache: Dict[str, str] = TTLCache(maxsize=self.CACHE_MAXSIZE, ttl=self.PENDING_TTL)
         
         self.approve_callback: Optional[Callable] = None
         self.reject_callback: Optional[Callable] = None
         
+        # 卡片按钮 action -> 处理方法
+        self._action_handlers: Dict[str, Callable[..., dict]] = {
+            'approve': self._handle_approve,
+            'reject': self._handle_reject,
+            'edit': self._handle_edit,
+        }
+        
         if self.enabled:
             self._init_client()
     
@@ -83,15 +325,40 @@ class FeishuApprovalBot:
         except Exception as e:
             logger.error(f"飞书客户端初始化失败: {e}")
             self.enabled = False
+            return
+        
+        self._refresh_thread = threading.Thread(
+            target=self._token_refresh_loop,
+            name='feishu-token-refresh',
+            daemon=True
+        )
+        self._refresh_thread.start()
+    
+    def _token_refresh_loop(self):
+        """后台线程：在 token 过期前提前刷新，避免发送卡片时同步获取"""
+        while self.enabled:
+            with self._token_lock:
+                self._fetch_tenant_access_token()
+            
+            wait = self.token_expire_time - self.TOKEN_PREFETCH_SECONDS - time.time()
+            time.sleep(max(wait, 60))
     
     def _get_tenant_access_token(self) -> Optional[str]:
         """获取 tenant_access_token"""
         if self.tenant_access_token and time.time() < self.token_expire_time:
             return self.tenant_access_token
         
+        with self._token_lock:
+            # 等锁期间可能已被其他线程刷新
+            if self.tenant_access_token and time.time() < self.token_expire_time:
+                return self.tenant_access_token
+            return self._fetch_tenant_access_token()
+    
+    def _fetch_tenant_access_token(self) -> Optional[str]:
+        """请求新的 tenant_access_token（调用方需持有 _token_lock）"""
         try:
             url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
-            response = requests.post(
+            response = self.session.post(
                 url,
                 json={"app_id": self.app_id, "app_secret": self.app_secret},
                 timeout=10
@@ -101,6 +368,7 @@ class FeishuApprovalBot:
             if result.get('code') == 0:
                 self.tenant_access_token = result.get('tenant_access_token')
                 self.token_expire_time = time.time() + result.get('expire', 7200) - 300
+                self.session.headers.update({"Authorization": f"Bearer {self.tenant_access_token}"})
                 return self.tenant_access_token
             else:
                 logger.error(f"获取 token 失败: {result}")
@@ -109,50 +377,68 @@ class FeishuApprovalBot:
             logger.error(f"获取 token 异常: {e}")
             return None
     
-    def send_to_user(self, user_id: str, content: ContentForApproval) -> Optional[str]:
+    def send_to_user(self, user_id: str, content: ContentForApproval,
+                     wait: bool = True) -> Union[Optional[str], Future]:
         """
         发送审核卡片给指定用户
         
         Args:
             user_id: 飞书用户ID (open_id 或 user_id)
             content: 待审核内容
+            wait: 是否等待发送完成；为 False 时提交到 IO 线程池后立即返回 Future
             
         Returns:
-            message_id: 消息ID
+            message_id: 消息ID（wait=False 时返回结果为 message_id 的 Future）
         """
         if not self.enabled:
             logger.warning("飞书机器人未启用")
-            return None
+            if wait:
+                return None
+            future: Future = Future()
+            future.set_result(None)
+            return future
         
+        # 先同步登记待审核内容，避免卡片回调早于后台发送完成时找不到内容
+        with self._cache_lock:
+            registered = content.id not in self.pending_contents
+            if registered:
+                self.pending_contents[content.id] = content
+        
+        future = self._io_pool.submit(self._do_send_to_user, user_id, content, registered)
+        return future.result() if wait else future
+    
+    def _do_send_to_user(self, user_id: str, content: ContentForApproval, registered: bool) -> Optional[str]:
+        """发送审核卡片给用户（在 IO 线程池中执行），失败时撤销本次登记的待审核内容"""
+        message_id = self._post_card_to_user(user_id, content)
+        if message_id is None and registered:
+            with self._cache_lock:
+                self.pending_contents.pop(content.id, None)
+        return message_id
+    
+    def _post_card_to_user(self, user_id: str, content: ContentForApproval) -> Optional[str]:
+        """调用发送消息接口，成功返回 message_id"""
         token = self._get_tenant_access_token()
         if not token:
             return None
         
         try:
-            card = self._build_approval_card(content)
-            
             url = "https://open.feishu.cn/open-apis/im/v1/messages"
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
             
             params = {
                 "receive_id_type": "open_id" if user_id.startswith("ou_") else "user_id"
             }
             
-            data = {
-                "receive_id": user_id,
-                "msg_type": "interactive",
-                "content": json.dumps({"card": card})
-            }
-            
-            response = requests.post(url, headers=headers, params=params, json=data, timeout=10)
+            response = self.session.post(
+                url,
+                params=params,
+                data=self._build_message_body(user_id, content),
+                headers=_JSON_HEADERS,
+                timeout=10
+            )
             result = response.json()
             
             if result.get('code') == 0:
                 message_id = result.get('data', {}).get('message_id')
-                self.pending_contents[content.id] = content
                 logger.info(f"审核卡片已发送给用户 {user_id}: {content.id}")
                 return message_id
             else:
@@ -182,28 +468,23 @@ class FeishuApprovalBot:
             return None
         
         try:
-            card = self._build_approval_card(content)
-            
             url = "https://open.feishu.cn/open-apis/im/v1/messages"
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
             
             params = {"receive_id_type": "chat_id"}
             
-            data = {
-                "receive_id": chat_id,
-                "msg_type": "interactive",
-                "content": json.dumps({"card": card})
-            }
-            
-            response = requests.post(url, headers=headers, params=params, json=data, timeout=10)
+            response = self.session.post(
+                url,
+                params=params,
+                data=self._build_message_body(chat_id, content),
+                headers=_JSON_HEADERS,
+                timeout=10
+            )
             result = response.json()
             
             if result.get('code') == 0:
                 message_id = result.get('data', {}).get('message_id')
-                self.pending_contents[content.id] = content
+                with self._cache_lock:
+                    self.pending_contents[content.id] = content
                 logger.info(f"审核卡片已发送到群聊 {chat_id}: {content.id}")
                 return message_id
             else:
@@ -214,150 +495,114 @@ class FeishuApprovalBot:
             logger.error(f"发送消息到群聊异常: {e}")
             return None
     
-    def _build_approval_card(self, content: ContentForApproval) -> dict:
-        """构建审核卡片"""
+    async def async_send_to_user(self,
+                                 user_id: str,
+                                 content: ContentForApproval,
+                                 http: Optional[aiohttp.ClientSession] = None) -> Optional[str]:
+        """send_to_user 的异步版本"""
+        receive_id_type = "open_id" if user_id.startswith("ou_") else "user_id"
+        return await self._async_send(receive_id_type, user_id, content, http)
+    
+    async def async_send_to_chat(self,
+                                 chat_id: str,
+                                 content: ContentForApproval,
+                                 http: Optional[aiohttp.ClientSession] = None) -> Optional[str]:
+        """send_to_chat 的异步版本"""
+        return await self._async_send("chat_id", chat_id, content, http)
+    
+    async def _async_send(self,
+                          receive_id_type: str,
+                          receive_id: str,
+                          content: ContentForApproval,
+                          http: Optional[aiohttp.ClientSession] = None) -> Optional[str]:
+        """
+        异步发送审核卡片
+        
+        Args:
+            receive_id_type: 接收者类型 (open_id/user_id/chat_id)
+            receive_id: 接收者ID
+            content: 待审核内容
+            http: 复用的 aiohttp 会话，不传则临时创建
+            
+        Returns:
+            message_id: 消息ID
+        """
+        if not self.enabled:
+            logger.warning("飞书机器人未启用")
+            return None
+        
+        # token 通常已由后台线程预取，未命中时放到线程池获取，避免阻塞事件循环
+        token = await asyncio.to_thread(self._get_tenant_access_token)
+        if not token:
+            return None
         
-        content_preview = content.content[:200] + "..." if len(content.content) > 200 else content.content
-        tags_str = " ".join([f"#{tag}" for tag in content.tags[:5]]) if content.tags else "无标签"
+        own_session = http is None
+        if own_session:
+            http = aiohttp.ClientSession()
         
+        try:
+            async with http.post(
+                "https://open.feishu.cn/open-apis/im/v1/messages",
+                params={"receive_id_type": receive_id_type},
+                data=self._build_message_body(receive_id, content),
+                headers={**_JSON_HEADERS, "Authorization": f"Bearer {token}"},
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                result = await response.json(content_type=None)
+            
+            if result.get('code') == 0:
+                message_id = result.get('data', {}).get('message_id')
+                with self._cache_lock:
+                    self.pending_contents[content.id] = content
+                logger.info(f"审核卡片已发送 ({receive_id_type} {receive_id}): {content.id}")
+                return message_id
+            else:
+                logger.error(f"发送消息失败: {result}")
+                return None
+                
+        except Exception as e:
+            logger.error(f"发送消息异常: {e}")
+            return None
+        finally:
+            if own_session:
+                await http.close()
+    
+    def _serialize_card(self, content: ContentForApproval) -> str:
+        """序列化审核卡片消息内容（按内容 ID 缓存）"""
+        with self._cache_lock:
+            cached = self._card_json_cache.get(content.id)
+        if cached is None:
+            cached = '{"card":' + self._render_card(content) + '}'
+            with self._cache_lock:
+                self._card_json_cache[content.id] = cached
+        return cached
+    
+    def _build_message_body(self, receive_id: str, content: ContentForApproval) -> bytes:
+        """构建发送消息接口的请求体（已编码的 JSON）"""
+        return ('{"receive_id":%s,"msg_type":"interactive","content":%s}' % (
+            _dumps(receive_id), _dumps(self._serialize_card(content))
+        )).encode('utf-8')
+    
+    def _render_card(self, content: ContentForApproval) -> str:
+        """用预编译模板渲染审核卡片 JSON"""
         provider_info = ""
         if content.provider:
-            provider_names = {
-                'deepseek': 'DeepSeek',
-                'openai': 'OpenAI',
-                'anthropic': 'Anthropic',
-                'moonshot': '月之暗面',
-                'zhipu': '智谱AI',
-                'baidu': '百度',
-                'ali': '阿里云',
-                'tencent': '腾讯',
-                'doubao': '字节跳动'
-            }
-            provider_name = provider_names.get(content.provider, content.provider)
+            provider_name = self._PROVIDER_NAMES.get(content.provider, content.provider)
             provider_info = f"\n🤖 生成模型: {provider_name} / {content.model}" if content.model else f"\n🤖 生成模型: {provider_name}"
         
-        card = {
-            "config": {
-                "wide_screen_mode": True,
-                "enable_forward": True,
-                "update_multi": True
-            },
-            "header": {
-                "title": {
-                    "tag": "plain_text",
-                    "content": "📋 内容审核通知"
-                },
-                "subtitle": {
-                    "tag": "plain_text",
-                    "content": f"ID: {content.id}"
-                },
-                "template": "blue",
-                "icon": {
-                    "tag": "standard_icon",
-                    "token": "icon_checklist"
-                }
-            },
-            "elements": [
-                {
-                    "tag": "div",
-                    "text": {
-                        "tag": "lark_md",
-                        "content": f"**📝 标题**\n{content.title}"
-                    }
-                },
-                {
-                    "tag": "hr"
-                },
-                {
-                    "tag": "div",
-                    "text": {
-                        "tag": "lark_md",
-                        "content": f"**📄 正文预览**\n{content_preview}"
-                    }
-                },
-                {
-                    "tag": "div",
-                    "text": {
-                        "tag": "lark_md",
-                        "content": f"**🏷️ 标签**\n{tags_str}"
-                    }
-                },
-                {
-                    "tag": "div",
-                    "text": {
-                        "tag": "lark_md",
-                        "content": f"**🔍 关键词**: {', '.join(content.keywords) if content.keywords else '无'}{provider_info}"
-                    }
-                },
-                {
-                    "tag": "hr"
-                },
-                {
-                    "tag": "note",
-                    "elements": [
-                        {
-                            "tag": "plain_text",
-                            "content": f"⏰ 生成时间: {content.created_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                        }
-                    ]
-                },
-                {
-                    "tag": "hr"
-                },
-                {
-                    "tag": "action",
-                    "actions": [
-                        {
-                            "tag": "button",
-                            "text": {
-                                "tag": "plain_text",
-                                "content": "✅ 通过"
-                            },
-                            "type": "primary",
-                            "value": {
-                                "action": "approve",
-                                "content_id": content.id
-                            }
-                        },
-                        {
-                            "tag": "button",
-                            "text": {
-                                "tag": "plain_text",
-                                "content": "❌ 不通过"
-                            },
-                            "type": "danger",
-                            "value": {
-                                "action": "reject",
-                                "content_id": content.id
-                            }
-                        },
-                        {
-                            "tag": "button",
-                            "text": {
-                                "tag": "plain_text",
-                                "content": "📝 编辑后通过"
-                            },
-                            "type": "default",
-                            "value": {
-                                "action": "edit",
-                                "content_id": content.id
-                            }
-                        }
-                    ]
-                },
-                {
-                    "tag": "note",
-                    "elements": [
-                        {
-                            "tag": "plain_text",
-                            "content": "💡 点击「通过」将自动发布到小红书，点击「不通过」将删除此内容"
-                        }
-                    ]
-                }
-            ]
-        }
-        
-        return card
+        return self._CARD_TEMPLATE.format(
+            subtitle=_dumps(f"ID: {content.id}"),
+            title=_dumps(f"**📝 标题**\n{content.title}"),
+            preview=_dumps(f"**📄 正文预览**\n{content.preview(200)}"),
+            tags=_dumps(f"**🏷️ 标签**\n{content.tags_str or '无标签'}"),
+            keywords=_dumps(f"**🔍 关键词**: {', '.join(content.keywords) if content.keywords else '无'}{provider_info}"),
+            created_at=_dumps(f"⏰ 生成时间: {content.created_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"),
+            content_id=_dumps(content.id)
+        )
+    
+    def _build_approval_card(self, content: ContentForApproval) -> dict:
+        """构建审核卡片"""
+        return _loads(self._render_card(content))
     
     def handle_card_callback(self, event_data: dict) -> dict:
         """
@@ -382,61 +627,73 @@ class FeishuApprovalBot:
             
             open_message_id = event_data.get('open_message_id', '')
             
-            content = self.pending_contents.get(content_id)
+            with self._cache_lock:
+                content = self.pending_contents.get(content_id)
             if not content:
                 return self._build_toast_response("内容不存在或已处理", "error")
             
-            if action_type == 'approve':
-                result = ApprovalResult(
-                    content_id=content_id,
-                    action='approve',
-                    user_id=user_id,
-                    user_name=user_name,
-                    timestamp=datetime.now().isoformat(),
-                    message_id=open_message_id
-                )
-                self.approval_results[content_id] = result
-                
-                if self.approve_callback:
-                    try:
-                        self.approve_callback(content, result)
-                    except Exception as e:
-                        logger.error(f"执行通过回调失败: {e}")
-                
-                del self.pending_contents[content_id]
-                
-                return self._build_approved_card_response(content, user_name)
-            
-            elif action_type == 'reject':
-                result = ApprovalResult(
-                    content_id=content_id,
-                    action='reject',
-                    user_id=user_id,
-                    user_name=user_name,
-                    timestamp=datetime.now().isoformat(),
-                    message_id=open_message_id
-                )
-                self.approval_results[content_id] = result
-                
-                if self.reject_callback:
-                    try:
-                        self.reject_callback(content, result)
-                    except Exception as e:
-                        logger.error(f"执行拒绝回调失败: {e}")
-                
-                del self.pending_contents[content_id]
-                
-                return self._build_rejected_card_response(content, user_name)
-            
-            elif action_type == 'edit':
-                return self._build_toast_response("请在 Web 控制台编辑内容", "info")
-            
-            return self._build_toast_response("未知操作", "error")
+            handler = self._action_handlers.get(action_type, self._handle_unknown)
+            return handler(content, user_id, user_name, open_message_id)
             
         except Exception as e:
             logger.error(f"处理卡片回调异常: {e}")
             return self._build_toast_response(f"处理失败: {str(e)}", "error")
     
+    def _handle_approve(self, content: ContentForApproval, user_id: str, user_name: str, message_id: str) -> dict:
+        """处理「通过」按钮"""
+        result = self._record_result(content, 'approve', user_id, user_name, message_id)
+        
+        if self.approve_callback:
+            try:
+                self.approve_callback(content, result)
+            except Exception as e:
+                logger.error(f"执行通过回调失败: {e}")
+        
+        self._discard_pending(content.id)
+        return self._build_approved_card_response(content, user_name)
+    
+    def _handle_reject(self, content: ContentForApproval, user_id: str, user_name: str, message_id: str) -> dict:
+        """处理「不通过」按钮"""
+        result = self._record_result(content, 'reject', user_id, user_name, message_id)
+        
+        if self.reject_callback:
+            try:
+                self.reject_callback(content, result)
+            except Exception as e:
+                logger.error(f"执行拒绝回调失败: {e}")
+        
+        self._discard_pending(content.id)
+        return self._build_rejected_card_response(content, user_name)
+    
+    def _handle_edit(self, content: ContentForApproval, user_id: str, user_name: str, message_id: str) -> dict:
+        """处理「编辑后通过」按钮"""
+        return self._build_toast_response("请在 Web 控制台编辑内容", "info")
+    
+    def _handle_unknown(self, content: ContentForApproval, user_id: str, user_name: str, message_id: str) -> dict:
+        """未知操作"""
+        return self._build_toast_response("未知操作", "error")
+    
+    def _record_result(self, content: ContentForApproval, action: str,
+                       user_id: str, user_name: str, message_id: str) -> ApprovalResult:
+        """记录审核结果"""
+        result = ApprovalResult(
+            content_id=content.id,
+            action=action,
+            user_id=user_id,
+            user_name=user_name,
+            timestamp=datetime.now().isoformat(),
+            message_id=message_id
+        )
+        with self._cache_lock:
+            self.approval_results[content.id] = result
+        return result
+    
+    def _discard_pending(self, content_id: str):
+        """从待审核列表中移除已处理的内容"""
+        with self._cache_lock:
+            self.pending_contents.pop(content_id, None)
+            self._card_json_cache.pop(content_id, None)
+    
     def _build_toast_response(self, message: str, toast_type: str = "info") -> dict:
         """构建 Toast 响应"""
         return {
@@ -452,14 +709,14 @@ class FeishuApprovalBot:
             "card": {
                 "config": {"wide_screen_mode": True},
                 "header": {
-                    "title": {"tag": "plain_text", "content": "✅ 已通过审核"},
+                    "title": {"tag": _TAG_PT, "content": "✅ 已通过审核"},
                     "template": "green"
                 },
                 "elements": [
                     {
-                        "tag": "div",
+                        "tag": _TAG_DIV,
                         "text": {
-                            "tag": "lark_md",
+                            "tag": _TAG_MD,
                             "content": f"**{content.title}**\n\n已由 {user_name} 审核通过，正在发布到小红书..."
                         }
                     }
@@ -473,14 +730,14 @@ class FeishuApprovalBot:
             "card": {
                 "config": {"wide_screen_mode": True},
                 "header": {
-                    "title": {"tag": "plain_text", "content": "❌ 已拒绝"},
+                    "title": {"tag": _TAG_PT, "content": "❌ 已拒绝"},
                     "template": "red"
                 },
                 "elements": [
                     {
-                        "tag": "div",
+                        "tag": _TAG_DIV,
                         "text": {
-                            "tag": "lark_md",
+                            "tag": _TAG_MD,
                             "content": f"**{content.title}**\n\n已由 {user_name} 拒绝，不会发布"
                         }
                     }
@@ -490,18 +747,21 @@ class FeishuApprovalBot:
     
     def update_card_published(self, content_id: str, note_id: str, share_url: str):
         """更新卡片为已发布状态"""
-        result = self.approval_results.get(content_id)
+        with self._cache_lock:
+            result = self.approval_results.get(content_id)
         if result:
             result.note_id = note_id
             result.share_url = share_url
     
     def get_approval_result(self, content_id: str) -> Optional[ApprovalResult]:
         """获取审核结果"""
-        return self.approval_results.get(content_id)
+        with self._cache_lock:
+            return self.approval_results.get(content_id)
     
     def get_pending_contents(self) -> List[ContentForApproval]:
         """获取所有待审核内容"""
-        return list(self.pending_contents.values())
+        with self._cache_lock:
+            return list(self.pending_contents.values())
     
     def set_callbacks(self, approve_callback: Callable, reject_callback: Callable):
         """设置审核回调函数"""
@@ -515,8 +775,13 @@ class FeishuWebhookHandler:
     def __init__(self):
         self.webhook_url = os.getenv('FEISHU_WEBHOOK_URL', '')
         self.enabled = bool(self.webhook_url)
-        self.pending_contents: Dict[str, ContentForApproval] = {}
-        self.approval_results: Dict[str, ApprovalResult] = {}
+        self.session = _create_session()
+        self.pending_contents: Dict[str, ContentForApproval] = TTLCache(
+            maxsize=FeishuApprovalBot.CACHE_MAXSIZE, ttl=FeishuApprovalBot.PENDING_TTL
+        )
+        self.approval_results: Dict[str, ApprovalResult] = TTLCache(
+            maxsize=FeishuApprovalBot.CACHE_MAXSIZE, ttl=FeishuApprovalBot.RESULT_TTL
+        )
     
     def send_approval_card(self, content: ContentForApproval) -> bool:
         """发送审核卡片到群聊"""
@@ -532,7 +797,7 @@ class FeishuWebhookHandler:
                 "card": card
             }
             
-            response = requests.post(
+            response = self.session.post(
                 self.webhook_url,
                 json=message,
                 timeout=10,
@@ -554,27 +819,24 @@ class FeishuWebhookHandler:
     
     def _build_simple_card(self, content: ContentForApproval) -> dict:
         """构建简化的审核卡片（用于 Webhook）"""
-        content_preview = content.content[:150] + "..." if len(content.content) > 150 else content.content
-        tags_str = " ".join([f"#{tag}" for tag in content.tags[:5]]) if content.tags else ""
-        
         return {
             "config": {"wide_screen_mode": True},
             "header": {
-                "title": {"tag": "plain_text", "content": "📋 新内容待审核"},
+                "title": {"tag": _TAG_PT, "content": "📋 新内容待审核"},
                 "template": "blue"
             },
             "elements": [
                 {
-                    "tag": "div",
+                    "tag": _TAG_DIV,
                     "text": {
-                        "tag": "lark_md",
-                        "content": f"**标题:** {content.title}\n\n**预览:** {content_preview}\n\n**标签:** {tags_str}"
+                        "tag": _TAG_MD,
+                        "content": f"**标题:** {content.title}\n\n**预览:** {content.preview(150)}\n\n**标签:** {content.tags_str}"
                     }
                 },
                 {
-                    "tag": "note",
+                    "tag": _TAG_NOTE,
                     "elements": [
-                        {"tag": "plain_text", "content": "⚠️ Webhook 机器人不支持交互按钮，请前往 Web 控制台审核"}
+                        {"tag": _TAG_PT, "content": "⚠️ Webhook 机器人不支持交互按钮，请前往 Web 控制台审核"}
                     ]
                 }
             ]
@@ -589,18 +851,18 @@ class FeishuWebhookHandler:
             card = {
                 "config": {"wide_screen_mode": True},
                 "header": {
-                    "title": {"tag": "plain_text", "content": title},
+                    "title": {"tag": _TAG_PT, "content": title},
                     "template": template
                 },
                 "elements": [
                     {
-                        "tag": "div",
-                        "text": {"tag": "lark_md", "content": message}
+                        "tag": _TAG_DIV,
+                        "text": {"tag": _TAG_MD, "content": message}
                     }
                 ]
             }
             
-            response = requests.post(
+            response = self.session.post(
                 self.webhook_url,
                 json={"msg_type": "interactive", "card": card},
                 timeout=10
@@ -609,3 +871,98 @@ class FeishuWebhookHandler:
         except Exception as e:
             logger.error(f"发送通知异常: {e}")
             return False
+
+
+class ApprovalPipeline:
+    """
+    生成 → 发送审核卡片 的异步流水线
+    两个阶段之间用 asyncio.Queue 衔接：第 1 条内容发送卡片时，后续内容仍在生成
+    """
+    
+    def __init__(self,
+                 generator,
+                 bot: FeishuApprovalBot,
+                 generate_concurrency: int = 4,
+                 send_concurrency: int = 4):
+        """
+        Args:
+            generator: DeepSeekContentGenerator（需提供 generate_async）
+            bot: 飞书审核机器人
+            generate_concurrency: 生成阶段最大并发数
+            send_concurrency: 发送阶段最大并发数
+        """
+        self.generator = generator
+        self.bot = bot
+        self.generate_concurrency = generate_concurrency
+        self.send_concurrency = send_concurrency
+    
+    async def run(self,
+                  keyword_results: Dict[str, List[Dict]],
+                  receive_id: str,
+                  receive_id_type: str = 'user',
+                  content_style: str = 'casual',
+                  target_audience: str = '25-35岁职场人士') -> List[Tuple[ContentForApproval, Optional[str]]]:
+        """
+        生成内容并逐条发送审核卡片
+        
+        Args:
+            keyword_results: 关键词到搜索结果的映射
+            receive_id: 飞书用户ID或群聊ID
+            receive_id_type: 'user' 或 'chat'
+            content_style: 内容风格
+            target_audience: 目标受众
+            
+        Returns:
+            [(待审核内容, message_id)] 列表，生成失败的关键词不会出现在结果中
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        gen_sem = asyncio.Semaphore(self.generate_concurrency)
+        batch_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        sent: List[Tuple[ContentForApproval, Optional[str]]] = []
+        
+        async def produce(index: int, keyword: str, results: List[Dict]):
+            async with gen_sem:
+                try:
+                    generated = await self.generator.generate_async(
+                        results, keyword, content_style, target_audience
+                    )
+                except Exception as e:
+                    logger.error(f"生成关键词 '{keyword}' 的内容失败: {e}")
+                    return
+            
+            await queue.put(ContentForApproval(
+                id=f"gen_{batch_id}_{index}",
+                title=generated.title,
+                content=generated.content,
+                tags=generated.tags,
+                keywords=generated.keywords,
+                created_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            ))
+        
+        async def consume(http: aiohttp.ClientSession):
+            while True:
+                content = await queue.get()
+                try:
+                    if content is None:
+                        return
+                    if receive_id_type == 'chat':
+                        message_id = await self.bot.async_send_to_chat(receive_id, content, http)
+                    else:
+                        message_id = await self.bot.async_send_to_user(receive_id, content, http)
+                    sent.append((content, message_id))
+                finally:
+                    queue.task_done()
+        
+        async with aiohttp.ClientSession() as http:
+            consumers = [asyncio.create_task(consume(http)) for _ in range(self.send_concurrency)]
+            
+            await asyncio.gather(*[
+                produce(i, keyword, results)
+                for i, (keyword, results) in enumerate(keyword_results.items())
+            ])
+            
+            for _ in consumers:
+                await queue.put(None)
+            await asyncio.gather(*consumers)
+        
+        return sent
@@ -4,31 +4,413 @@
 飞书机器人交互式审核模块
 通过卡片消息直接在聊天窗口完成审核
 """
+import gzip
 import json
 import os
+import re
 import logging
+import queue
+import threading
 import requests
-from typing import Optional, Callable
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, Callable, Dict, Tuple, Union
 from datetime import datetime
 
+from cachetools import TTLCache
+
 logger = logging.getLogger(__name__)
 
+# orjson 为可选依赖，未安装时回退到标准库 json
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+    _loads = json.loads
+
+
+# httpx（含 h2）为可选依赖，可用时通过 HTTP/2 在一条连接上多路复用，否则使用 requests
+try:
+    import httpx
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+HttpSession = Union[requests.Session, "httpx.Client"]
+
+
+def _create_session() -> HttpSession:
+    """创建带连接池和重试策略的 HTTP 会话，复用到飞书 Webhook 的 keep-alive 连接"""
+    if _HTTP2_AVAILABLE:
+        transport = httpx.HTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=8)
+        )
+        return httpx.Client(transport=transport, timeout=10.0, headers={'Content-Type': 'application/json'})
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=8,
+        # Webhook 只有 POST，发送卡片不幂等：只在连接失败或服务端明确未处理（429/503）时重试，
+        # 不重试读超时和其他 5xx，避免重复发卡片；重试用尽时返回最后一次响应，由调用方判断
+        max_retries=Retry(
+            total=2,
+            read=0,
+            backoff_factor=0.2,
+            status_forcelist=[429, 503],
+            allowed_methods=frozenset(['POST']),
+            raise_on_status=False
+        )
+    )
+    session.mount('https://', adapter)
+    session.headers.update({'Content-Type': 'application/json', 'Connection': 'keep-alive'})
+    return session
+
+
+# 模块内共享的 Webhook 会话，交互式机器人和通知器复用同一连接池
+_SESSION = _create_session()
+
+
+def get_webhook_session() -> HttpSession:
+    """获取共享的飞书 Webhook HTTP 会话"""
+    return _SESSION
+
+
+# 请求体 gzip 压缩：飞书自定义机器人 Webhook 未说明支持压缩的请求体，默认关闭，
+# 设置 FEISHU_WEBHOOK_GZIP=1 开启；开启后请求体超过 GZIP_MIN_BYTES 字节时压缩
+GZIP_ENABLED = os.getenv('FEISHU_WEBHOOK_GZIP', '0') == '1'
+GZIP_MIN_BYTES = 1024
+
+# Webhook 请求的连接超时和最小读取超时（秒）
+CONNECT_TIMEOUT = 2.0
+MIN_READ_TIMEOUT = 5.0
+
+
+def _timeout_for(body: bytes) -> Tuple[float, float]:
+    """按请求体大小计算 (连接超时, 读取超时)：连接快速失败，读取时间随请求体增大"""
+    return CONNECT_TIMEOUT, max(MIN_READ_TIMEOUT, len(body) / 50_000)
+
+
+def _post(session: HttpSession, url: str, body: bytes, headers: Optional[Dict[str, str]] = None):
+    connect_timeout, read_timeout = _timeout_for(body)
+    if _HTTP2_AVAILABLE:
+        return session.post(url, content=body, headers=headers,
+                            timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+    return session.post(url, data=body, headers=headers, timeout=(connect_timeout, read_timeout))
+
+
+def _accepted(response) -> bool:
+    """Webhook 是否成功处理了请求（飞书出错时也可能返回 HTTP 200，错误码在响应体的 code 中）"""
+    if response.status_code >= 400:
+        return False
+    try:
+        return not _loads(response.content).get('code')
+    except Exception:
+        return True
+
+
+def post_json(session: HttpSession, url: str, body: bytes):
+    """
+    发送已编码的 JSON 请求体
+    开启 GZIP_ENABLED 时较大的请求体用 gzip（level 1）压缩后发送，服务端返回错误时改用未压缩的请求体重发
+    """
+    if GZIP_ENABLED and len(body) > GZIP_MIN_BYTES:
+        response = _post(session, url, gzip.compress(body, compresslevel=1), {'Content-Encoding': 'gzip'})
+        if _accepted(response):
+            return response
+        logger.warning(f"飞书 Webhook 未接受压缩请求体（HTTP {response.status_code}），改为不压缩重发")
+    return _post(session, url, body)
+
+
+# 后台通知队列：不需要结果的 Webhook 通知交给单个工作线程发送，调用方无需等待
+_notify_queue: "queue.Queue[Tuple[HttpSession, str, bytes]]" = queue.Queue(maxsize=1024)
+_notify_thread: Optional[threading.Thread] = None
+_notify_thread_lock = threading.Lock()
+
+
+def _notify_worker():
+    """逐个发送队列中的通知请求"""
+    while True:
+        session, url, body = _notify_queue.get()
+        try:
+            response = post_json(session, url, body)
+            response.raise_for_status()
+        except Exception:
+            logger.exception("后台发送飞书通知失败")
+        finally:
+            _notify_queue.task_done()
+
+
+def enqueue_post(session: HttpSession, url: str, body: bytes):
+    """
+    把 Webhook 请求放入后台队列发送（首次调用时启动工作线程）
+    队列已满时退化为同步发送，保证通知不丢失
+    """
+    global _notify_thread
+    if _notify_thread is None:
+        with _notify_thread_lock:
+            if _notify_thread is None:
+                _notify_thread = threading.Thread(target=_notify_worker, name='feishu-notify', daemon=True)
+                _notify_thread.start()
+    
+    try:
+        _notify_queue.put_nowait((session, url, body))
+    except queue.Full:
+        logger.warning("飞书通知队列已满，改为同步发送")
+        try:
+            post_json(session, url, body).raise_for_status()
+        except Exception as e:
+            logger.error(f"发送飞书通知失败: {e}")
+
+
+def _compile_card_template(skeleton: dict) -> str:
+    """
+    把卡片骨架预编译为 str.format 模板
+    骨架中的 "__NAME__" 占位符变为 {name}，填充时传入已编码的 JSON 值
+    """
+    template = _dumps(skeleton)
+    template = template.replace('{', '{{').replace('}', '}}')
+    return re.sub(r'"__([A-Z_]+)__"', lambda m: '{' + m.group(1).lower() + '}', template)
+
+
+# 卡片静态骨架，"__NAME__" 为内容占位符，导入时预编译为 JSON 字符串模板
+_APPROVAL_CARD_TEMPLATE = _compile_card_template({
+    "config": {
+        "wide_screen_mode": True,
+        "enable_forward": True
+    },
+    "header": {
+        "title": {
+            "tag": "plain_text",
+            "content": "📱 新内容待审核"
+        },
+        "subtitle": {
+            "tag": "plain_text",
+            "content": "__SUBTITLE__"
+        },
+        "template": "blue"
+    },
+    "elements": [
+        # 标题
+        {
+            "tag": "div",
+            "text": {
+                "tag": "lark_md",
+                "content": "__TITLE__"
+            }
+        },
+        {
+            "tag": "hr"  # 分隔线
+        },
+        # 内容预览
+        {
+            "tag": "div",
+            "text": {
+                "tag": "lark_md",
+                "content": "__PREVIEW__"
+            }
+        },
+        # 标签
+        {
+            "tag": "div",
+            "text": {
+                "tag": "lark_md",
+                "content": "__TAGS__"
+            }
+        },
+        {
+            "tag": "hr"
+        },
+        # 操作按钮
+        {
+            "tag": "action",
+            "actions": [
+                {
+                    "tag": "button",
+                    "text": {
+                        "tag": "plain_text",
+                        "content": "✅ 通过并发布"
+                    },
+                    "type": "primary",
+                    "value": {
+                        "action": "approve",
+                        "content_id": "__CONTENT_ID__"
+                    }
+                },
+                {
+                    "tag": "button",
+                    "text": {
+                        "tag": "plain_text",
+                        "content": "❌ 不通过"
+                    },
+                    "type": "danger",
+                    "value": {
+                        "action": "reject",
+                        "content_id": "__CONTENT_ID__"
+                    }
+                },
+                {
+                    "tag": "button",
+                    "text": {
+                        "tag": "plain_text",
+                        "content": "👁️ 查看完整内容"
+                    },
+                    "type": "default",
+                    "value": {
+                        "action": "view",
+                        "content_id": "__CONTENT_ID__"
+                    }
+                }
+            ]
+        },
+        # 提示信息
+        {
+            "tag": "note",
+            "elements": [
+                {
+                    "tag": "plain_text",
+                    "content": "💡 点击「通过」后立即发布到小红书，点击「不通过」则删除此内容"
+                }
+            ]
+        }
+    ]
+})
+
+_SUCCESS_CARD_TEMPLATE = _compile_card_template({
+    "config": {"wide_screen_mode": True},
+    "header": {
+        "title": {
+            "tag": "plain_text",
+            "content": "✅ 内容发布成功"
+        },
+        "template": "green"
+    },
+    "elements": [
+        {
+            "tag": "div",
+            "text": {
+                "tag": "lark_md",
+                "content": "__TITLE__"
+            }
+        },
+        {
+            "tag": "action",
+            "actions": [
+                {
+                    "tag": "button",
+                    "text": {
+                        "tag": "plain_text",
+                        "content": "🔗 查看笔记"
+                    },
+                    "type": "primary",
+                    "url": "__URL__"
+                },
+                {
+                    "tag": "button",
+                    "text": {
+                        "tag": "plain_text",
+                        "content": "📋 复制链接"
+                    },
+                    "type": "default",
+                    "value": {
+                        "action": "copy",
+                        "url": "__URL__"
+                    }
+                }
+            ]
+        }
+    ]
+})
+
+_REJECT_CARD_TEMPLATE = _compile_card_template({
+    "config": {"wide_screen_mode": True},
+    "header": {
+        "title": {
+            "tag": "plain_text",
+            "content": "❌ 内容已拒绝"
+        },
+        "template": "grey"
+    },
+    "elements": [
+        {
+            "tag": "div",
+            "text": {
+                "tag": "lark_md",
+                "content": "__TITLE__"
+            }
+        }
+    ]
+})
+
+
+def _card_fields(content_item) -> Tuple[str, str, str]:
+    """计算卡片展示用的预览、标签、关键词字符串（每次发送渲染一次卡片时计算一次）"""
+    # 截断内容用于预览
+    content_preview = content_item.content[:150] + "..." if len(content_item.content) > 150 else content_item.content
+    
+    # 标签字符串
+    tags_str = " ".join(content_item.tags) if content_item.tags else "无标签"
+    
+    keywords = getattr(content_item, 'keywords', None)
+    keywords_str = ', '.join(keywords) if keywords else 'AI生成'
+    
+    return content_preview, tags_str, keywords_str
+
 
 class FeishuInteractiveBot:
     """飞书交互式机器人"""
     
+    # 待审核内容的默认容量和保留时间（秒）
+    PENDING_CAP = 256
+    PENDING_TTL = 86400
+    
+    # 重复发送去重窗口（秒）和记录容量，防止上游重试时重复发卡片
+    DEDUP_TTL = 30
+    DEDUP_CAP = 512
+    
     def __init__(self):
         self.webhook_url = os.getenv('FEISHU_WEBHOOK_URL', '')
         self.app_id = os.getenv('FEISHU_APP_ID', '')
         self.app_secret = os.getenv('FEISHU_APP_SECRET', '')
         self.enabled = bool(self.webhook_url)
+        self._session = get_webhook_session()
         
         # 审核回调函数
         self.approve_callback: Optional[Callable] = None
         self.reject_callback: Optional[Callable] = None
         
         # 存储 pending 的内容 {message_id: content_data}
-        self.pending_contents = {}
+        # 按容量 LRU 淘汰并设置过期时间，避免未收到回调的内容长期占用内存
+        self.pending_contents: TTLCache = TTLCache(
+            maxsize=int(os.getenv('FEISHU_PENDING_CAP', str(self.PENDING_CAP))),
+            ttl=self.PENDING_TTL
+        )
+        # TTLCache 在读写时会淘汰过期条目，不是线程安全的；Webhook 请求线程和后台线程都会访问
+        self._pending_lock = threading.Lock()
+        
+        # 最近发送过的卡片/通知，窗口内的重复请求直接跳过
+        self._sent_dedup: TTLCache = TTLCache(maxsize=self.DEDUP_CAP, ttl=self.DEDUP_TTL)
+        self._dedup_lock = threading.Lock()
+    
+    def _seen_recently(self, key: tuple) -> bool:
+        """key 是否在去重窗口内发送过"""
+        with self._dedup_lock:
+            return key in self._sent_dedup
+    
+    def _mark_sent(self, key: tuple):
+        """记录 key 已发送"""
+        with self._dedup_lock:
+            self._sent_dedup[key] = True
     
     def send_content_for_approval(self, content_item) -> Optional[str]:
         """
@@ -40,35 +422,25 @@ class FeishuInteractiveBot:
         Returns:
             message_id: 消息ID，用于后续更新
         """
-        if not self.enabled:
-            logger.warning("飞书 Webhook 未配置")
-            return None
+        dedup_key = ('approval', content_item.id, hash(content_item.title))
+        if self._seen_recently(dedup_key):
+            logger.info(f"审核卡片近期已发送，跳过重复发送: {content_item.id}")
+            return content_item.id
         
         try:
-            # 构建卡片内容
-            card = self._build_approval_card(content_item)
-            
-            # 发送消息
-            message = {
-                "msg_type": "interactive",
-                "card": card
-            }
-            
-            response = requests.post(
-                self.webhook_url,
-                json=message,
-                timeout=10,
-                headers={'Content-Type': 'application/json'}
-            )
+            # 构建卡片内容并发送消息
+            response = self._post_card(self._render_approval_card(content_item))
             response.raise_for_status()
             
             result = response.json()
             if result.get('code') == 0:
                 # 保存内容数据
-                self.pending_contents[content_item.id] = {
-                    'item': content_item,
-                    'sent_at': datetime.now()
-                }
+                with self._pending_lock:
+                    self.pending_contents[content_item.id] = {
+                        'item': content_item,
+                        'sent_at': datetime.now()
+                    }
+                self._mark_sent(dedup_key)
                 logger.info(f"审核卡片已发送: {content_item.id}")
                 return content_item.id
             else:
@@ -79,118 +451,32 @@ class FeishuInteractiveBot:
             logger.error(f"发送审核卡片异常: {e}")
             return None
     
+    def _card_body(self, card: str) -> bytes:
+        """拼接卡片消息请求体，避免再次 json 编码"""
+        return ('{"msg_type":"interactive","card":' + card + '}').encode('utf-8')
+    
+    def _post_card(self, card: str):
+        """同步发送已序列化的卡片消息"""
+        return post_json(self._session, self.webhook_url, self._card_body(card))
+    
+    def _enqueue_card(self, card: str):
+        """把已序列化的卡片消息交给后台队列发送"""
+        enqueue_post(self._session, self.webhook_url, self._card_body(card))
+    
+    def _render_approval_card(self, content_item) -> str:
+        """用预编译模板渲染审核卡片 JSON"""
+        content_preview, tags_str, keywords_str = _card_fields(content_item)
+        return _APPROVAL_CARD_TEMPLATE.format(
+            subtitle=_dumps(f"关键词: {keywords_str}"),
+            title=_dumps(f"**标题：**\n{content_item.title}"),
+            preview=_dumps(f"**正文预览：**\n{content_preview}"),
+            tags=_dumps(f"**标签：** {tags_str}"),
+            content_id=_dumps(content_item.id)
+        )
+    
     def _build_approval_card(self, content_item) -> dict:
         """构建审核卡片"""
-        
-        # 截断内容用于预览
-        content_preview = content_item.content[:150] + "..." if len(content_item.content) > 150 else content_item.content
-        
-        # 标签字符串
-        tags_str = " ".join(content_item.tags) if content_item.tags else "无标签"
-        
-        card = {
-            "config": {
-                "wide_screen_mode": True,
-                "enable_forward": True
-            },
-            "header": {
-                "title": {
-                    "tag": "plain_text",
-                    "content": "📱 新内容待审核"
-                },
-                "subtitle": {
-                    "tag": "plain_text",
-                    "content": f"关键词: {', '.join(content_item.keywords) if hasattr(content_item, 'keywords') and content_item.keywords else 'AI生成'}"
-                },
-                "template": "blue"
-            },
-            "elements": [
-                # 标题
-                {
-                    "tag": "div",
-                    "text": {
-                        "tag": "lark_md",
-                        "content": f"**标题：**\n{content_item.title}"
-                    }
-                },
-                {
-                    "tag": "hr"  # 分隔线
-                },
-                # 内容预览
-                {
-                    "tag": "div",
-                    "text": {
-                        "tag": "lark_md",
-                        "content": f"**正文预览：**\n{content_preview}"
-                    }
-                },
-                # 标签
-                {
-                    "tag": "div",
-                    "text": {
-                        "tag": "lark_md",
-                        "content": f"**标签：** {tags_str}"
-                    }
-                },
-                {
-                    "tag": "hr"
-                },
-                # 操作按钮
-                {
-                    "tag": "action",
-                    "actions": [
-                        {
-                            "tag": "button",
-                            "text": {
-                                "tag": "plain_text",
-                                "content": "✅ 通过并发布"
-                            },
-                            "type": "primary",
-                            "value": {
-                                "action": "approve",
-                                "content_id": content_item.id
-                            }
-                        },
-                        {
-                            "tag": "button",
-                            "text": {
-                                "tag": "plain_text",
-                                "content": "❌ 不通过"
-                            },
-                            "type": "danger",
-                            "value": {
-                                "action": "reject",
-                                "content_id": content_item.id
-                            }
-                        },
-                        {
-                            "tag": "button",
-                            "text": {
-                                "tag": "plain_text",
-                                "content": "👁️ 查看完整内容"
-                            },
-                            "type": "default",
-                            "value": {
-                                "action": "view",
-                                "content_id": content_item.id
-                            }
-                        }
-                    ]
-                },
-                # 提示信息
-                {
-                    "tag": "note",
-                    "elements": [
-                        {
-                            "tag": "plain_text",
-                            "content": "💡 点击「通过」后立即发布到小红书，点击「不通过」则删除此内容"
-                        }
-                    ]
-                }
-            ]
-        }
-        
-        return card
+        return _loads(self._render_approval_card(content_item))
     
     def update_card_to_published(self, message_id: str, note_id: str, share_url: str):
         """
@@ -201,9 +487,6 @@ class FeishuInteractiveBot:
             note_id: 小红书笔记ID
             share_url: 分享链接
         """
-        if not self.enabled:
-            return
-        
         try:
             # 注意：Webhook 机器人无法更新已发送的消息
             # 需要发送一条新消息作为通知
@@ -214,122 +497,45 @@ class FeishuInteractiveBot:
     
     def send_publish_success_notification(self, content_id: str, note_id: str, share_url: str):
         """发送发布成功通知"""
-        if not self.enabled:
+        dedup_key = ('published', note_id or content_id)
+        if self._seen_recently(dedup_key):
             return
         
         try:
             # 获取原始内容
-            pending_data = self.pending_contents.get(content_id)
+            with self._pending_lock:
+                pending_data = self.pending_contents.get(content_id)
             if not pending_data:
                 title = "内容"
             else:
                 title = pending_data['item'].title
             
-            message = {
-                "msg_type": "interactive",
-                "card": {
-                    "config": {"wide_screen_mode": True},
-                    "header": {
-                        "title": {
-                            "tag": "plain_text",
-                            "content": "✅ 内容发布成功"
-                        },
-                        "template": "green"
-                    },
-                    "elements": [
-                        {
-                            "tag": "div",
-                            "text": {
-                                "tag": "lark_md",
-                                "content": f"**{title}**\n已成功发布到小红书"
-                            }
-                        },
-                        {
-                            "tag": "action",
-                            "actions": [
-                                {
-                                    "tag": "button",
-                                    "text": {
-                                        "tag": "plain_text",
-                                        "content": "🔗 查看笔记"
-                                    },
-                                    "type": "primary",
-                                    "url": share_url
-                                },
-                                {
-                                    "tag": "button",
-                                    "text": {
-                                        "tag": "plain_text",
-                                        "content": "📋 复制链接"
-                                    },
-                                    "type": "default",
-                                    "value": {
-                                        "action": "copy",
-                                        "url": share_url
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                }
-            }
-            
-            requests.post(
-                self.webhook_url,
-                json=message,
-                timeout=10,
-                headers={'Content-Type': 'application/json'}
+            card = _SUCCESS_CARD_TEMPLATE.format(
+                title=_dumps(f"**{title}**\n已成功发布到小红书"),
+                url=_dumps(share_url)
             )
+            self._enqueue_card(card)
+            self._mark_sent(dedup_key)
             
             # 从 pending 中移除
-            if content_id in self.pending_contents:
-                del self.pending_contents[content_id]
+            with self._pending_lock:
+                self.pending_contents.pop(content_id, None)
                 
         except Exception as e:
             logger.error(f"发送成功通知异常: {e}")
     
     def send_reject_notification(self, content_id: str):
         """发送拒绝通知"""
-        if not self.enabled:
-            return
-        
         try:
-            pending_data = self.pending_contents.get(content_id)
+            with self._pending_lock:
+                pending_data = self.pending_contents.pop(content_id, None)
             if pending_data:
                 title = pending_data['item'].title
-                del self.pending_contents[content_id]
             else:
                 title = "内容"
             
-            message = {
-                "msg_type": "interactive",
-                "card": {
-                    "config": {"wide_screen_mode": True},
-                    "header": {
-                        "title": {
-                            "tag": "plain_text",
-                            "content": "❌ 内容已拒绝"
-                        },
-                        "template": "grey"
-                    },
-                    "elements": [
-                        {
-                            "tag": "div",
-                            "text": {
-                                "tag": "lark_md",
-                                "content": f"**{title}**\n已被拒绝，不会发布"
-                            }
-                        }
-                    ]
-                }
-            }
-            
-            requests.post(
-                self.webhook_url,
-                json=message,
-                timeout=10,
-                headers={'Content-Type': 'application/json'}
-            )
+            card = _REJECT_CARD_TEMPLATE.format(title=_dumps(f"**{title}**\n已被拒绝，不会发布"))
+            self._enqueue_card(card)
             
         except Exception as e:
             logger.error(f"发送拒绝通知异常: {e}")
@@ -343,9 +549,29 @@ class FeishuEventHandler:
     如果只有 Webhook，需要通过其他方式获取用户点击（如 Web UI 展示卡片状态）
     """
     
+    # 消息命令，一次扫描匹配全部命令词
+    _CMD_RE = re.compile(r'列表|list', re.IGNORECASE)
+    
     def __init__(self):
         self.verify_token = os.getenv('FEISHU_VERIFY_TOKEN', '')
         self.encrypt_key = os.getenv('FEISHU_ENCRYPT_KEY', '')
+        
+        # 事件类型 -> 处理方法
+        self._event_dispatch: Dict[str, Callable[[dict], dict]] = {
+            'im.message.receive_v1': self._handle_message,
+            'card.action.trigger': self._handle_card_action,
+        }
+        # 卡片按钮 action -> 处理方法
+        self._action_dispatch: Dict[str, Callable[[str], dict]] = {
+            'approve': self._handle_approve,
+            'reject': self._handle_reject,
+            'view': self._handle_view,
+        }
+        # 命令词（小写）-> 处理方法
+        self._cmd_dispatch: Dict[str, Callable[[dict], dict]] = {
+            '列表': self._handle_list_command,
+            'list': self._handle_list_command,
+        }
     
     def handle_event(self, event_data: dict) -> dict:
         """
@@ -359,25 +585,25 @@ class FeishuEventHandler:
         """
         event_type = event_data.get('header', {}).get('event_type')
         
-        if event_type == 'im.message.receive_v1':
-            return self._handle_message(event_data)
-        elif event_type == 'card.action.trigger':
-            return self._handle_card_action(event_data)
-        
-        return {}
+        handler = self._event_dispatch.get(event_type)
+        return handler(event_data) if handler else {}
     
     def _handle_message(self, event_data: dict) -> dict:
         """处理消息事件"""
         # 可以在这里处理用户发送的命令
         message = event_data.get('event', {}).get('message', {})
-        content = json.loads(message.get('content', '{}'))
+        content = _loads(message.get('content') or '{}')
         text = content.get('text', '')
         
         # 简单的命令处理
-        if '列表' in text or 'list' in text.lower():
-            return self._send_text_response("当前没有待审核内容")
-        
-        return {}
+        match = self._CMD_RE.search(text)
+        if not match:
+            return {}
+        return self._cmd_dispatch[match.group(0).lower()](event_data)
+    
+    def _handle_list_command(self, event_data: dict) -> dict:
+        """列表命令"""
+        return self._send_text_response("当前没有待审核内容")
     
     def _handle_card_action(self, event_data: dict) -> dict:
         """处理卡片按钮点击事件"""
@@ -387,17 +613,8 @@ class FeishuEventHandler:
         action_type = action_value.get('action')
         content_id = action_value.get('content_id')
         
-        if action_type == 'approve':
-            # 触发通过回调
-            return self._handle_approve(content_id)
-        elif action_type == 'reject':
-            # 触发拒绝回调
-            return self._handle_reject(content_id)
-        elif action_type == 'view':
-            # 查看完整内容
-            return self._handle_view(content_id)
-        
-        return {}
+        handler = self._action_dispatch.get(action_type)
+        return handler(content_id) if handler else {}
     
     def _handle_approve(self, content_id: str) -> dict:
         """处理通过操作"""
@@ -436,14 +653,50 @@ class FeishuEventHandler:
     def _send_text_response(self, text: str) -> dict:
         """发送文本响应"""
         return {
-            "content": json.dumps({
+            "content": _dumps({
                 "text": text
             }),
             "msg_type": "text"
         }
 
 
+class _DisabledFeishuBot:
+    """未配置 Webhook 时使用的空实现，所有发送操作直接返回，不构建卡片"""
+    
+    enabled = False
+    
+    def __init__(self):
+        self.approve_callback: Optional[Callable] = None
+        self.reject_callback: Optional[Callable] = None
+        self.pending_contents = {}
+    
+    def send_content_for_approval(self, content_item) -> Optional[str]:
+        return None
+    
+    def update_card_to_published(self, message_id: str, note_id: str, share_url: str):
+        return None
+    
+    def send_publish_success_notification(self, content_id: str, note_id: str, share_url: str):
+        return None
+    
+    def send_reject_notification(self, content_id: str):
+        return None
+
+
+_DISABLED_BOT_SINGLETON = _DisabledFeishuBot()
+_ENABLED_BOT_SINGLETON: Optional[FeishuInteractiveBot] = None
+_bot_singleton_lock = threading.Lock()
+
+
 # 便捷函数
-def get_feishu_bot() -> FeishuInteractiveBot:
-    """获取飞书机器人实例"""
-    return FeishuInteractiveBot()
+def get_feishu_bot():
+    """获取飞书机器人实例（单例），未配置 Webhook 时返回空实现"""
+    global _ENABLED_BOT_SINGLETON
+    if not os.getenv('FEISHU_WEBHOOK_URL'):
+        logger.warning("飞书 Webhook 未配置")
+        return _DISABLED_BOT_SINGLETON
+    if _ENABLED_BOT_SINGLETON is None:
+        with _bot_singleton_lock:
+            if _ENABLED_BOT_SINGLETON is None:
+                _ENABLED_BOT_SINGLETON = FeishuInteractiveBot()
+    return _ENABLED_BOT_SINGLETON
@@ -6,22 +6,84 @@
 """
 import os
 import json
+import time
+import functools
+import atexit
 import logging
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
-from dataclasses import asdict
+from typing import List, Dict, Optional, Iterator
 
 import lark_oapi as lark
 from lark_oapi.api.bitable.v1 import *
 
 from content_generator import ContentItem
+from feishu_bot import enqueue_post, get_webhook_session
 
 logger = logging.getLogger(__name__)
 
+# orjson 为可选依赖，未安装时回退到标准库 json
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+    _loads = json.loads
+
+
+def _csv(values: Optional[List[str]]) -> str:
+    """用逗号拼接列表，空列表和单元素时不做 join"""
+    if not values:
+        return ""
+    if len(values) == 1:
+        return values[0]
+    return ", ".join(values)
+
+
+# 最近一次格式化的时间字符串 (秒级时间戳, 字符串)，同一秒内批量写入时复用
+_now_cache = (0, "")
+
+
+def _now_str() -> str:
+    """当前时间的 "%Y-%m-%d %H:%M:%S" 字符串"""
+    global _now_cache
+    second = int(time.time())
+    cached_second, text = _now_cache
+    if second != cached_second:
+        text = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        _now_cache = (second, text)
+    return text
+
+
+@functools.lru_cache(maxsize=8)
+def _filter_for(status: str) -> str:
+    """按状态筛选记录的 filter JSON（每种状态只序列化一次）"""
+    return _dumps({
+        "conditions": [
+            {
+                "field_name": "状态",
+                "operator": "is",
+                "value": [status]
+            }
+        ]
+    })
+
 
 class FeishuBitableClient:
     """飞书多维表格客户端"""
     
+    # 批量接口单次提交的记录数上限
+    BATCH_SIZE = 100
+    
+    # SDK 发出的 HTTP 请求的超时（秒），作用于连接和每次读取，卡住的请求会在 SDK 内部超时返回
+    REQUEST_TIMEOUT = 30.0
+    
     def __init__(self):
         self.app_id = os.getenv('FEISHU_APP_ID', '')
         self.app_secret = os.getenv('FEISHU_APP_SECRET', '')
@@ -38,7 +100,43 @@ class FeishuBitableClient:
                 .app_id(self.app_id) \
                 .app_secret(self.app_secret) \
                 .log_level(lark.LogLevel.ERROR) \
+                .timeout(self.REQUEST_TIMEOUT) \
                 .build()
+        
+        # 批量写入缓冲区，攒够阈值或超过等待时间后一次性提交
+        self._pending_add: List[Dict] = []
+        self._pending_update: List[Dict] = []
+        self._batch_lock = threading.Lock()
+        self._add_timer: Optional[threading.Timer] = None
+        self._update_timer: Optional[threading.Timer] = None
+        if self.enabled:
+            atexit.register(self.flush)
+    
+    def _build_fields(self, item: ContentItem) -> Dict:
+        """构建新增记录的字段数据"""
+        return {
+            "标题": item.title,
+            "正文": item.content,
+            "标签": _csv(item.tags),
+            "摘要": item.summary,
+            "关键词": _csv(item.keywords),
+            "图片路径": _csv(item.image_paths),
+            "状态": "待审核",
+            "创建时间": _now_str(),
+        }
+    
+    def _build_status_fields(self, status: str, note_id: str = None, share_url: str = None) -> Dict:
+        """构建状态更新的字段数据"""
+        fields = {
+            "状态": status,
+            "发布时间": _now_str()
+        }
+        
+        if note_id:
+            fields["笔记ID"] = note_id
+        if share_url:
+            fields["分享链接"] = share_url
+        return fields
     
     def add_record(self, item: ContentItem) -> Optional[str]:
         """
@@ -50,22 +148,9 @@ class FeishuBitableClient:
         Returns:
             record_id: 飞书记录ID
         """
-        if not self.enabled:
-            logger.info("飞书未启用，跳过添加记录")
-            return None
-        
         try:
             # 构建字段数据
-            fields = {
-                "标题": item.title,
-                "正文": item.content,
-                "标签": ", ".join(item.tags),
-                "摘要": item.summary,
-                "关键词": ", ".join(item.keywords),
-                "图片路径": ", ".join(item.image_paths) if item.image_paths else "",
-                "状态": "待审核",
-                "创建时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            }
+            fields = self._build_fields(item)
             
             # 创建请求
             request = CreateBitableRecordRequest.builder() \
@@ -92,52 +177,58 @@ class FeishuBitableClient:
             logger.error(f"添加飞书记录异常: {e}")
             return None
     
-    def get_pending_records(self) -> List[Dict]:
+    def iter_pending_records(self, status: str = "已通过", page_size: int = 100) -> Iterator:
         """
-        获取待审核的记录
+        分页遍历指定状态的记录，逐条产出 SDK 记录对象（有 record_id / fields 属性）
         
-        Returns:
-            待审核记录列表
+        Args:
+            status: 筛选的状态值，默认取已审核通过、等待发布的记录
+            page_size: 每页记录数
         """
-        if not self.enabled:
-            return []
+        body = SearchBitableRecordRequestBody.builder() \
+            .filter(_filter_for(status)) \
+            .build()
         
-        try:
-            # 构建筛选条件
-            request = SearchBitableRecordRequest.builder() \
-                .app_token(self.app_token) \
-                .table_id(self.table_id) \
-                .request_body(SearchBitableRecordRequestBody.builder()
-                    .filter(json.dumps({
-                        "conditions": [
-                            {
-                                "field_name": "状态",
-                                "operator": "is",
-                                "value": ["已通过"]
-                            }
-                        ]
-                    }))
-                    .build()
-                ) \
-                .build()
-            
-            response = self.client.bitable.v1.bitable_record.search(request)
+        page_token = None
+        while True:
+            try:
+                builder = SearchBitableRecordRequest.builder() \
+                    .app_token(self.app_token) \
+                    .table_id(self.table_id) \
+                    .page_size(page_size)
+                if page_token:
+                    builder = builder.page_token(page_token)
+                request = builder.request_body(body).build()
+                
+                response = self.client.bitable.v1.bitable_record.search(request)
+            except Exception as e:
+                logger.error(f"查询飞书记录异常: {e}")
+                return
             
-            if response.success():
-                records = []
-                for record in response.data.items:
-                    records.append({
-                        'record_id': record.record_id,
-                        'fields': record.fields
-                    })
-                return records
-            else:
+            if not response.success():
                 logger.error(f"查询飞书记录失败: {response.msg}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"查询飞书记录异常: {e}")
-            return []
+                return
+            
+            yield from response.data.items or []
+            
+            page_token = response.data.page_token
+            if not response.data.has_more or not page_token:
+                return
+    
+    def get_pending_records(self, status: str = "已通过") -> List[Dict]:
+        """
+        获取待处理的记录
+        
+        Args:
+            status: 筛选的状态值，默认取已审核通过、等待发布的记录
+            
+        Returns:
+            记录列表 [{'record_id': ..., 'fields': ...}]
+        """
+        return [
+            {'record_id': record.record_id, 'fields': record.fields}
+            for record in self.iter_pending_records(status)
+        ]
     
     def update_record_status(self, record_id: str, status: str, note_id: str = None, share_url: str = None) -> bool:
         """
@@ -152,19 +243,8 @@ class FeishuBitableClient:
         Returns:
             是否成功
         """
-        if not self.enabled:
-            return False
-        
         try:
-            fields = {
-                "状态": status,
-                "发布时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            if note_id:
-                fields["笔记ID"] = note_id
-            if share_url:
-                fields["分享链接"] = share_url
+            fields = self._build_status_fields(status, note_id, share_url)
             
             request = UpdateBitableRecordRequest.builder() \
                 .app_token(self.app_token) \
@@ -188,6 +268,136 @@ class FeishuBitableClient:
         except Exception as e:
             logger.error(f"更新飞书记录异常: {e}")
             return False
+    
+    def add_record_batched(self, item: ContentItem, flush_threshold: int = 50, max_delay_s: float = 2.0):
+        """
+        把记录放入缓冲区，攒够 flush_threshold 条或等待 max_delay_s 秒后批量写入
+        
+        Args:
+            item: 内容项
+            flush_threshold: 触发批量写入的记录数
+            max_delay_s: 缓冲区中记录的最长等待时间
+        """
+        with self._batch_lock:
+            self._pending_add.append(self._build_fields(item))
+            should_flush = len(self._pending_add) >= flush_threshold
+            if not should_flush and self._add_timer is None:
+                self._add_timer = threading.Timer(max_delay_s, self.flush_adds)
+                self._add_timer.daemon = True
+                self._add_timer.start()
+        
+        if should_flush:
+            self.flush_adds()
+    
+    def update_record_status_batched(self, record_id: str, status: str, note_id: str = None,
+                                     share_url: str = None, flush_threshold: int = 50,
+                                     max_delay_s: float = 2.0):
+        """把状态更新放入缓冲区，攒够阈值或超时后批量提交（参数同 update_record_status）"""
+        with self._batch_lock:
+            self._pending_update.append({
+                'record_id': record_id,
+                'fields': self._build_status_fields(status, note_id, share_url)
+            })
+            should_flush = len(self._pending_update) >= flush_threshold
+            if not should_flush and self._update_timer is None:
+                self._update_timer = threading.Timer(max_delay_s, self.flush_updates)
+                self._update_timer.daemon = True
+                self._update_timer.start()
+        
+        if should_flush:
+            self.flush_updates()
+    
+    def flush_adds(self) -> List[str]:
+        """
+        批量写入缓冲区中的新增记录
+        
+        Returns:
+            成功写入的记录ID列表
+        """
+        with self._batch_lock:
+            pending, self._pending_add = self._pending_add, []
+            if self._add_timer is not None:
+                self._add_timer.cancel()
+                self._add_timer = None
+        
+        record_ids = []
+        for start in range(0, len(pending), self.BATCH_SIZE):
+            chunk = pending[start:start + self.BATCH_SIZE]
+            try:
+                request = BatchCreateBitableRecordRequest.builder() \
+                    .app_token(self.app_token) \
+                    .table_id(self.table_id) \
+                    .request_body(BatchCreateBitableRecordRequestBody.builder()
+                        .records([AppTableRecord.builder().fields(fields).build() for fields in chunk])
+                        .build()
+                    ) \
+                    .build()
+                
+                response = self.client.bitable.v1.bitable_record.batch_create(request)
+                
+                if response.success():
+                    record_ids.extend(record.record_id for record in response.data.records)
+                    logger.info(f"成功批量添加飞书记录: {len(chunk)} 条")
+                else:
+                    logger.error(f"批量添加飞书记录失败: {response.msg}")
+                    
+            except Exception as e:
+                logger.error(f"批量添加飞书记录异常: {e}")
+        
+        return record_ids
+    
+    def flush_updates(self) -> bool:
+        """
+        批量提交缓冲区中的状态更新
+        
+        Returns:
+            是否全部成功
+        """
+        with self._batch_lock:
+            pending, self._pending_update = self._pending_update, []
+            if self._update_timer is not None:
+                self._update_timer.cancel()
+                self._update_timer = None
+        
+        ok = True
+        for start in range(0, len(pending), self.BATCH_SIZE):
+            chunk = pending[start:start + self.BATCH_SIZE]
+            try:
+                request = BatchUpdateBitableRecordRequest.builder() \
+                    .app_token(self.app_token) \
+                    .table_id(self.table_id) \
+                    .request_body(BatchUpdateBitableRecordRequestBody.builder()
+                        .records([
+                            AppTableRecord.builder()
+                                .record_id(update['record_id'])
+                                .fields(update['fields'])
+                                .build()
+                            for update in chunk
+                        ])
+                        .build()
+                    ) \
+                    .build()
+                
+                response = self.client.bitable.v1.bitable_record.batch_update(request)
+                
+                if response.success():
+                    logger.info(f"成功批量更新飞书记录状态: {len(chunk)} 条")
+                else:
+                    ok = False
+                    logger.error(f"批量更新飞书记录失败: {response.msg}")
+                    
+            except Exception as e:
+                ok = False
+                logger.error(f"批量更新飞书记录异常: {e}")
+        
+        return ok
+    
+    def flush(self):
+        """写入所有缓冲中的新增和更新（退出时自动调用）"""
+        if self._pending_add:
+            self.flush_adds()
+        if self._pending_update:
+            self.flush_updates()
 
 
 class FeishuWebhookNotifier:
@@ -196,14 +406,10 @@ class FeishuWebhookNotifier:
     def __init__(self):
         self.webhook_url = os.getenv('FEISHU_WEBHOOK_URL', '')
         self.enabled = bool(self.webhook_url)
+        self._session = get_webhook_session()
     
     def send_content_generated(self, title: str, summary: str):
         """发送内容生成通知"""
-        if not self.enabled:
-            return
-        
-        import requests
-        
         message = {
             "msg_type": "interactive",
             "card": {
@@ -240,20 +446,11 @@ class FeishuWebhookNotifier:
             }
         }
         
-        try:
-            response = requests.post(self.webhook_url, json=message, timeout=10)
-            response.raise_for_status()
-            logger.info("飞书通知发送成功")
-        except Exception as e:
-            logger.error(f"飞书通知发送失败: {e}")
+        enqueue_post(self._session, self.webhook_url, _dumps(message).encode('utf-8'))
+        logger.info("飞书通知已加入发送队列")
     
     def send_publish_success(self, title: str, share_url: str):
         """发送发布成功通知"""
-        if not self.enabled:
-            return
-        
-        import requests
-        
         message = {
             "msg_type": "interactive",
             "card": {
@@ -290,18 +487,92 @@ class FeishuWebhookNotifier:
             }
         }
         
-        try:
-            response = requests.post(self.webhook_url, json=message, timeout=10)
-            response.raise_for_status()
-        except Exception as e:
-            logger.error(f"飞书通知发送失败: {e}")
+        enqueue_post(self._session, self.webhook_url, _dumps(message).encode('utf-8'))
+
+
+class _DisabledBitableClient:
+    """飞书多维表格配置不完整时使用的空实现，所有操作直接返回"""
+    
+    enabled = False
+    client = None
+    
+    def add_record(self, item: ContentItem) -> Optional[str]:
+        return None
+    
+    def add_record_batched(self, item: ContentItem, flush_threshold: int = 50, max_delay_s: float = 2.0):
+        return None
+    
+    def iter_pending_records(self, status: str = "已通过", page_size: int = 100) -> Iterator:
+        return iter(())
+    
+    def get_pending_records(self, status: str = "已通过") -> List[Dict]:
+        return []
+    
+    def update_record_status(self, record_id: str, status: str, note_id: str = None, share_url: str = None) -> bool:
+        return False
+    
+    def update_record_status_batched(self, record_id: str, status: str, note_id: str = None,
+                                     share_url: str = None, flush_threshold: int = 50,
+                                     max_delay_s: float = 2.0):
+        return None
+    
+    def flush_adds(self) -> List[str]:
+        return []
+    
+    def flush_updates(self) -> bool:
+        return True
+    
+    def flush(self):
+        return None
+
+
+class _DisabledWebhookNotifier:
+    """未配置 Webhook 时使用的空实现"""
+    
+    enabled = False
+    
+    def send_content_generated(self, title: str, summary: str):
+        return None
+    
+    def send_publish_success(self, title: str, share_url: str):
+        return None
+
+
+# 进程内共享的客户端实例，复用 lark.Client 的连接池和 tenant_access_token 缓存
+_BITABLE_SINGLETON = None
+_NOTIFIER_SINGLETON = None
+_singleton_lock = threading.Lock()
+
+
+def _bitable_configured() -> bool:
+    """飞书多维表格所需的配置是否齐全"""
+    return all(os.getenv(name) for name in (
+        'FEISHU_APP_ID', 'FEISHU_APP_SECRET', 'FEISHU_BITABLE_APP_TOKEN', 'FEISHU_BITABLE_TABLE_ID'
+    ))
 
 
-def get_feishu_client() -> FeishuBitableClient:
-    """获取飞书客户端实例"""
-    return FeishuBitableClient()
+def get_feishu_client():
+    """获取飞书客户端实例（单例），配置不完整时返回空实现"""
+    global _BITABLE_SINGLETON
+    if _BITABLE_SINGLETON is None:
+        with _singleton_lock:
+            if _BITABLE_SINGLETON is None:
+                if _bitable_configured():
+                    _BITABLE_SINGLETON = FeishuBitableClient()
+                else:
+                    logger.warning("飞书配置不完整，将使用本地存储模式")
+                    _BITABLE_SINGLETON = _DisabledBitableClient()
+    return _BITABLE_SINGLETON
 
 
-def get_feishu_notifier() -> FeishuWebhookNotifier:
-    """获取飞书通知器实例"""
-    return FeishuWebhookNotifier()
+def get_feishu_notifier():
+    """获取飞书通知器实例（单例），未配置 Webhook 时返回空实现"""
+    global _NOTIFIER_SINGLETON
+    if _NOTIFIER_SINGLETON is None:
+        with _singleton_lock:
+            if _NOTIFIER_SINGLETON is None:
+                if os.getenv('FEISHU_WEBHOOK_URL'):
+                    _NOTIFIER_SINGLETON = FeishuWebhookNotifier()
+                else:
+                    _NOTIFIER_SINGLETON = _DisabledWebhookNotifier()
+    return _NOTIFIER_SINGLETON
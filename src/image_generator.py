@@ -4,17 +4,106 @@ AI 图片生成模块
 """
 
 import os
+import time
+import asyncio
+import hashlib
+import itertools
+import aiohttp
 import requests
 import base64
-from typing import List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from PIL import Image, ImageDraw, ImageFont
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception, before_sleep_log
 import logging
 
+# numpy 为可选依赖，用于向量化生成渐变背景
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
 
+def _gradient_image(width: int, height: int) -> Image.Image:
+    """
+    生成从 #FF6B9D 向下渐暗的竖直渐变背景
+    先算出 1 像素宽的渐变列，再横向拉伸成整幅图，避免逐行调用 draw.line
+    """
+    if np is not None:
+        ys = np.arange(height, dtype=np.float64) / height
+        # 三个通道直接写入同一块预分配的 uint8 缓冲区，不再分别分配后拼接
+        rgb = np.empty((height, 3), dtype=np.uint8)
+        np.subtract(255, ys * 50, out=rgb[:, 0], casting='unsafe')
+        np.subtract(107, ys * 20, out=rgb[:, 1], casting='unsafe')
+        np.subtract(157, ys * 30, out=rgb[:, 2], casting='unsafe')
+        # (H, 3) -> (H, 1, 3) 只改变视图形状，不复制数据
+        column = Image.fromarray(rgb.reshape(height, 1, 3), 'RGB')
+    else:
+        pixels = bytearray()
+        for y in range(height):
+            pixels += bytes((int(255 - (y / height) * 50), int(107 - (y / height) * 20), int(157 - (y / height) * 30)))
+        column = Image.frombytes('RGB', (1, height), bytes(pixels))
+    return column.resize((width, height), Image.NEAREST)
+
+
+# 模板图片使用的系统字体，按顺序取第一个存在的
+FONT_PATHS = [
+    "C:/Windows/Fonts/simhei.ttf",  # Windows
+    "/System/Library/Fonts/PingFang.ttc",  # macOS
+    "/usr/share/fonts/truetype/noto/NotoSansCJK-Bold.ttc",  # Linux
+]
+
+# 本地图片库支持的图片格式
+LOCAL_IMAGE_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.webp'})
+
+# 图片下载遇到这些状态码时退避重试
+RETRY_STATUS_CODES = [408, 409, 425, 429, 500, 502, 503, 504]
+
+
+def _is_retryable_download_error(exc: BaseException) -> bool:
+    """超时、连接错误和可重试状态码才重试，其余错误（如 404）直接失败"""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in RETRY_STATUS_CODES
+    return isinstance(exc, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+
+_download_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    retry=retry_if_exception(_is_retryable_download_error),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+
+# 下载图片时每次写盘的块大小
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# 异步下载时执行阻塞文件 I/O 的线程池
+IMAGE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='image-io')
+
+
+# 文件名唯一后缀：进程号 + 启动时间只算一次，之后用单调计数器递增，不必每张图读一次系统熵
+_RUN_PREFIX = f"{os.getpid():x}{int(time.time()):x}"
+_FILE_SEQ = itertools.count()
+
+
+def _unique_suffix() -> str:
+    """本次运行内唯一的文件名后缀"""
+    return f"{_RUN_PREFIX}_{next(_FILE_SEQ):08x}"
+
+
+def _tmp_path_for(path: Path) -> Path:
+    """与目标文件同目录的临时文件路径"""
+    return path.with_name(f"{path.name}.{_unique_suffix()}.tmp")
+
+
 @dataclass
 class GeneratedImage:
     """生成的图片信息"""
@@ -32,6 +121,9 @@ class ImageGenerator:
         self.ai_provider = config.get('ai_provider', 'pollinations')
         self.count = config.get('count', 3)
         self.ratio = config.get('ratio', '3:4')
+        # 同一标题、提示词和尺寸的 AI 图片复用已下载的文件（默认关闭；cache_ttl 秒后重新生成）
+        self.cache_enabled = config.get('cache', False)
+        self.cache_ttl = config.get('cache_ttl', 7 * 24 * 3600)
         
         # 图片尺寸配置（小红书推荐 3:4）
         self.ratio_sizes = {
@@ -44,6 +136,24 @@ class ImageGenerator:
         self.output_dir = Path('../output/images')
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        # 下载图片共用的 HTTP 会话（连接复用 + 失败重试）
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=RETRY_STATUS_CODES)
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        
+        # 系统中文字体只探测一次，加载后按字号缓存（解析 CJK 字体文件较慢）
+        self._font_path = next((fp for fp in FONT_PATHS if os.path.exists(fp)), None)
+        self._font_cache: Dict[int, ImageFont.ImageFont] = {}
+        self._bbox_cache: Dict[Tuple[int, str], Tuple[int, int]] = {}
+        
+        # 渐变背景缓存 {(width, height): Image}，同尺寸模板图共用
+        self._gradient_cache: Dict[Tuple[int, int], Image.Image] = {}
+        
         logger.info(f"图片生成器初始化完成，来源: {self.source}")
     
     def generate(self, 
@@ -75,29 +185,30 @@ class ImageGenerator:
     
     def _generate_ai_images(self, title: str, content: str, tags: List[str], keyword: str) -> List[GeneratedImage]:
         """使用 AI 生成图片"""
-        images = []
-        
         # 生成图片提示词
-        prompts = self._create_image_prompts(title, keyword)
+        prompts = self._create_image_prompts(title, keyword)[:self.count]
         
-        for i, prompt in enumerate(prompts[:self.count], 1):
-            try:
-                if self.ai_provider == 'pollinations':
-                    image_path = self._generate_pollinations(prompt, i)
-                elif self.ai_provider == 'sd':
-                    image_path = self._generate_stable_diffusion(prompt, i)
-                else:
-                    image_path = self._generate_template_image(prompt, i, keyword)
-                
-                if image_path:
-                    images.append(GeneratedImage(
-                        local_path=image_path,
-                        prompt=prompt,
-                        source='ai'
-                    ))
-                    
-            except Exception as e:
-                logger.error(f"生成第 {i} 张图片失败: {e}")
+        if self.ai_provider == 'pollinations':
+            # 请求地址在发起任何请求前一次性构建好；各张图片并发请求，总耗时约等于最慢的一张
+            urls = [self._pollinations_url(prompt) for prompt in prompts]
+            image_paths = asyncio.run(self._generate_pollinations_batch(title, prompts, urls))
+        else:
+            image_paths = []
+            for i, prompt in enumerate(prompts, 1):
+                try:
+                    if self.ai_provider == 'sd':
+                        image_paths.append(self._generate_stable_diffusion(prompt, i))
+                    else:
+                        image_paths.append(self._generate_template_image(prompt, i, keyword))
+                except Exception as e:
+                    logger.error(f"生成第 {i} 张图片失败: {e}")
+                    image_paths.append(None)
+        
+        images = [
+            GeneratedImage(local_path=image_path, prompt=prompt, source='ai')
+            for prompt, image_path in zip(prompts, image_paths)
+            if image_path
+        ]
         
         # 如果 AI 生成失败，使用模板
         if not images:
@@ -115,33 +226,96 @@ class ImageGenerator:
         ]
         return base_prompts
     
-    def _generate_pollinations(self, prompt: str, index: int) -> Optional[str]:
+    def _pollinations_url(self, prompt: str) -> str:
+        """构建 Pollinations 免费图片生成 API 的请求地址"""
+        width, height = self.ratio_sizes.get(self.ratio, (900, 1200))
+        
+        # URL 编码提示词
+        encoded_prompt = quote(prompt)
+        return f"https://image.pollinations.ai/prompt/{encoded_prompt}?width={width}&height={height}&nologo=true"
+    
+    def _pollinations_cache_path(self, title: str, prompt: str) -> Path:
+        """按 (标题, 提示词, 尺寸) 哈希得到的缓存图片路径"""
+        width, height = self.ratio_sizes.get(self.ratio, (900, 1200))
+        key = hashlib.sha256(f"{title}|{prompt}|{width}|{height}".encode('utf-8')).hexdigest()
+        return self.output_dir / f"cache_{key}.png"
+    
+    def _cached_pollinations_image(self, title: str, prompt: str) -> Optional[str]:
+        """命中未过期的缓存时返回已生成的图片路径，跳过网络请求"""
+        if not self.cache_enabled:
+            return None
+        cache_path = self._pollinations_cache_path(title, prompt)
+        try:
+            age = time.time() - cache_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if age > self.cache_ttl:
+            return None
+        logger.info(f"命中图片缓存: {cache_path}")
+        return str(cache_path)
+    
+    def _pollinations_image_path(self, title: str, prompt: str, index: int) -> Path:
+        """新生成图片的保存路径（启用缓存时即缓存路径）"""
+        if self.cache_enabled:
+            return self._pollinations_cache_path(title, prompt)
+        return self.output_dir / f"generated_{index}_{_unique_suffix()}.png"
+    
+    async def _generate_pollinations_batch(self, title: str, prompts: List[str],
+                                           urls: List[str]) -> List[Optional[str]]:
+        """并发调用 Pollinations 生成多张图片，返回的路径顺序与 prompts 一致（失败为 None）"""
+        sem = asyncio.Semaphore(self.config.get('concurrency', 3))
+        async with aiohttp.ClientSession() as session:
+            return await asyncio.gather(*(
+                self._generate_pollinations_async(session, sem, title, prompt, url, i)
+                for i, (prompt, url) in enumerate(zip(prompts, urls), 1)
+            ))
+    
+    async def _generate_pollinations_async(self,
+                                           session: aiohttp.ClientSession,
+                                           sem: asyncio.Semaphore,
+                                           title: str,
+                                           prompt: str,
+                                           url: str,
+                                           index: int) -> Optional[str]:
         """
-        使用 Pollinations AI 免费生成图片
+        使用 Pollinations AI 免费生成一张图片
         无需 API Key，直接调用
         """
+        async with sem:
+            try:
+                cached = self._cached_pollinations_image(title, prompt)
+                if cached:
+                    return cached
+                
+                # 保存图片（按块写盘，不在内存中缓存整张图）
+                image_path = self._pollinations_image_path(title, prompt, index)
+                await self._download_async(session, url, image_path)
+                
+                logger.info(f"Pollinations 图片生成成功: {image_path}")
+                return str(image_path)
+                
+            except Exception as e:
+                logger.error(f"Pollinations 生成失败: {e}")
+                return None
+    
+    @_download_retry
+    async def _download_async(self, session: aiohttp.ClientSession, url: str, image_path: Path):
+        """下载图片到 image_path（限流/网络/5xx 错误自动指数退避重试）"""
+        loop = asyncio.get_running_loop()
+        tmp_path = _tmp_path_for(image_path)
         try:
-            # Pollinations 免费图片生成 API
-            width, height = self.ratio_sizes.get(self.ratio, (900, 1200))
-            
-            # URL 编码提示词
-            encoded_prompt = requests.utils.quote(prompt)
-            url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width={width}&height={height}&nologo=true"
-            
-            response = requests.get(url, timeout=60)
-            response.raise_for_status()
-            
-            # 保存图片
-            image_path = self.output_dir / f"generated_{index}_{os.urandom(4).hex()}.png"
-            with open(image_path, 'wb') as f:
-                f.write(response.content)
-            
-            logger.info(f"Pollinations 图片生成成功: {image_path}")
-            return str(image_path)
-            
-        except Exception as e:
-            logger.error(f"Pollinations 生成失败: {e}")
-            return None
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=60)) as response:
+                response.raise_for_status()
+                # 写盘放到线程池，慢磁盘刷写时不阻塞事件循环上其他图片的下载
+                f = await loop.run_in_executor(IMAGE_EXECUTOR, open, tmp_path, 'wb')
+                try:
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        await loop.run_in_executor(IMAGE_EXECUTOR, f.write, chunk)
+                finally:
+                    await loop.run_in_executor(IMAGE_EXECUTOR, f.close)
+            await loop.run_in_executor(IMAGE_EXECUTOR, os.replace, tmp_path, image_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
     
     def _generate_stable_diffusion(self, prompt: str, index: int) -> Optional[str]:
         """使用 Stable Diffusion API 生成（需配置本地或远程服务）"""
@@ -169,43 +343,22 @@ class ImageGenerator:
         try:
             width, height = self.ratio_sizes.get(self.ratio, (900, 1200))
             
-            # 创建渐变背景
-            image = Image.new('RGB', (width, height), color='#FF6B9D')
+            # 创建渐变背景（复制缓存的底图，避免重复计算）
+            size = (width, height)
+            base = self._gradient_cache.get(size)
+            if base is None:
+                base = self._gradient_cache[size] = _gradient_image(width, height)
+            image = base.copy()
             draw = ImageDraw.Draw(image)
             
-            # 添加渐变效果（简化版）
-            for y in range(height):
-                r = int(255 - (y / height) * 50)
-                g = int(107 - (y / height) * 20)
-                b = int(157 - (y / height) * 30)
-                draw.line([(0, y), (width, y)], fill=(r, g, b))
-            
             # 添加文字
             title_text = f"{keyword}\n精选内容"
             
-            # 尝试加载字体，失败则使用默认
-            try:
-                # 尝试使用系统字体
-                font_paths = [
-                    "C:/Windows/Fonts/simhei.ttf",  # Windows
-                    "/System/Library/Fonts/PingFang.ttc",  # macOS
-                    "/usr/share/fonts/truetype/noto/NotoSansCJK-Bold.ttc",  # Linux
-                ]
-                font = None
-                for fp in font_paths:
-                    if os.path.exists(fp):
-                        font = ImageFont.truetype(fp, 60)
-                        break
-                
-                if font is None:
-                    font = ImageFont.load_default()
-            except:
-                font = ImageFont.load_default()
+            font_size = 60
+            font = self._get_font(font_size)
             
-            # 绘制文字（居中）
-            bbox = draw.textbbox((0, 0), title_text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
+            # 绘制文字（居中），同一字号和文字只测量一次
+            text_width, text_height = self._text_size(draw, font_size, font, title_text)
             x = (width - text_width) / 2
             y = (height - text_height) / 2
             
@@ -214,8 +367,9 @@ class ImageGenerator:
             draw.text((x, y), title_text, font=font, fill='white')
             
             # 保存
-            image_path = self.output_dir / f"template_{index}_{keyword[:10]}_{os.urandom(4).hex()}.png"
-            image.save(image_path, quality=95)
+            image_path = self.output_dir / f"template_{index}_{keyword[:10]}_{_unique_suffix()}.png"
+            # PNG 会忽略 quality 参数；纯色渐变图用最低 zlib 压缩级别，保存快数倍，体积只略大
+            image.save(image_path, format='PNG', compress_level=1, optimize=False)
             
             return str(image_path)
             
@@ -223,52 +377,71 @@ class ImageGenerator:
             logger.error(f"生成模板图片失败: {e}")
             return None
     
+    def _text_size(self, draw: ImageDraw.ImageDraw, font_size: int,
+                   font: ImageFont.ImageFont, text: str) -> Tuple[int, int]:
+        """按 (字号, 文字) 缓存文字宽高"""
+        key = (font_size, text)
+        size = self._bbox_cache.get(key)
+        if size is None:
+            # 文字含换行，需用 textbbox 做多行测量（font.getbbox 只支持单行）
+            bbox = draw.textbbox((0, 0), text, font=font)
+            size = self._bbox_cache[key] = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+        return size
+    
+    def _get_font(self, size: int) -> ImageFont.ImageFont:
+        """按字号缓存已加载的字体，加载失败则使用默认字体"""
+        font = self._font_cache.get(size)
+        if font is None:
+            try:
+                font = ImageFont.truetype(self._font_path, size) if self._font_path else ImageFont.load_default()
+            except Exception:
+                font = ImageFont.load_default()
+            self._font_cache[size] = font
+        return font
+    
     def _search_images(self, keyword: str) -> List[GeneratedImage]:
         """从网络搜索图片（可以使用 Unsplash 等免费图库 API）"""
-        images = []
+        width, height = self.ratio_sizes.get(self.ratio, (900, 1200))
         
-        # 使用 Unsplash Source（免费）
-        try:
-            for i in range(self.count):
-                width, height = self.ratio_sizes.get(self.ratio, (900, 1200))
-                
-                # Unsplash 随机图片
-                url = f"https://source.unsplash.com/random/{width}x{height}/?{requests.utils.quote(keyword)}"
-                
-                response = requests.get(url, allow_redirects=True, timeout=30)
-                
-                image_path = self.output_dir / f"searched_{i+1}_{os.urandom(4).hex()}.jpg"
-                with open(image_path, 'wb') as f:
-                    f.write(response.content)
+        # 使用 Unsplash Source（免费）随机图片
+        url = f"https://source.unsplash.com/random/{width}x{height}/?{quote(keyword)}"
+        
+        def fetch(i: int) -> Optional[GeneratedImage]:
+            try:
+                image_path = self.output_dir / f"searched_{i+1}_{_unique_suffix()}.jpg"
+                with self._session.get(url, allow_redirects=True, stream=True, timeout=30) as response:
+                    with open(image_path, 'wb') as f:
+                        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
                 
-                images.append(GeneratedImage(
+                return GeneratedImage(
                     local_path=str(image_path),
                     prompt=f"Searched: {keyword}",
                     source='search'
-                ))
-                
-        except Exception as e:
-            logger.error(f"搜索图片失败: {e}")
+                )
+            except Exception as e:
+                logger.error(f"搜索图片失败: {e}")
+                return None
+        
+        # 各张图片并行下载
+        with ThreadPoolExecutor(max_workers=max(1, self.count)) as executor:
+            images = [image for image in executor.map(fetch, range(self.count)) if image]
         
         return images if images else self._generate_template_images(keyword, keyword)
     
     def _use_local_images(self) -> List[GeneratedImage]:
         """使用本地图片库"""
-        images = []
         local_dir = Path('../output/local_images')
         
-        if local_dir.exists():
-            for img_path in local_dir.glob('*'):
-                if img_path.suffix.lower() in ['.jpg', '.jpeg', '.png', '.webp']:
-                    images.append(GeneratedImage(
-                        local_path=str(img_path),
-                        prompt="Local image",
-                        source='local'
-                    ))
-                    if len(images) >= self.count:
-                        break
+        if not local_dir.exists():
+            return []
         
-        return images
+        # 惰性遍历目录，取够 count 张即停止，不为整个图库逐个构造路径
+        paths = (p for p in local_dir.iterdir() if p.suffix.lower() in LOCAL_IMAGE_EXTS)
+        return [
+            GeneratedImage(local_path=str(img_path), prompt="Local image", source='local')
+            for img_path in itertools.islice(paths, self.count)
+        ]
 
 
 if __name__ == "__main__":
@@ -9,13 +9,43 @@ import json
 import time
 import uuid
 import base64
+import threading
 import requests
-from typing import List, Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 logger = logging.getLogger(__name__)
 
+# orjson 为可选依赖，未安装时回退到标准库 json
+# 这里直接产出 bytes 作为请求体，避免大体积 base64 图片载荷再做一次编码
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    _loads = json.loads
+
+
+# 分块 base64 编码的块大小，需为 3 的倍数才能直接拼接各块的编码结果
+_B64_CHUNK_SIZE = 57 * 1024
+
+
+def _file_to_data_uri(path: str, mime_type: str) -> str:
+    """按块把文件编码为 base64 data URI，不在内存中同时保留整张原图和多份编码副本"""
+    buf = bytearray(f"data:{mime_type};base64,".encode('ascii'))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_B64_CHUNK_SIZE), b''):
+            buf += base64.b64encode(chunk)
+    return buf.decode('ascii')
+
 
 class MCPClient:
     """
@@ -23,11 +53,15 @@ class MCPClient:
     实现完整的 MCP 协议握手和工具调用
     """
     
-    def __init__(self, server_url: str, api_key: str = '', timeout: int = 120):
+    def __init__(self, server_url: str, api_key: str = '', timeout: int = 120,
+                 upload_url: str = ''):
         self.server_url = server_url.rstrip('/')
+        # 服务端提供的 multipart 二进制上传地址，未配置或探测到不支持时走 base64 工具调用
+        self.upload_url = upload_url
         self.api_key = api_key
         self.timeout = timeout
         self.request_id = 0
+        self._id_lock = threading.Lock()
         self.initialized = False
         self.tools = []
         
@@ -36,12 +70,36 @@ class MCPClient:
         }
         if api_key:
             self.headers['X-API-Key'] = api_key
+        
+        # 复用连接：握手、工具列表、上传、发布都发往同一服务
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            # JSON-RPC 调用（如 publish_note）不幂等：POST 只在连接失败或服务端明确未处理
+            # （408/425/429/503）时重试，不重试读超时，避免重复发布
+            max_retries=Retry(
+                total=5,
+                read=0,
+                backoff_factor=0.5,
+                status_forcelist=[408, 425, 429, 503],
+                allowed_methods=frozenset(['GET', 'POST'])
+            )
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
     
     def _next_id(self) -> int:
-        self.request_id += 1
-        return self.request_id
+        with self._id_lock:
+            self.request_id += 1
+            return self.request_id
     
-    def _send_request(self, method: str, params: Dict = None) -> Dict:
+    def _post(self, payload: Any, timeout: Optional[float] = None) -> requests.Response:
+        """发送 JSON-RPC 载荷"""
+        return self._session.post(self.server_url, data=_dumps(payload), timeout=timeout or self.timeout)
+    
+    def _send_request(self, method: str, params: Dict = None, timeout: Optional[float] = None) -> Dict:
         payload = {
             "jsonrpc": "2.0",
             "id": self._next_id(),
@@ -50,14 +108,9 @@ class MCPClient:
         }
         
         try:
-            response = requests.post(
-                self.server_url,
-                headers=self.headers,
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._post(payload, timeout)
             response.raise_for_status()
-            result = response.json()
+            result = _loads(response.content)
             
             if 'error' in result:
                 logger.error(f"MCP 错误: {result['error']}")
@@ -68,7 +121,7 @@ class MCPClient:
             logger.error(f"请求失败: {e}")
             raise
     
-    def _send_notification(self, method: str, params: Dict = None):
+    def _send_notification(self, method: str, params: Dict = None, timeout: Optional[float] = None):
         payload = {
             "jsonrpc": "2.0",
             "method": method,
@@ -76,17 +129,18 @@ class MCPClient:
         }
         
         try:
-            response = requests.post(
-                self.server_url,
-                headers=self.headers,
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._post(payload, timeout)
             response.raise_for_status()
         except Exception as e:
             logger.warning(f"通知发送失败: {e}")
     
-    def connect(self) -> bool:
+    def connect(self, timeout: Optional[float] = None) -> bool:
+        """
+        MCP 握手
+        
+        Args:
+            timeout: 握手请求超时，默认与普通调用相同
+        """
         try:
             result = self._send_request("initialize", {
                 "protocolVersion": "2024-11-05",
@@ -98,12 +152,12 @@ class MCPClient:
                     "name": "xiaohongshu-auto-publisher",
                     "version": "1.0.0"
                 }
-            })
+            }, timeout=timeout)
             
             logger.info(f"MCP 服务器: {result.get('serverInfo', {})}")
             logger.info(f"支持的能力: {list(result.get('capabilities', {}).keys())}")
             
-            self._send_notification("notifications/initialized")
+            self._send_notification("notifications/initialized", timeout=timeout)
             
             self.initialized = True
             return True
@@ -112,15 +166,101 @@ class MCPClient:
             logger.error(f"MCP 连接失败: {e}")
             return False
     
-    def list_tools(self) -> List[Dict]:
+    def list_tools(self, timeout: Optional[float] = None) -> List[Dict]:
         if not self.initialized:
             raise Exception("MCP 未初始化，请先调用 connect()")
         
-        result = self._send_request("tools/list", {})
+        result = self._send_request("tools/list", {}, timeout=timeout)
         self.tools = result.get('tools', [])
         logger.info(f"可用工具: {[t.get('name') for t in self.tools]}")
         return self.tools
     
+    def batch(self, calls: List[Tuple[str, Dict]]) -> List[Any]:
+        """
+        以 JSON-RPC 2.0 批量请求一次性发送多个调用
+        
+        Args:
+            calls: (method, params) 列表
+            
+        Returns:
+            list: 与 calls 顺序一致的结果，单个调用出错时对应位置为 Exception
+        """
+        if not calls:
+            return []
+        
+        ids = []
+        payload = []
+        for method, params in calls:
+            request_id = self._next_id()
+            ids.append(request_id)
+            payload.append({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": method,
+                "params": params or {}
+            })
+        
+        try:
+            response = self._post(payload)
+            response.raise_for_status()
+            replies = _loads(response.content)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"批量请求失败: {e}")
+            raise
+        
+        # 不支持批量的服务端会返回单个错误对象而不是数组
+        if not isinstance(replies, list):
+            error = replies.get('error') if isinstance(replies, dict) else replies
+            raise Exception(f"MCP 批量请求不受支持: {error}")
+        
+        # 响应数组的顺序不保证与请求一致，按 id 对应
+        by_id = {reply.get('id'): reply for reply in replies if isinstance(reply, dict)}
+        results = []
+        for request_id in ids:
+            reply = by_id.get(request_id)
+            if reply is None:
+                results.append(Exception(f"MCP 批量响应缺少 id={request_id}"))
+            elif 'error' in reply:
+                logger.error(f"MCP 错误: {reply['error']}")
+                results.append(Exception(f"MCP Error: {reply['error']}"))
+            else:
+                results.append(reply.get('result', {}))
+        return results
+    
+    def upload_binary(self, tool_name: str, filepath: str, mime_type: str) -> Optional[str]:
+        """
+        以 multipart/form-data 直接上传图片二进制，省去 base64 膨胀和 JSON 转义
+        
+        Returns:
+            str: 图片URL；服务端不支持该接口时返回 None，由调用方回退到 base64
+        """
+        if not self.upload_url:
+            return None
+        
+        with open(filepath, 'rb') as f:
+            response = self._session.post(
+                self.upload_url,
+                data={'tool': tool_name},
+                files={'file': (os.path.basename(filepath), f, mime_type)},
+                # 去掉会话默认的 JSON Content-Type，由 requests 生成 multipart 边界
+                headers={'Content-Type': None},
+                timeout=self.timeout
+            )
+        
+        if response.status_code in (404, 405, 415, 501):
+            logger.info(f"服务端不支持二进制上传 ({response.status_code})，改用 base64")
+            self.upload_url = ''
+            return None
+        
+        response.raise_for_status()
+        try:
+            body = _loads(response.content)
+        except ValueError:
+            return response.text.strip() or None
+        if isinstance(body, dict):
+            return body.get('url') or body.get('data', {}).get('url')
+        return None
+    
     def call_tool(self, tool_name: str, arguments: Dict) -> Any:
         if not self.initialized:
             raise Exception("MCP 未初始化，请先调用 connect()")
@@ -134,6 +274,18 @@ class MCPClient:
         })
         
         return result
+    
+    def call_tools(self, tool_calls: List[Tuple[str, Dict]]) -> List[Any]:
+        """批量调用多个工具，一次 HTTP 往返"""
+        if not self.initialized:
+            raise Exception("MCP 未初始化，请先调用 connect()")
+        
+        logger.info(f"批量调用工具: {[name for name, _ in tool_calls]}")
+        
+        return self.batch([
+            ("tools/call", {"name": name, "arguments": arguments})
+            for name, arguments in tool_calls
+        ])
 
 
 class MCPPublisher:
@@ -148,14 +300,20 @@ class MCPPublisher:
         self.server_url = config.get('server_url', 'https://mcp.zouying.work/mcp')
         self.api_key = config.get('api_key', '') or os.getenv('X_MCP_API_KEY', '')
         self.timeout = config.get('timeout', 180)
+        self.upload_url = config.get('upload_url', '') or os.getenv('X_MCP_UPLOAD_URL', '')
+        # 握手和工具列表属于健康检查，用较短的超时，服务不可达时尽快失败
+        self.health_timeout = config.get('health_timeout', 10)
         
         self.client = MCPClient(
             server_url=self.server_url,
             api_key=self.api_key,
-            timeout=self.timeout
+            timeout=self.timeout,
+            upload_url=self.upload_url
         )
         
+        # 构造时不联网，首次调用时才握手；锁保证并发首调只握手一次
         self._connected = False
+        self._connect_lock = threading.Lock()
         
         logger.info(f"MCP 发布器初始化，服务地址: {self.server_url}")
     
@@ -167,13 +325,17 @@ class MCPPublisher:
             logger.error("未配置 X-MCP API Key，请设置 X_MCP_API_KEY 环境变量或在配置中设置 api_key")
             return False
         
-        try:
-            if self.client.connect():
-                self.client.list_tools()
-                self._connected = True
+        with self._connect_lock:
+            if self._connected:
                 return True
-        except Exception as e:
-            logger.error(f"连接 MCP 服务失败: {e}")
+            
+            try:
+                if self.client.connect(timeout=self.health_timeout):
+                    self.client.list_tools(timeout=self.health_timeout)
+                    self._connected = True
+                    return True
+            except Exception as e:
+                logger.error(f"连接 MCP 服务失败: {e}")
         
         return False
     
@@ -211,17 +373,24 @@ class MCPPublisher:
             return None
         
         try:
-            valid_images = []
-            for path in image_paths:
+            # 本地图片并行上传，结果按原顺序放回
+            resolved: List[Optional[str]] = [None] * len(image_paths)
+            uploads = []
+            for i, path in enumerate(image_paths):
                 if path.startswith('http://') or path.startswith('https://'):
-                    valid_images.append(path)
+                    resolved[i] = path
                 elif os.path.exists(path):
-                    image_url = self._upload_image(path)
-                    if image_url:
-                        valid_images.append(image_url)
+                    uploads.append((i, path))
                 else:
                     logger.warning(f"图片不存在: {path}")
             
+            if uploads:
+                paths = [path for _, path in uploads]
+                for (i, _), image_url in zip(uploads, self._upload_images(paths)):
+                    resolved[i] = image_url
+            
+            valid_images = [url for url in resolved if url]
+            
             if not valid_images:
                 logger.error("没有有效的图片，无法发布")
                 return None
@@ -289,36 +458,77 @@ class MCPPublisher:
             logger.error(f"发布过程出错: {e}")
             return None
     
+    def _upload_images(self, image_paths: List[str]) -> List[Optional[str]]:
+        """
+        批量上传多张图片，结果与输入顺序一致
+        所有 upload_image 调用合并为一个 JSON-RPC 批量请求；服务端不支持批量时回退为并行逐张上传
+        publish_note 依赖上传返回的 URL，因此不能放进同一批次
+        配置了二进制上传地址时优先走 multipart，逐张并行上传
+        """
+        if len(image_paths) > 1 and not self.client.upload_url:
+            try:
+                results = self.client.call_tools([
+                    ("upload_image", {"image_data": _file_to_data_uri(path, self._mime_type(path))})
+                    for path in image_paths
+                ])
+                return [
+                    self._upload_result(path, result)
+                    for path, result in zip(image_paths, results)
+                ]
+            except Exception as e:
+                logger.warning(f"批量上传失败，改为逐张上传: {e}")
+        
+        with ThreadPoolExecutor(max_workers=min(4, len(image_paths))) as executor:
+            return list(executor.map(self._upload_image, image_paths))
+    
+    @staticmethod
+    def _upload_result(image_path: str, result: Any) -> Optional[str]:
+        """解析单个 upload_image 结果，失败时回退到本地路径"""
+        if isinstance(result, Exception):
+            logger.warning(f"图片上传失败，尝试直接使用本地路径: {result}")
+            return image_path
+        
+        content_list = result.get('content', [])
+        if content_list:
+            return content_list[0].get('text', '')
+        
+        return None
+    
+    @staticmethod
+    def _mime_type(image_path: str) -> str:
+        ext = Path(image_path).suffix.lower()
+        return {
+            '.jpg': 'image/jpeg',
+            '.jpeg': 'image/jpeg',
+            '.png': 'image/png',
+            '.gif': 'image/gif',
+            '.webp': 'image/webp'
+        }.get(ext, 'image/jpeg')
+    
     def _upload_image(self, image_path: str) -> Optional[str]:
         """
         上传图片并返回URL
         注意：x-mcp 可能需要先上传图片，这里暂时返回本地路径
         实际使用时可能需要先调用上传工具
         """
+        mime_type = self._mime_type(image_path)
+        
+        if self.client.upload_url:
+            try:
+                image_url = self.client.upload_binary("upload_image", image_path, mime_type)
+                if image_url:
+                    return image_url
+            except Exception as e:
+                logger.warning(f"二进制上传失败，改用 base64: {e}")
+        
         try:
-            with open(image_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-            
-            ext = Path(image_path).suffix.lower()
-            mime_type = {
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.webp': 'image/webp'
-            }.get(ext, 'image/jpeg')
-            
-            data_uri = f"data:{mime_type};base64,{image_data}"
+            data_uri = _file_to_data_uri(image_path, mime_type)
             
             result = self.client.call_tool("upload_image", {
                 "image_data": data_uri
             })
             
-            content_list = result.get('content', [])
-            if content_list:
-                return content_list[0].get('text', '')
-            
-            return None
+            return self._upload_result(image_path, result)
             
         except Exception as e:
             logger.warning(f"图片上传失败，尝试直接使用本地路径: {e}")
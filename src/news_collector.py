@@ -8,12 +8,20 @@ import os
 import sys
 import time
 import json
+import asyncio
+import atexit
 import logging
 import hashlib
+import heapq
+import itertools
+import threading
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timedelta
+from operator import attrgetter
 from typing import List, Dict, Optional, Set
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import yaml
 
 # 添加项目根目录
@@ -32,8 +40,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 去重指纹不是安全用途，优先使用更快的 xxhash（可选依赖）；存 64 位整数比十六进制字符串更省内存
+try:
+    import xxhash
 
-@dataclass
+    def _content_fingerprint(data: bytes) -> int:
+        return xxhash.xxh3_64_intdigest(data)
+except ImportError:
+    def _content_fingerprint(data: bytes) -> int:
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+# orjson 为可选依赖，未安装时回退到标准库 json；两者都直接产出/读取 bytes，整文件一次读写
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+    def _dumps_line(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+    _loads = json.loads
+
+
+# rbloom 为可选依赖：布隆过滤器持久记录见过的 URL/内容指纹，
+# 资讯因 max_total_news 被淘汰后也不会被重新收集；未安装时只按当前资讯精确去重
+try:
+    from rbloom import Bloom
+except ImportError:
+    Bloom = None
+
+
+def _identity_hash(fingerprint: int) -> int:
+    """布隆过滤器里存的已是 64 位指纹，无需再哈希"""
+    return fingerprint
+
+
+# 仍有未落盘修改的收集器，进程退出时统一写回（弱引用，不延长按请求创建的收集器的生命周期）
+_live_collectors: "weakref.WeakSet[NewsCollector]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all_collectors():
+    for collector in list(_live_collectors):
+        collector.flush()
+
+
+@dataclass(slots=True)
 class NewsItem:
     """资讯条目"""
     id: str
@@ -46,9 +108,17 @@ class NewsItem:
     published_date: Optional[str] = None
     read_count: int = 0
     is_used: bool = False
+    # 标题 + 摘要的去重指纹，随资讯持久化，加载时不必重新计算
+    content_hash: Optional[int] = None
     
     def to_dict(self) -> Dict:
-        return asdict(self)
+        """对外（API）展示用的字典，不含去重指纹（64 位整数在 JavaScript 中会丢失精度）"""
+        # 字段都是不可变的简单值，直接取属性，省去 asdict 的递归深拷贝
+        return {name: getattr(self, name) for name in self.__slots__ if name != 'content_hash'}
+    
+    def to_record(self) -> Dict:
+        """持久化用的字典（含去重指纹）"""
+        return {name: getattr(self, name) for name in self.__slots__}
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'NewsItem':
@@ -58,6 +128,11 @@ class NewsItem:
 class NewsCollector:
     """资讯收集器"""
     
+    # 状态变更后延迟写盘的秒数，期间的多次修改合并为一次追加
+    SAVE_DELAY = 2.0
+    # 变更日志超过 max_total_news 的这个倍数时压缩为新快照
+    COMPACT_FACTOR = 2
+    
     def __init__(self, config_file: Optional[Path] = None):
         """初始化收集器"""
         if config_file is None:
@@ -70,20 +145,38 @@ class NewsCollector:
         self.data_dir = Path(__file__).parent.parent / 'data'
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
-        # 资讯存储文件
+        # 资讯存储文件：collected_news.json 为快照，news.jsonl 为快照之后追加的变更日志
         self.news_file = self.data_dir / 'collected_news.json'
+        self.news_log = self.data_dir / 'news.jsonl'
+        self.bloom_file = self.data_dir / 'dedup.bloom'
         
         # 已收集的 URL 集合（用于去重）
         self.seen_urls: Set[str] = set()
-        self.seen_hashes: Set[str] = set()
+        self.seen_hashes: Set[int] = set()
+        
+        # 历史去重布隆过滤器（可选）
+        self._bloom = self._load_bloom()
+        
+        # 延迟写回状态：变更先记入 _pending_ops，由定时器或 flush() 合并追加到日志
+        # 同一把锁也保护 news_list 和去重集合，供多个关键词并发收集
+        self._save_lock = threading.RLock()
+        self._pending_ops: List[Dict] = []
+        self._log_lines = 0
+        self._save_timer: Optional[threading.Timer] = None
+        self._buffer_depth = 0
+        _live_collectors.add(self)
+        
+        # run_forever 的停止信号
+        self._stop_event = threading.Event()
         
         # 加载已有数据
         self.news_list: List[NewsItem] = []
-        self._load_news()
-        
-        # 初始化搜索引擎
-        search_config = self.config.get('search', {})
-        self.searcher = SimpleSearchEngine(search_config)
+        # id -> NewsItem 索引，按 id 查找为 O(1)
+        self._by_id: Dict[str, NewsItem] = {}
+        # 未使用资讯索引（id -> NewsItem，按收集时间倒序），全部及按关键词各一份
+        self._unused: Dict[str, NewsItem] = {}
+        self._unused_by_keyword: Dict[str, Dict[str, NewsItem]] = {}
+        self._id_seq = itertools.count()
         
         # 收集配置
         self.collector_config = self.config.get('news_collector', {})
@@ -91,92 +184,311 @@ class NewsCollector:
         self.collect_interval = self.collector_config.get('collect_interval', 3600)  # 1小时
         self.max_news_per_keyword = self.collector_config.get('max_news_per_keyword', 20)
         self.max_total_news = self.collector_config.get('max_total_news', 200)
+        
+        self._load_news()
+        
+        # 初始化搜索引擎
+        search_config = self.config.get('search', {})
+        self.searcher = SimpleSearchEngine(search_config)
     
     def _load_news(self):
-        """加载已收集的资讯"""
+        """加载已收集的资讯：读取快照后重放变更日志"""
         if self.news_file.exists():
             try:
-                with open(self.news_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.news_list = [NewsItem.from_dict(item) for item in data]
-                    
-                    # 构建去重集合
-                    for news in self.news_list:
-                        self.seen_urls.add(news.url)
-                        self.seen_hashes.add(self._hash_content(news.title + news.snippet))
-                
-                logger.info(f"已加载 {len(self.news_list)} 条资讯")
+                data = _loads(self.news_file.read_bytes())
+                self.news_list = [NewsItem.from_dict(item) for item in data]
             except Exception as e:
                 logger.error(f"加载资讯失败: {e}")
                 self.news_list = []
+        
+        self._reindex()
+        corrupted = self._replay_log()
+        # 日志中的新增记录按时间正序追加，加载时排一次序，之后由插入位置维持倒序
+        self.news_list.sort(key=lambda x: x.collected_at, reverse=True)
+        self._trim()
+        # 重放会改变 is_used 和顺序，按最终列表重建索引
+        self._reindex()
+        
+        # 残缺行之后再追加会与新记录粘在同一行，直接压缩为新快照；
+        # 必须在排序之后进行，否则截断时会保留快照中的旧资讯而丢掉日志里较新的资讯
+        if corrupted:
+            self._save_news()
+        
+        # 构建去重集合；持久化的指纹可能由另一种哈希实现算出（如后来才装上 xxhash），
+        # 抽查第一条，不一致时全部重算
+        if self.news_list:
+            first = self.news_list[0]
+            if first.content_hash != self._hash_content(first.title + first.snippet):
+                for news in self.news_list:
+                    news.content_hash = None
+        for news in self.news_list:
+            self._remember(news)
+        
+        if self.news_list:
+            logger.info(f"已加载 {len(self.news_list)} 条资讯")
+    
+    def _replay_log(self) -> bool:
+        """在快照之上按顺序重放变更日志，返回日志中是否有损坏的记录"""
+        if not self.news_log.exists():
+            return False
+        
+        corrupted = False
+        try:
+            with open(self.news_log, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = _loads(line)
+                    except ValueError:
+                        # 进程崩溃时可能留下写了一半的最后一行
+                        logger.warning("跳过损坏的资讯日志记录")
+                        corrupted = True
+                        continue
+                    self._log_lines += 1
+                    self._apply(record)
+        except Exception as e:
+            logger.error(f"重放资讯日志失败: {e}")
+        
+        return corrupted
+    
+    def _apply(self, record: Dict):
+        """应用一条变更记录；记录都是幂等的，重复重放结果不变"""
+        op = record.get('op')
+        if op == 'add':
+            news = NewsItem.from_dict(record['item'])
+            if news.id not in self._by_id:
+                self.news_list.append(news)
+                self._by_id[news.id] = news
+        elif op == 'update':
+            news = self._by_id.get(record['id'])
+            if news is not None:
+                news.read_count = record['read_count']
+                news.is_used = record['is_used']
+    
+    def _load_bloom(self):
+        """加载持久化的布隆过滤器，不存在或未安装 rbloom 时返回新建的过滤器或 None"""
+        if Bloom is None:
+            return None
+        
+        collector_config = self.config.get('news_collector', {})
+        if self.bloom_file.exists():
+            try:
+                return Bloom.load(str(self.bloom_file), _identity_hash)
+            except Exception as e:
+                logger.warning(f"加载去重过滤器失败，重新创建: {e}")
+        return Bloom(
+            collector_config.get('dedup_capacity', 100_000),
+            collector_config.get('dedup_error_rate', 0.001),
+            hash_func=_identity_hash
+        )
+    
+    def _remember(self, news: NewsItem):
+        """记录资讯的 URL 和内容指纹用于去重（指纹缺失时补算并写回 news.content_hash）"""
+        content_hash = news.content_hash
+        if content_hash is None:
+            content_hash = news.content_hash = self._hash_content(news.title + news.snippet)
+        self.seen_urls.add(news.url)
+        self.seen_hashes.add(content_hash)
+        if self._bloom is not None:
+            if news.url:
+                self._bloom.add(self._hash_content(news.url))
+            self._bloom.add(content_hash)
     
     def _save_news(self):
-        """保存资讯到文件"""
+        """把当前资讯压缩写成新快照，并清空变更日志"""
+        with self._save_lock:
+            self._cancel_save_timer()
+            try:
+                self._trim()
+                
+                # 先原子替换快照再删日志；两步之间崩溃时日志在新快照上重放，结果不变
+                tmp = self.news_file.with_suffix('.json.tmp')
+                tmp.write_bytes(_dumps([news.to_record() for news in self.news_list]))
+                os.replace(tmp, self.news_file)
+                self.news_log.unlink(missing_ok=True)
+                self._log_lines = 0
+                self._pending_ops = []
+                if self._bloom is not None:
+                    self._bloom.save(str(self.bloom_file))
+                
+                logger.info(f"已保存 {len(self.news_list)} 条资讯")
+            except Exception as e:
+                logger.error(f"保存资讯失败: {e}")
+    
+    def _append_log(self):
+        """把待写变更一次性追加到日志末尾"""
+        ops, self._pending_ops = self._pending_ops, []
         try:
-            # 按时间排序，最新的在前
-            self.news_list.sort(key=lambda x: x.collected_at, reverse=True)
-            
-            # 限制总数
-            if len(self.news_list) > self.max_total_news:
-                self.news_list = self.news_list[:self.max_total_news]
-            
-            with open(self.news_file, 'w', encoding='utf-8') as f:
-                json.dump([news.to_dict() for news in self.news_list], f, ensure_ascii=False, indent=2)
-            
-            logger.info(f"已保存 {len(self.news_list)} 条资讯")
+            with open(self.news_log, 'ab') as f:
+                f.write(b''.join(_dumps_line(op) for op in ops))
+            self._log_lines += len(ops)
+            if self._bloom is not None and any(op['op'] == 'add' for op in ops):
+                self._bloom.save(str(self.bloom_file))
         except Exception as e:
-            logger.error(f"保存资讯失败: {e}")
+            logger.error(f"写入资讯日志失败: {e}")
+            self._pending_ops = ops + self._pending_ops
     
-    def _hash_content(self, content: str) -> str:
-        """生成内容哈希用于去重"""
-        return hashlib.md5(content.encode('utf-8')).hexdigest()
+    def _trim(self):
+        """限制总数（news_list 始终按收集时间倒序，直接截掉最旧的）"""
+        if len(self.news_list) > self.max_total_news:
+            self.news_list = self.news_list[:self.max_total_news]
+            self._reindex()
+    
+    def _reindex(self):
+        """按 news_list 重建 id 索引和未使用索引（id 重复时与顺序查找一致，取第一条）"""
+        self._by_id = {}
+        self._unused = {}
+        self._unused_by_keyword = {}
+        for news in self.news_list:
+            if news.id in self._by_id:
+                continue
+            self._by_id[news.id] = news
+            if not news.is_used:
+                self._unused[news.id] = news
+                self._unused_by_keyword.setdefault(news.keyword, {})[news.id] = news
+    
+    def _index_unused(self, keyword: str, items: List[NewsItem]):
+        """把新收集的资讯放到未使用索引最前面，保持与 news_list 相同的倒序"""
+        fresh = {news.id: news for news in items}
+        self._unused = {**fresh, **self._unused}
+        self._unused_by_keyword[keyword] = {**fresh, **self._unused_by_keyword.get(keyword, {})}
+    
+    def _record_update(self, news: NewsItem):
+        """记录资讯状态变更（写入变更后的完整状态，重放时幂等）"""
+        with self._save_lock:
+            self._pending_ops.append({
+                'op': 'update',
+                'id': news.id,
+                'read_count': news.read_count,
+                'is_used': news.is_used
+            })
+            self._mark_dirty()
     
-    def _is_duplicate(self, result: SearchResult) -> bool:
-        """检查是否重复"""
-        if result.url and result.url in self.seen_urls:
-            return True
+    def _mark_dirty(self):
+        """有待写变更时在 SAVE_DELAY 秒后合并写盘（buffered() 期间只记录不调度）"""
+        with self._save_lock:
+            if self._buffer_depth == 0 and self._save_timer is None:
+                self._save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+    
+    def _cancel_save_timer(self):
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+    
+    def flush(self):
+        """立即写回未保存的变更；日志超过 COMPACT_FACTOR × max_total_news 行时压缩为新快照"""
+        with self._save_lock:
+            self._cancel_save_timer()
+            if not self._pending_ops:
+                return
+            if self._log_lines + len(self._pending_ops) > self.COMPACT_FACTOR * self.max_total_news:
+                self._save_news()
+            else:
+                self._append_log()
+    
+    @contextmanager
+    def buffered(self):
+        """
+        批量修改上下文，退出时只保存一次
         
-        content_hash = self._hash_content(result.title + result.snippet)
-        if content_hash in self.seen_hashes:
-            return True
+        用法:
+            with collector.buffered():
+                for news_id in ids:
+                    collector.increment_read_count(news_id)
+        """
+        with self._save_lock:
+            self._buffer_depth += 1
+        try:
+            yield self
+        finally:
+            with self._save_lock:
+                self._buffer_depth -= 1
+                if self._buffer_depth == 0:
+                    self.flush()
+    
+    def _hash_content(self, content: str) -> int:
+        """生成内容哈希用于去重"""
+        return _content_fingerprint(content.encode('utf-8'))
+    
+    def _seen_in_history(self, url: str, content_hash: int) -> bool:
+        """当前列表之外的历史资讯只能由布隆过滤器判断（极低概率误判为重复）"""
+        if self._bloom is not None:
+            if url and self._hash_content(url) in self._bloom:
+                logger.debug(f"布隆过滤器判定 URL 已收集过，跳过: {url}")
+                return True
+            if content_hash in self._bloom:
+                logger.debug(f"布隆过滤器判定内容已收集过，跳过: {url or content_hash}")
+                return True
         
         return False
     
-    def collect_for_keyword(self, keyword: str) -> List[NewsItem]:
-        """为单个关键词收集资讯"""
+    def collect_for_keyword(self, keyword: str,
+                            results: Optional[List[SearchResult]] = None) -> List[NewsItem]:
+        """
+        为单个关键词收集资讯
+        
+        Args:
+            keyword: 关键词
+            results: 已搜索好的结果，为 None 时现场搜索
+        """
         logger.info(f"开始收集关键词: {keyword}")
         
         collected: List[NewsItem] = []
         
         try:
-            results = self.searcher.search(keyword)
+            # 搜索（网络 I/O）不持锁，去重和写入共享状态时持锁
+            if results is None:
+                results = self.searcher.search(keyword)
             logger.info(f"关键词 '{keyword}' 搜索到 {len(results)} 条结果")
             
-            for result in results:
-                if self._is_duplicate(result):
-                    continue
-                
-                news = NewsItem(
-                    id=f"news_{int(time.time())}_{len(collected)}",
-                    title=result.title,
-                    url=result.url,
-                    snippet=result.snippet,
-                    source=result.source,
-                    keyword=keyword,
-                    collected_at=datetime.now().isoformat(),
-                    published_date=result.published_date
-                )
-                
-                self.news_list.append(news)
-                self.seen_urls.add(news.url)
-                self.seen_hashes.add(self._hash_content(news.title + news.snippet))
-                collected.append(news)
+            # 内容指纹在锁外一次算好，去重检查和记录共用，不再逐条重复哈希
+            hashes = [self._hash_content(r.title + r.snippet) for r in results]
+            
+            with self._save_lock:
+                # 同一批资讯共用一个收集时间；id 用批次时间戳 + 实例内递增序号，跨关键词也不会重复
+                # 在锁内取时间，保证后入库的批次时间不早于先入库的，news_list 的倒序不变式才成立
+                now_iso = datetime.now().isoformat()
+                batch_ts = time.time_ns()
                 
-                logger.debug(f"收集到: {news.title[:50]}...")
+                seen_urls, seen_hashes = self.seen_urls, self.seen_hashes
+                for result, content_hash in zip(results, hashes):
+                    # 同批次内的重复也会被拦下：入选的结果随即加入 seen 集合
+                    if (result.url and result.url in seen_urls) or content_hash in seen_hashes:
+                        continue
+                    if self._seen_in_history(result.url, content_hash):
+                        continue
+                    
+                    news = NewsItem(
+                        id=f"news_{batch_ts}_{next(self._id_seq)}",
+                        title=result.title,
+                        url=result.url,
+                        snippet=result.snippet,
+                        source=result.source,
+                        keyword=keyword,
+                        collected_at=now_iso,
+                        published_date=result.published_date,
+                        content_hash=content_hash
+                    )
+                    
+                    self._by_id.setdefault(news.id, news)
+                    self._remember(news)
+                    self._pending_ops.append({'op': 'add', 'item': news.to_record()})
+                    collected.append(news)
+                    
+                    logger.debug(f"收集到: {news.title[:50]}...")
+                    
+                    # 限制每个关键词的数量
+                    if len(collected) >= self.max_news_per_keyword:
+                        break
                 
-                # 限制每个关键词的数量
-                if len(collected) >= self.max_news_per_keyword:
-                    break
+                if collected:
+                    # news_list 按收集时间倒序维护：本批最新，整体插到最前面
+                    self.news_list[:0] = collected
+                    self._index_unused(keyword, collected)
+                    self._mark_dirty()
             
         except Exception as e:
             logger.error(f"收集关键词 '{keyword}' 失败: {e}")
@@ -196,12 +508,16 @@ class NewsCollector:
             logger.warning("没有配置关键词，使用默认关键词")
             self.keywords = ['AI人工智能', '科技趋势', '小红书运营']
         
-        for keyword in self.keywords:
-            collected = self.collect_for_keyword(keyword)
+        # 各关键词（及各搜索源）的请求在同一个事件循环上并发，搜索完成后依次去重入库
+        all_results = asyncio.run(self.searcher.search_many(self.keywords))
+        for keyword, results in zip(self.keywords, all_results):
+            collected = self.collect_for_keyword(keyword, results)
             total_collected += len(collected)
         
-        # 保存结果
-        self._save_news()
+        # 保存结果：新资讯追加到变更日志
+        with self._save_lock:
+            self._trim()
+            self.flush()
         
         logger.info("=" * 60)
         logger.info(f"资讯收集完成，共收集 {total_collected} 条新资讯")
@@ -212,47 +528,53 @@ class NewsCollector:
     
     def get_unused_news(self, keyword: Optional[str] = None, limit: int = 10) -> List[NewsItem]:
         """获取未使用的资讯"""
-        news = [n for n in self.news_list if not n.is_used]
-        
-        if keyword:
-            news = [n for n in news if n.keyword == keyword]
-        
-        # 按读取次数排序（最少的优先）
-        news.sort(key=lambda x: x.read_count)
-        
-        return news[:limit]
+        with self._save_lock:
+            pool = self._unused_by_keyword.get(keyword, {}) if keyword else self._unused
+            # 按读取次数取最少的 limit 条（nsmallest 稳定，同读取次数时新的优先）
+            return heapq.nsmallest(limit, pool.values(), key=attrgetter('read_count'))
     
     def mark_as_used(self, news_id: str):
         """标记资讯为已使用"""
-        for news in self.news_list:
-            if news.id == news_id:
-                news.is_used = True
-                self._save_news()
-                logger.info(f"标记资讯已使用: {news_id}")
-                return
+        news = self._by_id.get(news_id)
+        if news is None:
+            logger.warning(f"未找到资讯: {news_id}")
+            return
         
-        logger.warning(f"未找到资讯: {news_id}")
+        with self._save_lock:
+            news.is_used = True
+            self._unused.pop(news_id, None)
+            self._unused_by_keyword.get(news.keyword, {}).pop(news_id, None)
+        self._record_update(news)
+        logger.info(f"标记资讯已使用: {news_id}")
     
     def increment_read_count(self, news_id: str):
         """增加读取次数"""
-        for news in self.news_list:
-            if news.id == news_id:
-                news.read_count += 1
-                self._save_news()
-                return
+        news = self._by_id.get(news_id)
+        if news is not None:
+            news.read_count += 1
+            self._record_update(news)
     
     def run_forever(self):
         """持续运行，定时收集"""
         logger.info(f"资讯收集器已启动，收集间隔: {self.collect_interval} 秒")
         
-        while True:
+        while not self._stop_event.is_set():
             try:
                 self.collect_all()
             except Exception as e:
                 logger.error(f"收集过程出错: {e}")
             
             logger.info(f"等待 {self.collect_interval} 秒后再次收集...")
-            time.sleep(self.collect_interval)
+            # 可被 stop() 立即唤醒，而不是睡满整个间隔
+            if self._stop_event.wait(self.collect_interval):
+                break
+        
+        self.flush()
+        logger.info("资讯收集器已停止")
+    
+    def stop(self):
+        """通知 run_forever 在当前轮次结束后退出"""
+        self._stop_event.set()
 
 
 def main():
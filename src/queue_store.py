@@ -0,0 +1,258 @@
+"""
+内容队列存储
+使用 SQLite（WAL 模式）保存待审核 / 已发布的内容，Web 服务和定时任务进程共用同一个数据库；
+审核、发布等操作只更新对应的一行，不再整体重写队列文件
+"""
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+
+class QueueStore:
+    """
+    内容队列（SQLite）
+
+    每条内容以完整 JSON 存在 data 列，id / status / created_at / published_at 单独成列用于查询和统计；
+    列表按写入顺序（rowid）返回，与原来 queue.json 中的顺序一致
+    """
+
+    def __init__(self, db_path: Path, legacy_json: Optional[Path] = None):
+        """
+        Args:
+            db_path: 数据库文件路径
+            legacy_json: 旧版 queue.json 路径；数据库为空且该文件存在时导入，导入后重命名为 .migrated
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        # isolation_level=None：不自动开启事务，写操作显式 BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at TEXT NOT NULL DEFAULT '', "
+            "published_at TEXT NOT NULL DEFAULT '', data TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_items_status ON items (status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_items_created_at ON items (created_at)")
+
+        if legacy_json is not None:
+            self._import_legacy(Path(legacy_json))
+
+    @contextmanager
+    def transaction(self):
+        """写事务（BEGIN IMMEDIATE，事务开始即持有写锁，读-改-写之间不会被其他进程插入）"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _import_legacy(self, path: Path):
+        """从旧版 queue.json 导入数据"""
+        if not path.exists():
+            return
+
+        with self.transaction() as conn:
+            if conn.execute("SELECT 1 FROM items LIMIT 1").fetchone():
+                return
+            try:
+                items = _loads(path.read_bytes())
+            except Exception as e:
+                logger.error(f"读取旧版队列文件失败: {e}")
+                return
+            self._upsert_rows(conn, items)
+
+        try:
+            path.rename(path.with_suffix(path.suffix + '.migrated'))
+        except OSError:
+            pass
+        logger.info(f"已从 {path.name} 导入 {len(items)} 条内容")
+
+    @staticmethod
+    def _row(item: Dict) -> tuple:
+        return (
+            item['id'],
+            item.get('status', 'pending'),
+            item.get('created_at') or '',
+            item.get('published_at') or '',
+            _dumps(item)
+        )
+
+    def _upsert_rows(self, conn, items: Iterable[Dict]):
+        # ON CONFLICT 原地更新，保留 rowid（即原有顺序），INSERT OR REPLACE 会把条目移到末尾
+        conn.executemany(
+            "INSERT INTO items (id, status, created_at, published_at, data) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET status = excluded.status, created_at = excluded.created_at, "
+            "published_at = excluded.published_at, data = excluded.data",
+            (self._row(item) for item in items)
+        )
+
+    def list(self, status: Optional[str] = None, newest_first: bool = False,
+             limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """
+        列出内容
+
+        Args:
+            status: 只返回该状态的内容
+            newest_first: 按创建时间倒序；默认按写入顺序
+            limit / offset: 分页
+        """
+        sql = "SELECT data FROM items"
+        params = []
+        if status is not None:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC, rowid DESC" if newest_first else " ORDER BY rowid"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([-1 if limit is None else limit, offset])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_loads(data) for data, in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        """内容条数（可按状态筛选）"""
+        with self._lock:
+            if status is None:
+                return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM items WHERE status = ?", (status,)
+            ).fetchone()[0]
+
+    def stats(self, today: str) -> Dict[str, int]:
+        """
+        统计各状态数量以及今日生成 / 发布数量
+
+        Args:
+            today: 日期前缀，如 '2024-01-31'
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*), "
+                "SUM(substr(published_at, 1, 10) = ?), SUM(substr(created_at, 1, 10) = ?) "
+                "FROM items GROUP BY status",
+                (today, today)
+            ).fetchall()
+
+        stats = {'pending': 0, 'approved': 0, 'published': 0, 'today_published': 0, 'today_generated': 0}
+        for status, count, published_today, created_today in rows:
+            if status in stats:
+                stats[status] = count
+            if status == 'published':
+                stats['today_published'] = published_today
+            stats['today_generated'] += created_today
+        return stats
+
+    def get(self, item_id: str) -> Optional[Dict]:
+        """按 ID 获取一条内容"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM items WHERE id = ?", (item_id,)).fetchone()
+        return _loads(row[0]) if row else None
+
+    def get_many(self, item_ids: Sequence[str]) -> Dict[str, Dict]:
+        """按 ID 批量获取内容，返回 {内容ID: 内容}（不存在的 ID 不出现在结果中）"""
+        if not item_ids:
+            return {}
+        placeholders = ', '.join('?' * len(item_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, data FROM items WHERE id IN ({placeholders})", list(item_ids)
+            ).fetchall()
+        return {item_id: _loads(data) for item_id, data in rows}
+
+    def upsert(self, item: Dict):
+        """写入一条内容（同 ID 已存在时替换，位置不变）"""
+        self.upsert_many([item])
+
+    def upsert_many(self, items: Sequence[Dict]):
+        """在一个事务中写入多条内容"""
+        with self.transaction() as conn:
+            self._upsert_rows(conn, items)
+
+    def update(self, item_id: str, updates: Dict,
+               only_status: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        """
+        更新一条内容的部分字段
+
+        Args:
+            item_id: 内容ID
+            updates: 要更新的字段
+            only_status: 仅当内容处于这些状态之一时才更新
+
+        Returns:
+            更新后的内容；内容不存在或状态不符时返回 None
+        """
+        with self.transaction() as conn:
+            return self._update_row(conn, item_id, updates, only_status)
+
+    def update_many(self, updates: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        在一个事务中更新多条内容
+
+        Args:
+            updates: {内容ID: 要更新的字段}
+
+        Returns:
+            {内容ID: 更新后的内容}（不存在的 ID 不出现在结果中）
+        """
+        updated = {}
+        if not updates:
+            return updated
+        with self.transaction() as conn:
+            for item_id, fields in updates.items():
+                item = self._update_row(conn, item_id, fields)
+                if item is not None:
+                    updated[item_id] = item
+        return updated
+
+    def _update_row(self, conn, item_id: str, updates: Dict,
+                    only_status: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        row = conn.execute("SELECT data FROM items WHERE id = ?", (item_id,)).fetchone()
+        if not row:
+            return None
+        item = _loads(row[0])
+        if only_status is not None and item.get('status') not in only_status:
+            return None
+        item.update(updates)
+        _, status, created_at, published_at, data = self._row(item)
+        conn.execute(
+            "UPDATE items SET status = ?, created_at = ?, published_at = ?, data = ? WHERE id = ?",
+            (status, created_at, published_at, data, item_id)
+        )
+        return item
+
+    def delete(self, item_id: str) -> bool:
+        """删除一条内容，返回是否存在"""
+        with self.transaction() as conn:
+            return conn.execute("DELETE FROM items WHERE id = ?", (item_id,)).rowcount > 0
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
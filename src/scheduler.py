@@ -6,7 +6,7 @@
 import os
 import sys
 import time
-import json
+import functools
 import yaml
 import schedule
 from pathlib import Path
@@ -15,6 +15,10 @@ from datetime import datetime
 from search_engine import SearchEngine
 from content_generator import DeepSeekContentGenerator
 from image_generator import ImageGenerator
+from queue_store import QueueStore
+
+# 有 libyaml 时使用 C 实现的加载器
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
 # 配置路径
 CONFIG_FILE = Path('/app/config/config.yaml')
@@ -30,12 +34,18 @@ def log(msg):
     with open(LOG_FILE, 'a', encoding='utf-8') as f:
         f.write(line + '\n')
 
+@functools.lru_cache(maxsize=1)
+def _load_config_cached(mtime_ns: int):
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
 def load_config():
-    """加载配置"""
-    if CONFIG_FILE.exists():
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    return {}
+    """加载配置（按文件修改时间缓存，配置文件改动后自动重新解析）"""
+    try:
+        mtime_ns = CONFIG_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    return _load_config_cached(mtime_ns)
 
 def generate_content():
     """
@@ -68,11 +78,9 @@ def generate_content():
         )
         
         # 生成图片并保存到队列
-        queue_file = DATA_DIR / 'queue.json'
+        store = QueueStore(DATA_DIR / 'queue.db', legacy_json=DATA_DIR / 'queue.json')
+        start_index = store.count()
         queue = []
-        if queue_file.exists():
-            with open(queue_file, 'r', encoding='utf-8') as f:
-                queue = json.load(f)
         
         for content in contents:
             try:
@@ -82,7 +90,7 @@ def generate_content():
                 )
                 
                 task = {
-                    'id': f"task_{datetime.now().strftime('%Y%m%d%H%M%S')}_{len(queue)}",
+                    'id': f"task_{datetime.now().strftime('%Y%m%d%H%M%S')}_{start_index + len(queue)}",
                     'title': content.title,
                     'content': content.content,
                     'tags': content.tags,
@@ -96,10 +104,11 @@ def generate_content():
             except Exception as e:
                 log(f'[ERROR] 生成图片失败: {e}')
         
-        # 保存队列
-        queue_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(queue_file, 'w', encoding='utf-8') as f:
-            json.dump(queue, f, ensure_ascii=False, indent=2)
+        # 保存队列（只追加本次生成的内容，不影响 Web 端同时进行的审核）
+        try:
+            store.upsert_many(queue)
+        finally:
+            store.close()
         
         log(f'[SUCCESS] 完成，生成 {len(contents)} 条内容待审核')
         
@@ -120,10 +129,16 @@ def main():
     
     log('[INFO] 等待定时生成任务...')
     
-    # 运行循环
+    # 运行循环：直接睡到下一个任务的时间点，不再每分钟轮询
     while True:
+        idle = schedule.idle_seconds()
+        if idle is None:
+            log('[WARN] 没有定时任务，调度器退出')
+            break
+        if idle > 0:
+            # 单次最多睡一小时，系统时间被调整时也能及时校正
+            time.sleep(min(idle, 3600))
         schedule.run_pending()
-        time.sleep(60)
 
 if __name__ == '__main__':
     main()
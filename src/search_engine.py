@@ -4,16 +4,51 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import re
 import json
 from typing import List, Dict, Optional
 from duckduckgo_search import DDGS
 from dataclasses import dataclass
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson 为可选依赖，直接解析响应的原始 bytes；未安装时回退到标准库 json
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+# selectolax 为可选依赖：C 实现的 HTML 解析器，比 BeautifulSoup + html.parser 快一个数量级
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
 
 logger = logging.getLogger(__name__)
 
+# 标题清理用的正则，模块加载时编译一次
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
+
+def _create_session(headers: Optional[Dict] = None) -> requests.Session:
+    """创建带连接池和失败重试的会话，多次请求复用 TCP/TLS 连接"""
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, backoff_factor=0.3)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """搜索结果数据结构"""
     title: str
@@ -21,11 +56,24 @@ class SearchResult:
     snippet: str
     source: str
     published_date: Optional[str] = None
+    
+    def __post_init__(self):
+        # 部分搜索源的标题带高亮标签或换行，统一成单行纯文本
+        title = self.title
+        if '<' in title:
+            title = _TAG_RE.sub('', title)
+        self.title = _WS_RE.sub(' ', title).strip()
 
 
 class SearchEngine:
     """搜索引擎封装类"""
     
+    # 通过 self.session 请求的搜索源接口地址（DuckDuckGo 走 DDGS 自己的连接）
+    ENDPOINTS = {
+        'serper': "https://google.serper.dev/search",
+        'bing': "https://api.bing.microsoft.com/v7.0/search",
+    }
+    
     def __init__(self, config: Dict):
         self.config = config
         self.source = config.get('source', 'duckduckgo')
@@ -35,6 +83,8 @@ class SearchEngine:
         # API Keys
         self.serper_api_key = config.get('serper_api_key', '')
         self.bing_api_key = config.get('bing_api_key', '')
+        
+        self.session = _create_session()
     
     def search(self, keyword: str) -> List[SearchResult]:
         """
@@ -121,7 +171,7 @@ class SearchEngine:
             logger.warning("Serper API Key 未配置，跳过")
             return results
         
-        url = "https://google.serper.dev/search"
+        url = self.ENDPOINTS['serper']
         headers = {
             'X-API-KEY': self.serper_api_key,
             'Content-Type': 'application/json'
@@ -133,9 +183,9 @@ class SearchEngine:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.session.post(url, headers=headers, json=payload)
             response.raise_for_status()
-            data = response.json()
+            data = _loads(response.content)
             
             for item in data.get('organic', []):
                 results.append(SearchResult(
@@ -159,7 +209,7 @@ class SearchEngine:
             logger.warning("Bing API Key 未配置，跳过")
             return results
         
-        endpoint = "https://api.bing.microsoft.com/v7.0/search"
+        endpoint = self.ENDPOINTS['bing']
         headers = {'Ocp-Apim-Subscription-Key': self.bing_api_key}
         params = {
             'q': keyword,
@@ -168,9 +218,9 @@ class SearchEngine:
         }
         
         try:
-            response = requests.get(endpoint, headers=headers, params=params)
+            response = self.session.get(endpoint, headers=headers, params=params)
             response.raise_for_status()
-            data = response.json()
+            data = _loads(response.content)
             
             for item in data.get('webPages', {}).get('value', []):
                 results.append(SearchResult(
@@ -197,22 +247,68 @@ class SearchEngine:
             Dict[str, List[SearchResult]]: 关键词到结果的映射
         """
         all_results = {}
-        
-        for keyword in keywords:
-            results = self.search(keyword)
+        for keyword, results in zip(keywords, self.search_many(keywords)):
             all_results[keyword] = results
             logger.info(f"关键词 '{keyword}' 找到 {len(results)} 条结果")
             
         return all_results
+    
+    def search_many(self, keywords: List[str]) -> List[List[SearchResult]]:
+        """
+        并发搜索多个关键词
+        
+        所有请求共用 self.session 的连接池，TCP/TLS 握手只在首次请求时发生
+        
+        Args:
+            keywords: 关键词列表
+            
+        Returns:
+            List[List[SearchResult]]: 与 keywords 顺序一致的结果列表
+        """
+        if not keywords:
+            return []
+        
+        # 各关键词的搜索是独立的网络请求，线程数不超过连接池大小
+        with ThreadPoolExecutor(max_workers=min(8, len(keywords))) as executor:
+            return list(executor.map(self.search, keywords))
+    
+    def warmup(self, connections: int = 1):
+        """
+        预先建立到搜索接口的连接（DNS + TCP + TLS），之后的搜索直接复用连接池
+        
+        Args:
+            connections: 预建的连接数，与随后并发搜索的关键词数一致时每个请求都能拿到热连接
+        """
+        endpoint = self.ENDPOINTS.get(self.source)
+        if not endpoint:
+            return
+        
+        def _head(_):
+            try:
+                self.session.head(endpoint, timeout=5)
+            except Exception as e:
+                logger.debug(f"预热连接失败: {e}")
+        
+        connections = max(1, min(connections, 8))
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(_head, range(connections)))
+    
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
 
 
 class ContentExtractor:
     """网页内容提取器"""
     
+    # 提取正文前移除的标签
+    STRIP_TAGS = ["script", "style", "nav", "footer", "header"]
+    
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        self.session = _create_session(self.headers)
     
     def extract(self, url: str) -> Optional[str]:
         """
@@ -225,19 +321,11 @@ class ContentExtractor:
             str: 提取的正文内容
         """
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
             
             # 使用简单的文本提取（实际项目中可以使用 trafilatura 等库）
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 移除脚本和样式
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            # 获取文本
-            text = soup.get_text(separator='\n', strip=True)
+            text = self._html_to_text(response.text)
             
             # 清理文本
             lines = [line.strip() for line in text.split('\n') if line.strip()]
@@ -248,6 +336,24 @@ class ContentExtractor:
         except Exception as e:
             logger.error(f"提取网页内容失败 {url}: {e}")
             return None
+    
+    def _html_to_text(self, html: str) -> str:
+        """移除脚本、样式和导航后获取网页文本，每个文本块一行"""
+        if HTMLParser is not None:
+            tree = HTMLParser(html)
+            tree.strip_tags(self.STRIP_TAGS)
+            root = tree.body or tree.root
+            return root.text(separator='\n', strip=True) if root is not None else ''
+        
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # 移除脚本和样式
+        for script in soup(self.STRIP_TAGS):
+            script.decompose()
+        
+        # 获取文本
+        return soup.get_text(separator='\n', strip=True)
 
 
 if __name__ == "__main__":
@@ -269,4 +375,5 @@ if __name__ == "__main__":
         for i, item in enumerate(items[:3], 1):
             print(f"\n{i}. {item.title}")
             print(f"   URL: {item.url}")
-            print(f"   摘要: {item.snippet[:100]}...")
+            snippet = item.snippet
+            print(f"   摘要: {snippet[:97] + '...' if len(snippet) > 100 else snippet}")
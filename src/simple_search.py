@@ -5,17 +5,40 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 import random
+import asyncio
+import itertools
 import logging
-from typing import List, Dict, Optional
+from html import unescape
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from urllib.parse import quote, unquote
 
+# selectolax 为可选依赖：C 实现的 HTML 解析器，比正则扫描整页更快也更稳；未安装时回退到正则
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+# httpx 为可选依赖，用于 search_many 的异步并发搜索；装有 h2 时启用 HTTP/2 多路复用
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+    _HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """搜索结果"""
     title: str
@@ -28,6 +51,18 @@ class SearchResult:
 class SimpleSearchEngine:
     """简单搜索引擎"""
     
+    # 结果页解析用的 CSS 选择器（selectolax）与等价正则（回退），正则在类加载时编译一次
+    _BAIDU_SELECTOR = 'h3 a'
+    # Bing 先只取自然结果（li.b_algo），取不到时再放宽到所有 h2 链接
+    _BING_SELECTORS = ['li.b_algo h2 a', 'h2 a']
+    _DDG_SELECTOR = 'a.result__a'
+    _BAIDU_RE = re.compile(r'<h3[^>]*><a[^>]*href="([^"]*)"[^>]*>([^<]*)</a></h3>', re.IGNORECASE)
+    _BING_RES = [
+        re.compile(r'<li[^>]*class="b_algo"[^>]*>.*?<h2><a[^>]*href="([^"]*)"[^>]*>([^<]*)</a></h2>', re.IGNORECASE | re.DOTALL),
+        re.compile(r'<h2[^>]*><a[^>]*href="([^"]*)"[^>]*>([^<]*)</a></h2>', re.IGNORECASE | re.DOTALL),
+    ]
+    _DDG_RE = re.compile(r'<a[^>]*class="result__a"[^>]*href="([^"]*)"[^>]*>([^<]*)</a>', re.IGNORECASE)
+    
     def __init__(self, config: Optional[Dict] = None):
         self.config = config or {}
         self.max_results = self.config.get('max_results', 5)
@@ -35,6 +70,33 @@ class SimpleSearchEngine:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
+        
+        # 复用连接：同一搜索引擎的后续请求省去 TCP/TLS 握手
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def _parse_links(self, content: str, selector: str, pattern: re.Pattern) -> List[Tuple[str, str]]:
+        """从结果页提取 (链接, 标题) 列表，标题为去掉首尾空白的纯文本"""
+        if HTMLParser is not None:
+            return [
+                (node.attributes.get('href') or '', node.text(strip=True))
+                for node in HTMLParser(content).css(selector)
+            ]
+        
+        # 正则的标题分组不含 '<'，无需再去标签；但链接和标题仍带 HTML 实体（如 &amp;），
+        # 整页匹配结果用 NUL 拼接后一次反转义再拆开，与 selectolax 的输出保持一致
+        matches = pattern.findall(content)
+        if not matches or '\x00' in content:
+            return [(unescape(href), unescape(title).strip()) for href, title in matches]
+        fields = unescape('\x00'.join(itertools.chain.from_iterable(matches))).split('\x00')
+        return [(fields[i], fields[i + 1].strip()) for i in range(0, len(fields), 2)]
     
     def search(self, keyword: str) -> List[SearchResult]:
         """
@@ -70,131 +132,196 @@ class SimpleSearchEngine:
         logger.warning("所有搜索源都失败，使用模拟数据")
         return self._generate_fallback_results(keyword)
     
+    async def search_many(self, keywords: List[str]) -> List[List[SearchResult]]:
+        """
+        并发搜索多个关键词，结果顺序与 keywords 一致
+        
+        安装了 httpx 时在单线程事件循环上并发，所有请求共用一个 AsyncClient（可用时走 HTTP/2）；
+        否则把同步 search 放到线程中并发执行
+        """
+        if httpx is None:
+            return list(await asyncio.gather(*(asyncio.to_thread(self.search, k) for k in keywords)))
+        
+        async with httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=True
+        ) as client:
+            return list(await asyncio.gather(*(self.search_async(client, k) for k in keywords)))
+    
+    async def search_async(self, client: "httpx.AsyncClient", keyword: str) -> List[SearchResult]:
+        """
+        search 的异步版本
+        按 百度 → Bing → DuckDuckGo 的优先级依次请求，前一个源失败或无结果时才请求下一个；
+        多个关键词之间并发
+        """
+        logger.info(f"开始搜索: {keyword}")
+        
+        searchers = [
+            ('baidu', self._baidu_url, self._parse_baidu),
+            ('bing', self._bing_url, self._parse_bing),
+            ('duckduckgo', self._ddg_url, self._parse_ddg),
+        ]
+        for name, build_url, parse in searchers:
+            try:
+                page = await client.get(build_url(keyword))
+                page.raise_for_status()
+                results = parse(page.text, keyword)
+                if name == 'baidu':
+                    await self._resolve_baidu_links_async(client, results)
+                if results:
+                    logger.info(f"{name} 返回 {len(results)} 条结果")
+                    return results
+            except Exception as e:
+                logger.debug(f"{name} 搜索失败: {e}")
+        
+        # 所有搜索都失败时，返回模拟结果
+        logger.warning("所有搜索源都失败，使用模拟数据")
+        return self._generate_fallback_results(keyword)
+    
+    def _baidu_url(self, keyword: str) -> str:
+        return f"https://www.baidu.com/s?wd={quote(keyword)}&rn={self.max_results}"
+    
+    def _bing_url(self, keyword: str) -> str:
+        return f"https://www.bing.com/search?q={quote(keyword)}&count={self.max_results}"
+    
+    def _ddg_url(self, keyword: str) -> str:
+        return f"https://html.duckduckgo.com/html/?q={quote(keyword)}"
+    
     def _search_baidu(self, keyword: str) -> List[SearchResult]:
         """百度搜索（简单版）"""
         results = []
         
         try:
-            url = f"https://www.baidu.com/s?wd={quote(keyword)}&rn={self.max_results}"
-            
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            response = self.session.get(self._baidu_url(keyword), timeout=self.timeout)
             response.raise_for_status()
             
-            # 简单提取标题和链接
-            content = response.text
+            results = self._parse_baidu(response.text, keyword)
             
-            # 匹配标题和链接
-            title_pattern = r'<h3[^>]*><a[^>]*href="([^"]*)"[^>]*>([^<]*)</a></h3>'
-            matches = re.findall(title_pattern, content, re.IGNORECASE)
-            
-            for i, (url_match, title_match) in enumerate(matches[:self.max_results]):
-                # 清理标题
-                title = re.sub(r'<[^>]+>', '', title_match)
-                title = title.strip()
-                
-                if not title:
-                    continue
-                
-                # 处理百度的重定向链接
-                real_url = url_match
-                if 'link.baidu.com' in real_url:
-                    real_url = self._resolve_baidu_link(real_url)
-                
-                results.append(SearchResult(
-                    title=title,
-                    url=real_url or url_match,
-                    snippet=f"关于 {keyword} 的搜索结果",
-                    source='baidu'
-                ))
-                
-                if len(results) >= self.max_results:
-                    break
+            # 处理百度的重定向链接
+            for result in results:
+                if 'link.baidu.com' in result.url:
+                    result.url = self._resolve_baidu_link(result.url) or result.url
             
         except Exception as e:
             logger.debug(f"百度搜索失败: {e}")
         
         return results
     
+    def _parse_baidu(self, content: str, keyword: str) -> List[SearchResult]:
+        """从百度结果页提取标题和链接（重定向链接未解析）"""
+        results = []
+        
+        # 匹配标题和链接
+        matches = self._parse_links(content, self._BAIDU_SELECTOR, self._BAIDU_RE)
+        
+        for url_match, title in matches[:self.max_results]:
+            if not title:
+                continue
+            
+            results.append(SearchResult(
+                title=title,
+                url=url_match,
+                snippet=f"关于 {keyword} 的搜索结果",
+                source='baidu'
+            ))
+            
+            if len(results) >= self.max_results:
+                break
+        
+        return results
+    
     def _resolve_baidu_link(self, url: str) -> Optional[str]:
         """解析百度重定向链接"""
         try:
-            headers = {**self.headers, 'Referer': 'https://www.baidu.com/'}
-            resp = requests.head(url, headers=headers, timeout=5, allow_redirects=True)
+            resp = self.session.head(url, headers={'Referer': 'https://www.baidu.com/'}, timeout=5, allow_redirects=True)
             return resp.url
         except:
             return None
     
+    async def _resolve_baidu_links_async(self, client: "httpx.AsyncClient", results: List[SearchResult]):
+        """并发解析百度重定向链接，失败的保留原链接"""
+        async def resolve(result: SearchResult):
+            try:
+                resp = await client.head(result.url, headers={'Referer': 'https://www.baidu.com/'}, timeout=5)
+                result.url = str(resp.url)
+            except Exception:
+                pass
+        
+        await asyncio.gather(*(resolve(r) for r in results if 'link.baidu.com' in r.url))
+    
     def _search_bing_simple(self, keyword: str) -> List[SearchResult]:
         """Bing 搜索（简单版）"""
         results = []
         
         try:
-            url = f"https://www.bing.com/search?q={quote(keyword)}&count={self.max_results}"
-            
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            response = self.session.get(self._bing_url(keyword), timeout=self.timeout)
             response.raise_for_status()
             
-            content = response.text
-            
-            # 简单匹配
-            patterns = [
-                r'<h2[^>]*><a[^>]*href="([^"]*)"[^>]*>([^<]*)</a></h2>',
-                r'<li[^>]*class="b_algo"[^>]*>.*?<h2><a[^>]*href="([^"]*)"[^>]*>([^<]*)</a></h2>',
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-                if matches:
-                    for url_match, title_match in matches[:self.max_results]:
-                        title = re.sub(r'<[^>]+>', '', title_match).strip()
-                        if title and url_match.startswith('http'):
-                            results.append(SearchResult(
-                                title=title,
-                                url=url_match,
-                                snippet=f"{keyword} 相关内容",
-                                source='bing'
-                            ))
-                        if len(results) >= self.max_results:
-                            break
-                    if results:
-                        break
+            results = self._parse_bing(response.text, keyword)
             
         except Exception as e:
             logger.debug(f"Bing 搜索失败: {e}")
         
         return results
     
+    def _parse_bing(self, content: str, keyword: str) -> List[SearchResult]:
+        """从 Bing 结果页提取标题和链接"""
+        results = []
+        
+        # 简单匹配
+        for selector, pattern in zip(self._BING_SELECTORS, self._BING_RES):
+            matches = self._parse_links(content, selector, pattern)
+            if matches:
+                for url_match, title in matches[:self.max_results]:
+                    if title and url_match.startswith('http'):
+                        results.append(SearchResult(
+                            title=title,
+                            url=url_match,
+                            snippet=f"{keyword} 相关内容",
+                            source='bing'
+                        ))
+                    if len(results) >= self.max_results:
+                        break
+                if results:
+                    break
+        
+        return results
+    
     def _search_ddg_simple(self, keyword: str) -> List[SearchResult]:
         """DuckDuckGo 简单搜索（使用 HTML 网页版）"""
         results = []
         
         try:
-            url = f"https://html.duckduckgo.com/html/?q={quote(keyword)}"
-            
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            response = self.session.get(self._ddg_url(keyword), timeout=self.timeout)
             response.raise_for_status()
             
-            content = response.text
-            
-            # 匹配结果
-            pattern = r'<a[^>]*class="result__a"[^>]*href="([^"]*)"[^>]*>([^<]*)</a>'
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            
-            for url_match, title_match in matches[:self.max_results]:
-                title = re.sub(r'<[^>]+>', '', title_match).strip()
-                if title and url_match.startswith('http'):
-                    results.append(SearchResult(
-                        title=title,
-                        url=url_match,
-                        snippet=f"{keyword} 相关资讯",
-                        source='duckduckgo'
-                    ))
+            results = self._parse_ddg(response.text, keyword)
             
         except Exception as e:
             logger.debug(f"DDG 简单搜索失败: {e}")
         
         return results
     
+    def _parse_ddg(self, content: str, keyword: str) -> List[SearchResult]:
+        """从 DuckDuckGo HTML 结果页提取标题和链接"""
+        results = []
+        
+        # 匹配结果
+        matches = self._parse_links(content, self._DDG_SELECTOR, self._DDG_RE)
+        
+        for url_match, title in matches[:self.max_results]:
+            if title and url_match.startswith('http'):
+                results.append(SearchResult(
+                    title=title,
+                    url=url_match,
+                    snippet=f"{keyword} 相关资讯",
+                    source='duckduckgo'
+                ))
+        
+        return results
+    
     def _generate_fallback_results(self, keyword: str) -> List[SearchResult]:
         """生成备用搜索结果"""
         templates = [
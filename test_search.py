@@ -5,61 +5,136 @@
 
 import sys
 import os
+import atexit
+import time
+import pickle
+import hashlib
+import functools
+import logging
 from pathlib import Path
 
-# 添加项目根目录到 Python 路径
-sys.path.insert(0, str(Path(__file__).parent / 'src'))
+# 添加 src 目录到 Python 路径（重复导入时不重复添加）
+_SRC_DIR = str(Path(__file__).parent / 'src')
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
 
 import yaml
 from search_engine import SearchEngine
 
-def test_search():
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path(__file__).parent / 'config' / 'config.yaml'
+
+# 测试关键词
+TEST_KEYWORDS = (
+    'AI人工智能',
+    '小红书运营技巧',
+    '2024年科技趋势'
+)
+
+# libyaml 可用时用 C 实现的加载器
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 设置 SEARCH_CACHE=1 时把各关键词的结果缓存到本地，一小时内重复运行不再请求网络
+CACHE_DIR = Path(__file__).parent / '.search_cache'
+CACHE_TTL = 3600
+
+
+@functools.lru_cache(maxsize=1)
+def load_config(path: str) -> dict:
+    """读取配置文件（同一路径只解析一次）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
+
+@functools.lru_cache(maxsize=1)
+def get_searcher() -> SearchEngine:
+    """同一进程内多次运行测试共用一个搜索引擎实例（及其连接池），退出时关闭"""
+    searcher = SearchEngine(load_config(str(CONFIG_PATH)).get('search', {}))
+    atexit.register(searcher.close)
+    return searcher
+
+
+def search_with_cache(searcher, source, keywords):
+    """批量搜索，命中本地缓存的关键词不再请求，结果顺序与 keywords 一致"""
+    if os.environ.get('SEARCH_CACHE') != '1':
+        return searcher.search_many(keywords)
+    
+    CACHE_DIR.mkdir(exist_ok=True)
+    cache_paths = [
+        CACHE_DIR / f"{hashlib.md5(f'{source}::{keyword}'.encode()).hexdigest()}.pkl"
+        for keyword in keywords
+    ]
+    
+    all_results = [None] * len(keywords)
+    missed = []
+    now = time.time()
+    for i, cache_path in enumerate(cache_paths):
+        try:
+            if now - cache_path.stat().st_mtime < CACHE_TTL:
+                all_results[i] = pickle.loads(cache_path.read_bytes())
+                continue
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+        missed.append(i)
+    
+    if missed:
+        fresh = searcher.search_many([keywords[i] for i in missed])
+        for i, results in zip(missed, fresh):
+            all_results[i] = results
+            cache_paths[i].write_bytes(pickle.dumps(results))
+    
+    return all_results
+
+def _preview(snippet: str) -> str:
+    """摘要预览：最多 100 字，超出时以 ... 结尾"""
+    return snippet[:97] + '...' if len(snippet) > 100 else snippet
+
+def test_search(keywords=TEST_KEYWORDS):
     """测试搜索功能"""
     print("=" * 60)
     print("搜索功能测试")
     print("=" * 60)
     
     # 加载配置
-    config_file = Path(__file__).parent / 'config' / 'config.yaml'
-    with open(config_file, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+    config = load_config(str(CONFIG_PATH))
     
     # 初始化搜索引擎
     search_config = config.get('search', {})
     print(f"\n搜索源: {search_config.get('source', 'duckduckgo')}")
     print(f"搜索配置: {search_config}")
     
-    searcher = SearchEngine(search_config)
+    searcher = get_searcher()
+    searcher.warmup(len(keywords))
     
-    # 测试关键词
-    test_keywords = [
-        'AI人工智能',
-        '小红书运营技巧',
-        '2024年科技趋势'
-    ]
+    # 一次批量搜索：各关键词并发执行，共用搜索引擎的连接池
+    try:
+        all_results = search_with_cache(searcher, search_config.get('source', 'duckduckgo'), keywords)
+    except Exception as e:
+        logger.exception(f"✗ 搜索失败: {e}")
+        return
     
-    for keyword in test_keywords:
-        print(f"\n{'=' * 60}")
-        print(f"搜索关键词: {keyword}")
-        print(f"{'=' * 60}")
+    # 结果汇总到一个缓冲区，最后一次写出
+    buf = []
+    for keyword, results in zip(keywords, all_results):
+        buf.extend([
+            f"\n{'=' * 60}",
+            f"搜索关键词: {keyword}",
+            f"{'=' * 60}",
+            f"\n✓ 搜索到 {len(results)} 条结果",
+        ])
         
-        try:
-            results = searcher.search(keyword)
-            print(f"\n✓ 搜索到 {len(results)} 条结果")
-            
-            if results:
-                print("\n前3条结果:")
-                for i, r in enumerate(results[:3], 1):
-                    print(f"\n{i}. {r.title}")
-                    print(f"   URL: {r.url}")
-                    print(f"   摘要: {r.snippet[:100]}...")
-            else:
-                print("\n⚠ 搜索无结果")
-                
-        except Exception as e:
-            print(f"\n✗ 搜索失败: {e}")
-            import traceback
-            traceback.print_exc()
+        if results:
+            buf.append("\n前3条结果:")
+            for i, r in enumerate(results[:3], 1):
+                buf.extend([f"\n{i}. {r.title}", f"   URL: {r.url}", f"   摘要: {_preview(r.snippet)}"])
+        else:
+            buf.append("\n⚠ 搜索无结果")
+    
+    sys.stdout.write("\n".join(buf) + "\n")
 
 if __name__ == "__main__":
-    test_search()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    
+    # 可在命令行指定关键词，如 python test_search.py 关键词1 关键词2
+    test_search(tuple(sys.argv[1:]) or TEST_KEYWORDS)
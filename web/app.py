@@ -3,19 +3,51 @@
 半自动工作流：生成 → 审核 → 手动发布
 支持飞书多维表格集成
 """
+import atexit
+import functools
+import io
 import json
 import logging
 import os
+import random
+import re
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from queue import Empty, SimpleQueue
+from typing import Dict, Any, Optional, List, Tuple
 
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl
+    fcntl = None
+
+from cachetools import TTLCache
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """使用 orjson 序列化 API 响应，遇到不支持的类型时回退到默认实现"""
+
+        def dumps(self, obj, **kwargs) -> str:
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode('utf-8')
+            except TypeError:
+                return super().dumps(obj, **kwargs)
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+except ImportError:
+    OrjsonProvider = None
+
 APP_DIR = Path(os.getenv('APP_DIR', Path(__file__).parent.parent))
 DATA_DIR = APP_DIR / 'data'
 CONFIG_DIR = APP_DIR / 'config'
@@ -24,28 +56,48 @@ LOGS_DIR = APP_DIR / 'logs'
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
+# 日志经队列交给后台线程写文件和控制台，请求线程记录日志时只是入队，不会卡在磁盘 IO 上
+_log_queue = SimpleQueue()
+_log_listener = QueueListener(
+    _log_queue,
+    logging.FileHandler(LOGS_DIR / 'web.log'),
+    logging.StreamHandler(sys.stdout)
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOGS_DIR / 'web.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
 sys.path.insert(0, str(APP_DIR / 'src'))
 
+from queue_store import QueueStore
+
 app = Flask(__name__)
+if OrjsonProvider is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
+# JSON 响应 gzip / br 压缩（可选依赖），队列等重复字段多的数据体积可缩小数倍
+try:
+    from flask_compress import Compress
+    app.config.setdefault('COMPRESS_MIMETYPES', ['application/json'])
+    app.config.setdefault('COMPRESS_LEVEL', 4)
+    Compress(app)
+except ImportError:
+    pass
+
 # 飞书表格集成
 feishu_client = None
 feishu_notifier = None
 try:
-    from feishu_integration import FeishuBitableClient, FeishuWebhookNotifier
-    feishu_client = FeishuBitableClient()
-    feishu_notifier = FeishuWebhookNotifier()
+    from feishu_integration import get_feishu_client, get_feishu_notifier
+    feishu_client = get_feishu_client()
+    feishu_notifier = get_feishu_notifier()
     logger.info(f"飞书表格集成: {'已启用' if feishu_client.enabled else '未启用'}")
 except Exception as e:
     logger.warning(f"飞书表格集成加载失败: {e}")
@@ -55,8 +107,8 @@ feishu_bot = None
 feishu_event_handler = None
 feishu_approval_bot = None
 try:
-    from feishu_bot import FeishuInteractiveBot, FeishuEventHandler
-    feishu_bot = FeishuInteractiveBot()
+    from feishu_bot import get_feishu_bot, FeishuEventHandler
+    feishu_bot = get_feishu_bot()
     feishu_event_handler = FeishuEventHandler()
     logger.info(f"飞书机器人: {'已启用' if feishu_bot.enabled else '未启用'}")
 except Exception as e:
@@ -74,19 +126,15 @@ try:
     )
     
     def on_approve(content: ContentForApproval, result):
-        queue = load_queue()
-        item = next((q for q in queue if q['id'] == content.id), None)
-        if item:
-            item['status'] = 'approved'
-            item['approved_at'] = result.timestamp
-            item['approved_by'] = result.user_name
-            save_queue(queue)
+        if update_queue_item(content.id, {
+            'status': 'approved',
+            'approved_at': result.timestamp,
+            'approved_by': result.user_name
+        }):
             log_action('FEISHU_APPROVE', f"ID: {content.id}, By: {result.user_name}")
     
     def on_reject(content: ContentForApproval, result):
-        queue = load_queue()
-        queue = [q for q in queue if q['id'] != content.id]
-        save_queue(queue)
+        remove_queue_item(content.id)
         log_action('FEISHU_REJECT', f"ID: {content.id}, By: {result.user_name}")
     
     feishu_approval_bot.set_callbacks(on_approve, on_reject)
@@ -94,34 +142,32 @@ try:
 except Exception as e:
     logger.warning(f"飞书审核机器人加载失败: {e}")
 
-QUEUE_FILE = DATA_DIR / 'queue.json'
+QUEUE_DB = DATA_DIR / 'queue.db'
+QUEUE_FILE = DATA_DIR / 'queue.json'  # 旧版队列文件，仅用于迁移
 CONFIG_FILE = CONFIG_DIR / 'config.yaml'
 
 mcp_publisher = None
-_config_cache = {'data': None, 'timestamp': 0}
-CONFIG_CACHE_TTL = 30
+
+@functools.lru_cache(maxsize=1)
+def _load_config_cached(mtime_ns: int):
+    import yaml
+    # 有 libyaml 时使用 C 实现的加载器
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=loader) or {}
 
 def load_config():
-    """加载配置（带缓存）"""
-    now = time.time()
-    if _config_cache['data'] and (now - _config_cache['timestamp']) < CONFIG_CACHE_TTL:
-        return _config_cache['data']
-    
+    """加载配置（按文件修改时间缓存，文件未改动时不重新解析）"""
     try:
-        import yaml
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f) or {}
-            _config_cache['data'] = config
-            _config_cache['timestamp'] = now
-            return config
+        return _load_config_cached(CONFIG_FILE.stat().st_mtime_ns)
     except Exception as e:
         logger.error(f"加载配置失败: {e}")
         return {}
 
 def clear_config_cache():
     """清除配置缓存"""
-    _config_cache['data'] = None
-    _config_cache['timestamp'] = 0
+    _load_config_cached.cache_clear()
+    _resolved_providers_cached.cache_clear()
 
 AI_PROVIDERS = {
     'deepseek': {
@@ -180,28 +226,135 @@ AI_PROVIDERS = {
     }
 }
 
-def get_ai_client(provider_id: str, config: Dict):
-    """获取 AI 客户端"""
+# (提供商, API Key, base_url) -> OpenAI 客户端；复用客户端即复用其 HTTP 连接池
+_ai_clients: Dict[tuple, Any] = {}
+_ai_clients_lock = threading.Lock()
+
+@atexit.register
+def clear_ai_clients():
+    """关闭并清空缓存的 AI 客户端（提供商配置变更或退出时调用）"""
+    with _ai_clients_lock:
+        clients = list(_ai_clients.values())
+        _ai_clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+def providers_by_id(config) -> Dict[str, Dict]:
+    """providers 配置统一成 {提供商ID: 配置}（控制台保存的是带 id 字段的列表）"""
+    if isinstance(config, list):
+        return {p['id']: p for p in config if isinstance(p, dict) and p.get('id')}
+    return config or {}
+
+def resolve_provider(provider_id: str, config) -> Dict[str, Any]:
+    """合并提供商的配置与默认值 / 环境变量，得到 {'api_key', 'base_url', 'model'}"""
+    provider = AI_PROVIDERS[provider_id]
+    cfg = providers_by_id(config).get(provider_id) or {}
+    return {
+        'api_key': cfg.get('key') or os.getenv(provider['env_key']),
+        'base_url': cfg.get('base_url') or provider['base_url'],
+        'model': cfg.get('enabledModels', [provider['default_model']])[0] if cfg else provider['default_model']
+    }
+
+@functools.lru_cache(maxsize=1)
+def _resolved_providers_cached(mtime_ns: int) -> Dict[str, Dict[str, Any]]:
+    providers_config = providers_by_id(_load_config_cached(mtime_ns).get('providers'))
+    return {pid: resolve_provider(pid, providers_config) for pid in AI_PROVIDERS}
+
+def get_resolved_providers() -> Dict[str, Dict[str, Any]]:
+    """各提供商合并后的配置（与 load_config 一样按配置文件修改时间缓存）"""
+    try:
+        return _resolved_providers_cached(CONFIG_FILE.stat().st_mtime_ns)
+    except Exception as e:
+        logger.error(f"加载配置失败: {e}")
+        return {pid: resolve_provider(pid, {}) for pid in AI_PROVIDERS}
+
+def get_ai_client(provider_id: str, config: Optional[Dict] = None):
+    """
+    获取 AI 客户端（相同配置复用同一个客户端）
+    
+    Args:
+        provider_id: 提供商 ID
+        config: providers 配置；不传时使用配置文件中预先合并好的结果
+    """
     from openai import OpenAI
     
     provider = AI_PROVIDERS.get(provider_id)
     if not provider:
         raise ValueError(f"未知提供商: {provider_id}")
     
-    api_key = config.get(provider_id, {}).get('key') or os.getenv(provider['env_key'])
+    if config is None:
+        resolved = get_resolved_providers()[provider_id]
+    else:
+        resolved = resolve_provider(provider_id, config)
+    
+    api_key = resolved['api_key']
     if not api_key:
         raise ValueError(f"{provider['name']} API Key 未配置")
     
-    base_url = config.get(provider_id, {}).get('base_url') or provider['base_url']
-    model = config.get(provider_id, {}).get('enabledModels', [provider['default_model']])[0] if config.get(provider_id) else provider['default_model']
+    base_url = resolved['base_url']
+    model = resolved['model']
     
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    key = (provider_id, api_key, base_url)
+    with _ai_clients_lock:
+        client = _ai_clients.get(key)
+        if client is None:
+            client = _ai_clients[key] = OpenAI(api_key=api_key, base_url=base_url)
     return client, model
 
-def generate_with_ai(client, model, search_results, keyword, style='casual'):
-    """使用 AI 生成内容"""
-    import random
+# AI 生成结果缓存：相同模型和提示词在 TTL 内直接返回上次结果（重试、调试时避免重复消耗 token）
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+_llm_cache_stats = {'hits': 0, 'misses': 0}
+
+def get_llm_cache():
+    """获取 AI 生成结果缓存（首次调用时创建；xiaohongshu.llm_cache 为 false 时返回 None）"""
+    global _llm_cache
+    xhs_config = load_config().get('xiaohongshu', {})
+    if not xhs_config.get('llm_cache', True):
+        return None
     
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            from content_generator import ResponseCache
+            _llm_cache = ResponseCache(
+                DATA_DIR / 'llm_cache.db',
+                ttl=xhs_config.get('llm_cache_ttl', 86400)
+            )
+        return _llm_cache
+
+def _count_llm_cache(hit: bool):
+    with _llm_cache_lock:
+        _llm_cache_stats['hits' if hit else 'misses'] += 1
+
+STYLE_PROMPTS = {
+    'professional': '专业严谨的科技风格，用词精准，逻辑清晰',
+    'casual': '轻松随意的日常分享风格，用词口语化，像朋友聊天',
+    'humorous': '幽默风趣的风格，适当使用网络热梗和表情',
+    'story': '故事叙述风格，有开头、发展、高潮、结尾'
+}
+
+SYSTEM_PROMPT_TEMPLATE = """你是一个小红书内容创作者。根据提供的搜索结果，生成小红书风格的笔记。
+要求：
+1. 风格：{style_desc}
+2. 标题要吸引眼球，使用emoji
+3. 内容结构清晰，适当使用emoji和换行
+4. 添加相关话题标签
+5. 输出JSON格式：{{"title": "标题", "content": "正文", "tags": ["标签1", "标签2"]}}"""
+
+# 各风格的系统提示词只与风格有关，启动时渲染好
+SYSTEM_PROMPTS = {
+    style: SYSTEM_PROMPT_TEMPLATE.format(style_desc=desc)
+    for style, desc in STYLE_PROMPTS.items()
+}
+
+# 模型输出中的 JSON 对象
+_JSON_RE = re.compile(r'\{[\s\S]*\}')
+
+def build_ai_prompts(search_results, keyword, style='casual'):
+    """根据搜索结果构造 (system_prompt, user_prompt)"""
     def get_item(r, key, default=''):
         if hasattr(r, key):
             return getattr(r, key, default)
@@ -212,20 +365,7 @@ def generate_with_ai(client, model, search_results, keyword, style='casual'):
         for r in search_results[:5]
     ])
     
-    style_prompts = {
-        'professional': '专业严谨的科技风格，用词精准，逻辑清晰',
-        'casual': '轻松随意的日常分享风格，用词口语化，像朋友聊天',
-        'humorous': '幽默风趣的风格，适当使用网络热梗和表情',
-        'story': '故事叙述风格，有开头、发展、高潮、结尾'
-    }
-    
-    system_prompt = f"""你是一个小红书内容创作者。根据提供的搜索结果，生成小红书风格的笔记。
-要求：
-1. 风格：{style_prompts.get(style, style_prompts['casual'])}
-2. 标题要吸引眼球，使用emoji
-3. 内容结构清晰，适当使用emoji和换行
-4. 添加相关话题标签
-5. 输出JSON格式：{{"title": "标题", "content": "正文", "tags": ["标签1", "标签2"]}}"""
+    system_prompt = SYSTEM_PROMPTS.get(style, SYSTEM_PROMPTS['casual'])
 
     user_prompt = f"""关键词：{keyword}
 
@@ -234,6 +374,39 @@ def generate_with_ai(client, model, search_results, keyword, style='casual'):
 
 请根据以上信息生成小红书内容。"""
 
+    return system_prompt, user_prompt
+
+def parse_ai_result(result_text: str) -> Optional[Dict]:
+    """从模型输出中提取 JSON 格式的标题、正文和标签，无法解析时返回 None"""
+    json_match = _JSON_RE.search(result_text or '')
+    if not json_match:
+        return None
+    content = json.loads(json_match.group())
+    return {
+        'title': content.get('title', ''),
+        'content': content.get('content', ''),
+        'tags': content.get('tags', [])
+    }
+
+def generate_with_ai(client, model, search_results, keyword, style='casual'):
+    """使用 AI 生成内容"""
+    system_prompt, user_prompt = build_ai_prompts(search_results, keyword, style)
+    
+    cache = get_llm_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key({
+            'base_url': str(getattr(client, 'base_url', '')),
+            'model': model,
+            'system': system_prompt,
+            'user': user_prompt,
+            'temperature': 0.7
+        })
+        cached = cache.get(cache_key)
+        _count_llm_cache(cached is not None)
+        if cached is not None:
+            return {'title': cached.title, 'content': cached.content, 'tags': cached.tags}
+
     try:
         response = client.chat.completions.create(
             model=model,
@@ -245,17 +418,14 @@ def generate_with_ai(client, model, search_results, keyword, style='casual'):
             max_tokens=2000
         )
         
-        result_text = response.choices[0].message.content
-        
-        import re
-        json_match = re.search(r'\{[\s\S]*\}', result_text)
-        if json_match:
-            content = json.loads(json_match.group())
-            return {
-                'title': content.get('title', ''),
-                'content': content.get('content', ''),
-                'tags': content.get('tags', [])
-            }
+        result = parse_ai_result(response.choices[0].message.content)
+        if result:
+            if cache_key is not None and result['title']:
+                from content_generator import XiaohongshuContent
+                cache.set(cache_key, XiaohongshuContent(
+                    summary='', keywords=[keyword], **result
+                ), model)
+            return result
     except Exception as e:
         logger.error(f"AI 生成失败: {e}")
         raise
@@ -278,32 +448,87 @@ def init_mcp():
         mcp_publisher = MCPPublisher({
             'server_url': mcp_config.get('server_url', 'https://mcp.zouying.work/mcp'),
             'api_key': mcp_config.get('api_key', '') or os.getenv('X_MCP_API_KEY', ''),
-            'timeout': mcp_config.get('timeout', 180)
+            'timeout': mcp_config.get('timeout', 180),
+            'upload_url': mcp_config.get('upload_url', ''),
+            'health_timeout': mcp_config.get('health_timeout', 10)
         })
         logger.info("MCP 发布器初始化成功")
     except Exception as e:
         logger.warning(f"MCP 发布器初始化失败: {e}")
         mcp_publisher = None
 
-def load_queue():
-    """加载队列"""
-    if QUEUE_FILE.exists():
-        try:
-            with open(QUEUE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"加载队列失败: {e}")
-    return []
+_mcp_lock = threading.Lock()
 
-def save_queue(queue):
-    """保存队列"""
-    try:
-        with open(QUEUE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(queue, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        logger.error(f"保存队列失败: {e}")
-        return False
+def ensure_mcp():
+    """MCP 发布器未初始化时初始化（加锁双重检查，并发请求只有一个会执行 init_mcp）"""
+    if mcp_publisher is None:
+        with _mcp_lock:
+            if mcp_publisher is None:
+                init_mcp()
+    return mcp_publisher
+
+# 内容队列存放在 SQLite（data/queue.db，WAL 模式），与定时任务进程共用；
+# 首次启动时自动导入旧版 data/queue.json
+queue_store = QueueStore(QUEUE_DB, legacy_json=QUEUE_FILE)
+atexit.register(queue_store.close)
+
+def load_queue(status: Optional[str] = None) -> List[Dict]:
+    """加载队列（按写入顺序，可按状态筛选）"""
+    return queue_store.list(status)
+
+def get_queue_item(item_id) -> Optional[Dict]:
+    """按 ID 获取队列中的一条内容"""
+    return queue_store.get(item_id)
+
+def update_queue_item(item_id, updates: Dict) -> Optional[Dict]:
+    """
+    更新一条内容的部分字段（单条 UPDATE，不影响其他内容）
+    
+    发布、发送卡片等操作中间要等网络请求，结束后应通过这里写回结果，
+    而不是保存操作开始时读取的整条旧数据，以免覆盖期间其他请求的修改
+    
+    Returns:
+        更新后的内容；未找到时返回 None
+    """
+    return queue_store.update(item_id, updates)
+
+def remove_queue_item(item_id):
+    """删除一条内容"""
+    queue_store.delete(item_id)
+
+def write_file_atomic(path: Path, data: bytes, fsync: bool = False):
+    """
+    先写临时文件再原子替换，写到一半崩溃也不会留下截断的文件
+    
+    Args:
+        path: 目标文件
+        data: 文件内容
+        fsync: 替换前是否把临时文件刷到磁盘（掉电也不丢数据，但写入更慢）
+    """
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            # 只需保证文件内容落盘，fdatasync 省去一次元数据写入（Windows 等平台没有时用 fsync）
+            getattr(os, 'fdatasync', os.fsync)(f.fileno())
+    if path.exists():
+        # 保留原文件权限（配置文件中有密钥，可能被设置为仅属主可读）
+        os.chmod(tmp, path.stat().st_mode & 0o777)
+    os.replace(tmp, path)
+
+# 审核 / 发布时间只精确到秒，同一秒内复用已格式化的字符串（整体替换元组，多线程读写无需加锁）
+_ts_cache = (0, '')
+
+def now_iso() -> str:
+    """当前时间（ISO 格式，精确到秒）"""
+    global _ts_cache
+    t = int(time.time())
+    cached_t, cached = _ts_cache
+    if cached_t != t:
+        cached = datetime.fromtimestamp(t).isoformat()
+        _ts_cache = (t, cached)
+    return cached
 
 def log_action(action, details=""):
     """记录操作日志"""
@@ -326,11 +551,14 @@ def health():
         }
     }
     
-    queue = load_queue()
+    with _llm_cache_lock:
+        health_status['llm_cache'] = dict(_llm_cache_stats)
+    
+    stats = queue_store.stats(datetime.now().strftime('%Y-%m-%d'))
     health_status['queue'] = {
-        'pending': len([q for q in queue if q['status'] == 'pending']),
-        'approved': len([q for q in queue if q['status'] == 'approved']),
-        'published': len([q for q in queue if q['status'] == 'published'])
+        'pending': stats['pending'],
+        'approved': stats['approved'],
+        'published': stats['published']
     }
     
     return jsonify(health_status)
@@ -338,241 +566,363 @@ def health():
 @app.route('/api/stats')
 def get_stats():
     """获取统计信息"""
-    queue = load_queue()
-    today = datetime.now().strftime('%Y-%m-%d')
-    
-    stats = {
-        'pending': len([q for q in queue if q['status'] == 'pending']),
-        'approved': len([q for q in queue if q['status'] == 'approved']),
-        'published': len([q for q in queue if q['status'] == 'published']),
-        'today_published': len([q for q in queue if q['status'] == 'published' and q.get('published_at', '').startswith(today)]),
-        'today_generated': len([q for q in queue if q.get('created_at', '').startswith(today)])
-    }
-    return jsonify(stats)
+    return jsonify(queue_store.stats(datetime.now().strftime('%Y-%m-%d')))
+
+# 超过这个条数时 /api/queue 分块流式输出，边序列化边发送
+QUEUE_STREAM_THRESHOLD = 500
+
+def iter_json_array(items: List[Any], chunk_size: int = 100):
+    """把列表按块序列化为 JSON 数组文本，供流式响应使用"""
+    dumps = app.json.dumps
+    yield '['
+    for start in range(0, len(items), chunk_size):
+        chunk = ','.join(dumps(x) for x in items[start:start + chunk_size])
+        yield chunk if start == 0 else ',' + chunk
+    yield ']\n'
 
 @app.route('/api/queue')
 def get_queue():
-    """获取队列"""
-    status = request.args.get('status', 'all')
-    queue = load_queue()
+    """
+    获取队列
     
-    if status != 'all':
-        queue = [q for q in queue if q['status'] == status]
+    查询参数: status 状态筛选；offset / limit 分页（不传 limit 时返回全部）。
+    总条数在响应头 X-Total-Count 中
+    """
+    status = request.args.get('status', 'all')
+    status = None if status == 'all' else status
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', type=int)
     
     # 按创建时间倒序
-    queue = sorted(queue, key=lambda x: x.get('created_at', ''), reverse=True)
-    return jsonify(queue)
+    queue = queue_store.list(status, newest_first=True,
+                             limit=max(limit, 0) if limit is not None else None, offset=offset)
+    total = queue_store.count(status)
+    
+    if len(queue) > QUEUE_STREAM_THRESHOLD:
+        response = app.response_class(iter_json_array(queue), mimetype='application/json')
+    else:
+        response = jsonify(queue)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 @app.route('/api/queue/<item_id>/approve', methods=['POST'])
 def approve_item(item_id):
     """批准内容"""
-    queue = load_queue()
-    for item in queue:
-        if item['id'] == item_id:
-            if item['status'] == 'pending':
-                item['status'] = 'approved'
-                item['approved_at'] = datetime.now().isoformat()
-                save_queue(queue)
-                log_action('APPROVE', f"ID: {item_id}, 标题: {item.get('title', '')[:30]}...")
-                return jsonify({'success': True, 'message': '已批准'})
-            return jsonify({'success': False, 'message': '该内容已被处理'})
+    item = queue_store.update(item_id, {
+        'status': 'approved',
+        'approved_at': now_iso()
+    }, only_status=('pending',))
+    if item is not None:
+        log_action('APPROVE', f"ID: {item_id}, 标题: {item.get('title', '')[:30]}...")
+        return jsonify({'success': True, 'message': '已批准'})
+    if queue_store.get(item_id) is not None:
+        return jsonify({'success': False, 'message': '该内容已被处理'})
     return jsonify({'success': False, 'message': '未找到内容'}), 404
 
 @app.route('/api/queue/<item_id>/reject', methods=['POST'])
 def reject_item(item_id):
     """拒绝/删除内容"""
-    queue = load_queue()
-    for item in queue:
-        if item['id'] == item_id:
-            item['status'] = 'rejected'
-            item['rejected_at'] = datetime.now().isoformat()
-            save_queue(queue)
-            log_action('REJECT', f"ID: {item_id}, 标题: {item.get('title', '')[:30]}...")
-            return jsonify({'success': True, 'message': '已删除'})
+    item = update_queue_item(item_id, {
+        'status': 'rejected',
+        'rejected_at': now_iso()
+    })
+    if item is not None:
+        log_action('REJECT', f"ID: {item_id}, 标题: {item.get('title', '')[:30]}...")
+        return jsonify({'success': True, 'message': '已删除'})
     return jsonify({'success': False, 'message': '未找到内容'}), 404
 
-@app.route('/api/publish', methods=['POST'])
-def publish_item():
-    """发布已批准的内容（手动触发）"""
-    global mcp_publisher
-    
-    if not mcp_publisher:
-        init_mcp()
-    
-    if not mcp_publisher:
-        return jsonify({'success': False, 'message': 'MCP 发布器未初始化'}), 500
-    
-    data = request.get_json()
-    item_id = data.get('id') if data else None
-    
-    queue = load_queue()
-    
-    # 如果指定了 ID，发布指定内容；否则发布最早批准的
-    target_item = None
-    if item_id:
-        for item in queue:
-            if item['id'] == item_id and item['status'] == 'approved':
-                target_item = item
-                break
-    else:
-        approved_items = [q for q in queue if q['status'] == 'approved']
-        if approved_items:
-            target_item = approved_items[0]
-    
-    if not target_item:
-        return jsonify({'success': False, 'message': '没有待发布的内容'}), 400
+# 发布任务：MCP 发布一次最长要等几分钟，放到独立线程池执行，接口立即返回任务 ID，
+# 前端通过 /api/publish/status/<job_id> 查询结果；手动发布、飞书审核发布和飞书轮询共用这一个线程池，
+# 并发数由 mcp.publish_concurrency 控制（默认 4）
+PUBLISH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=max(1, int(load_config().get('mcp', {}).get('publish_concurrency', 4))),
+    thread_name_prefix='web-publish'
+)
+PUBLISH_JOBS_LIMIT = 200
+_publish_jobs: Dict[str, Dict[str, Any]] = {}
+_publish_jobs_lock = threading.Lock()
+
+# 正在发布的内容 ID，防止同一条内容被重复提交发布（重复点击、卡片与后台同时发布等）
+_publishing_ids = set()
+_publishing_lock = threading.Lock()
+
+def claim_publish(item_id: str) -> bool:
+    """登记一条内容为发布中；已在发布中时返回 False"""
+    with _publishing_lock:
+        if item_id in _publishing_ids:
+            return False
+        _publishing_ids.add(item_id)
+        return True
+
+def release_publish(item_id: str):
+    """发布结束后取消登记"""
+    with _publishing_lock:
+        _publishing_ids.discard(item_id)
+
+def do_publish(item: Dict) -> Dict:
+    """
+    发布一条已批准的内容，写回队列并发送飞书机器人通知（在发布线程池中执行）
     
+    Returns:
+        发布结果 {'success': ..., 'message': ..., 'note_id': ..., 'share_url': ...}
+    """
     try:
         # 调用 MCP 发布
         result = mcp_publisher.publish_note(
-            title=target_item['title'],
-            content=target_item['content'],
-            image_paths=target_item.get('images', []),
-            tags=target_item.get('tags', [])
+            title=item['title'],
+            content=item['content'],
+            image_paths=item.get('images', []),
+            tags=item.get('tags', [])
         )
         
         if result.get('success'):
-            target_item['status'] = 'published'
-            target_item['published_at'] = datetime.now().isoformat()
-            target_item['note_id'] = result.get('note_id')
-            target_item['share_url'] = result.get('share_url')
-            save_queue(queue)
+            update_queue_item(item['id'], {
+                'status': 'published',
+                'published_at': now_iso(),
+                'note_id': result.get('note_id'),
+                'share_url': result.get('share_url')
+            })
             
             # 更新飞书机器人消息（如果通过机器人审核的）
             if feishu_bot and feishu_bot.enabled:
                 try:
                     feishu_bot.send_publish_success_notification(
-                        target_item['id'],
+                        item['id'],
                         result.get('note_id'),
                         result.get('share_url', '')
                     )
                 except Exception as e:
                     logger.warning(f"发送飞书机器人通知失败: {e}")
             
-            log_action('PUBLISH', f"ID: {target_item['id']}, NoteID: {result.get('note_id')}")
-            return jsonify({
-                'success': True, 
+            log_action('PUBLISH', f"ID: {item['id']}, NoteID: {result.get('note_id')}")
+            return {
+                'success': True,
                 'message': '发布成功',
                 'note_id': result.get('note_id'),
                 'share_url': result.get('share_url')
-            })
+            }
         else:
             error_msg = result.get('error', '未知错误')
-            log_action('PUBLISH_FAIL', f"ID: {target_item['id']}, Error: {error_msg}")
-            return jsonify({'success': False, 'message': f'发布失败: {error_msg}'}), 500
+            log_action('PUBLISH_FAIL', f"ID: {item['id']}, Error: {error_msg}")
+            return {'success': False, 'message': f'发布失败: {error_msg}'}
             
     except Exception as e:
-        log_action('PUBLISH_ERROR', f"ID: {target_item['id']}, Error: {str(e)}")
-        return jsonify({'success': False, 'message': f'发布异常: {str(e)}'}), 500
+        log_action('PUBLISH_ERROR', f"ID: {item['id']}, Error: {str(e)}")
+        return {'success': False, 'message': f'发布异常: {str(e)}'}
+    finally:
+        release_publish(item['id'])
+
+@app.route('/api/publish', methods=['POST'])
+def publish_item():
+    """发布已批准的内容（手动触发，提交到后台执行）"""
+    global mcp_publisher
+    
+    ensure_mcp()
+    
+    if not mcp_publisher:
+        return jsonify({'success': False, 'message': 'MCP 发布器未初始化'}), 500
+    
+    data = request.get_json()
+    item_id = data.get('id') if data else None
+    
+    # 如果指定了 ID，发布指定内容；否则发布最早批准的（跳过正在发布的）
+    target_item = None
+    if item_id:
+        item = get_queue_item(item_id)
+        if item and item['status'] == 'approved' and claim_publish(item_id):
+            target_item = item
+    else:
+        target_item = next(
+            (q for q in load_queue('approved') if claim_publish(q['id'])),
+            None
+        )
+    
+    if not target_item:
+        return jsonify({'success': False, 'message': '没有待发布的内容'}), 400
+    
+    job_id = f"pub_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    future = PUBLISH_EXECUTOR.submit(do_publish, target_item)
+    with _publish_jobs_lock:
+        _publish_jobs[job_id] = {'item_id': target_item['id'], 'future': future}
+        # 只保留最近的任务记录，淘汰最早的已完成任务
+        excess = len(_publish_jobs) - PUBLISH_JOBS_LIMIT
+        if excess > 0:
+            finished = [k for k, job in _publish_jobs.items() if job['future'].done()]
+            for old_id in finished[:excess]:
+                del _publish_jobs[old_id]
+    
+    return jsonify({
+        'success': True,
+        'message': '已提交发布',
+        'job_id': job_id,
+        'id': target_item['id'],
+        'status': 'queued'
+    }), 202
+
+@app.route('/api/publish/status/<job_id>')
+def publish_status(job_id):
+    """查询发布任务状态：queued / running / done"""
+    with _publish_jobs_lock:
+        job = _publish_jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    
+    future = job['future']
+    status = {'job_id': job_id, 'id': job['item_id']}
+    if future.done():
+        status['status'] = 'done'
+        status['result'] = future.result()
+    else:
+        status['status'] = 'running' if future.running() else 'queued'
+    return jsonify(status)
+
+# 请求内可并行的后台任务（如写飞书表格）
+BACKGROUND_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='web-bg')
+
+def build_content_item(item: Dict):
+    """由队列条目构造飞书表格和审核卡片共用的 ContentItem"""
+    from content_generator import ContentItem
+    return ContentItem(
+        id=item['id'],
+        title=item['title'],
+        content=item['content'],
+        tags=item['tags'],
+        summary=item['content'][:100] + '...',
+        keywords=[item['keyword']]
+    )
+
+def write_feishu_record(content_item):
+    """把生成的内容写入飞书多维表格并发送通知"""
+    try:
+        feishu_client.add_record(content_item)
+        
+        # 发送飞书通知
+        if feishu_notifier:
+            feishu_notifier.send_content_generated(content_item.title, content_item.summary)
+        
+        log_action('GENERATE', f"关键词: {content_item.keywords[0]}, 标题: {content_item.title[:30]}...，已写入飞书")
+    except Exception as e:
+        log_action('FEISHU_ERROR', f"写入飞书失败: {e}")
+
+def send_feishu_approval_card(content_item):
+    """发送飞书机器人交互式审核卡片"""
+    try:
+        feishu_bot.send_content_for_approval(content_item)
+        log_action('GENERATE', f"关键词: {content_item.keywords[0]}, 标题: {content_item.title[:30]}...，已发送飞书机器人")
+    except Exception as e:
+        log_action('FEISHU_BOT_ERROR', f"发送飞书机器人失败: {e}")
+
+def search_references(config: Dict, keywords: List[str]) -> List[List[Any]]:
+    """并发搜索各关键词的参考资料，无结果时使用模拟数据；结果顺序与 keywords 一致"""
+    from search_engine import SearchEngine
+    
+    searcher = SearchEngine(config.get('search', {}))
+    try:
+        all_results = searcher.search_many(keywords)
+    finally:
+        searcher.close()
+    
+    for i, keyword in enumerate(keywords):
+        if not all_results[i]:
+            logger.warning(f"搜索关键词 '{keyword}' 无结果，使用模拟数据")
+            all_results[i] = [
+                {'title': f'{keyword}最新动态', 'snippet': f'关于{keyword}的最新资讯和发展趋势', 'url': ''},
+                {'title': f'{keyword}实用技巧', 'snippet': f'分享{keyword}的实用技巧和经验', 'url': ''},
+                {'title': f'{keyword}入门指南', 'snippet': f'{keyword}新手入门完整教程', 'url': ''}
+            ]
+    return all_results
+
+def build_generated_item(item_id: str, keyword: str, provider: str, model: str,
+                         content: Optional[Dict], search_results: List[Any]) -> Dict:
+    """构造队列条目（content 为 None 时构造等待批处理结果的占位条目）"""
+    def get_result_title(r):
+        if hasattr(r, 'title'):
+            return r.title
+        return r.get('title', '')
+    
+    content = content or {}
+    return {
+        'id': item_id,
+        'keyword': keyword,
+        'provider': provider,
+        'model': model,
+        'title': content.get('title', ''),
+        'content': content.get('content', ''),
+        'tags': content.get('tags', []),
+        'images': [],
+        'status': 'pending',
+        'created_at': datetime.now().isoformat(),
+        'source_results': [get_result_title(r) for r in search_results[:3]]
+    }
+
+def finalize_generated_item(item: Dict, xhs_config: Dict) -> Dict:
+    """
+    为已生成文案的条目配图并写入队列（替换同 id 的占位条目），同时同步到飞书
+    
+    Returns:
+        写入队列的条目
+    """
+    from image_generator import ImageGenerator
+    
+    keyword = item['keyword']
+    table_enabled = bool(feishu_client and feishu_client.enabled)
+    bot_enabled = bool(feishu_bot and feishu_bot.enabled)
+    content_item = build_content_item(item) if table_enabled or bot_enabled else None
+    
+    # 飞书表格记录不含配图，与生成配图并行写入；
+    # 机器人卡片可直接审核发布，要等配图和队列都就绪后再发
+    feishu_future = None
+    if table_enabled:
+        feishu_future = BACKGROUND_EXECUTOR.submit(write_feishu_record, content_item)
+    
+    img_gen = ImageGenerator()
+    img_count = xhs_config.get('images_per_post', 3)
+    item['images'] = img_gen.generate(keyword, item['title'], count=img_count)
+    
+    queue_store.upsert(item)
+    
+    # 发送审核卡片的同时，表格写入若还未完成则并行等待
+    if bot_enabled:
+        send_feishu_approval_card(content_item)
+    
+    if feishu_future is not None:
+        feishu_future.result()
+    
+    if not table_enabled and not bot_enabled:
+        log_action('GENERATE', f"关键词: {keyword}, 标题: {item['title'][:30]}...")
+    
+    return item
 
 @app.route('/api/generate', methods=['POST'])
 def generate_content():
     """手动触发内容生成"""
     try:
-        from image_generator import ImageGenerator
-        from search_engine import SearchEngine
-        
         config = load_config()
         xhs_config = config.get('xiaohongshu', {})
         
-        provider_config = config.get('providers', {})
         default_provider = xhs_config.get('default_provider', 'deepseek')
-        provider_cfg = provider_config.get(default_provider, {})
+        resolved = get_resolved_providers().get(default_provider)
         
-        if not provider_cfg.get('key'):
+        if not resolved or not resolved['api_key']:
             return jsonify({'success': False, 'message': f'{default_provider} API Key 未配置'}), 400
         
-        client, model = get_ai_client(default_provider, provider_config)
+        client, model = get_ai_client(default_provider)
         
-        import random
         keywords = xhs_config.get('keywords', ['AI人工智能'])
         keyword = random.choice(keywords)
         
-        search_config = config.get('search', {})
-        searcher = SearchEngine(search_config)
-        search_results = searcher.search(keyword)
-        
-        if not search_results:
-            logger.warning(f"搜索关键词 '{keyword}' 无结果，使用模拟数据")
-            search_results = [
-                {'title': f'{keyword}最新动态', 'snippet': f'关于{keyword}的最新资讯和发展趋势', 'url': ''},
-                {'title': f'{keyword}实用技巧', 'snippet': f'分享{keyword}的实用技巧和经验', 'url': ''},
-                {'title': f'{keyword}入门指南', 'snippet': f'{keyword}新手入门完整教程', 'url': ''}
-            ]
+        search_results = search_references(config, [keyword])[0]
         
         content = generate_with_ai(client, model, search_results, keyword, xhs_config.get('content_style', 'casual'))
         
         if not content or not content.get('title'):
             return jsonify({'success': False, 'message': '内容生成失败'}), 500
         
-        img_gen = ImageGenerator()
-        img_count = xhs_config.get('images_per_post', 3)
-        images = img_gen.generate(keyword, content['title'], count=img_count)
-        
-        def get_result_title(r):
-            if hasattr(r, 'title'):
-                return r.title
-            return r.get('title', '')
-        
-        item = {
-            'id': f"gen_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            'keyword': keyword,
-            'provider': default_provider,
-            'model': model,
-            'title': content['title'],
-            'content': content['content'],
-            'tags': content.get('tags', []),
-            'images': images,
-            'status': 'pending',
-            'created_at': datetime.now().isoformat(),
-            'source_results': [get_result_title(r) for r in search_results[:3]]
-        }
-        
-        queue = load_queue()
-        queue.append(item)
-        save_queue(queue)
-        
-        # 写入飞书多维表格（如果启用）
-        if feishu_client and feishu_client.enabled:
-            try:
-                from content_generator import ContentItem
-                content_item = ContentItem(
-                    id=item['id'],
-                    title=item['title'],
-                    content=item['content'],
-                    tags=item['tags'],
-                    summary=item['content'][:100] + '...',
-                    keywords=[keyword]
-                )
-                feishu_client.add_record(content_item)
-                
-                # 发送飞书通知
-                if feishu_notifier:
-                    feishu_notifier.send_content_generated(item['title'], content_item.summary)
-                
-                log_action('GENERATE', f"关键词: {keyword}, 标题: {item['title'][:30]}...，已写入飞书")
-            except Exception as e:
-                log_action('FEISHU_ERROR', f"写入飞书失败: {e}")
-        
-        # 发送飞书机器人交互式卡片（如果启用）
-        if feishu_bot and feishu_bot.enabled:
-            try:
-                from content_generator import ContentItem
-                content_item = ContentItem(
-                    id=item['id'],
-                    title=item['title'],
-                    content=item['content'],
-                    tags=item['tags'],
-                    summary=item['content'][:100] + '...',
-                    keywords=[keyword]
-                )
-                feishu_bot.send_content_for_approval(content_item)
-                log_action('GENERATE', f"关键词: {keyword}, 标题: {item['title'][:30]}...，已发送飞书机器人")
-            except Exception as e:
-                log_action('FEISHU_BOT_ERROR', f"发送飞书机器人失败: {e}")
-        
-        if not (feishu_client and feishu_client.enabled) and not (feishu_bot and feishu_bot.enabled):
-            log_action('GENERATE', f"关键词: {keyword}, 标题: {item['title'][:30]}...")
+        item = build_generated_item(
+            f"gen_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            keyword, default_provider, model, content, search_results
+        )
+        finalize_generated_item(item, xhs_config)
         
         return jsonify({
             'success': True,
@@ -587,10 +937,186 @@ def generate_content():
         traceback.print_exc()
         return jsonify({'success': False, 'message': f'生成失败: {str(e)}'}), 500
 
+@app.route('/api/generate/batch', methods=['POST'])
+def generate_content_batch():
+    """
+    批量生成内容
+    
+    请求体（可选）: {"keywords": ["关键词1", "关键词2"]}，默认使用配置中的全部关键词
+    
+    提供商为 OpenAI 时通过 Batch API 提交（异步完成，费用减半）：队列中先写入 batching 状态的
+    占位条目，由后台线程轮询批处理结果后补全；其他提供商逐个在线生成
+    """
+    try:
+        config = load_config()
+        xhs_config = config.get('xiaohongshu', {})
+        
+        default_provider = xhs_config.get('default_provider', 'deepseek')
+        resolved = get_resolved_providers().get(default_provider)
+        
+        if not resolved or not resolved['api_key']:
+            return jsonify({'success': False, 'message': f'{default_provider} API Key 未配置'}), 400
+        
+        client, model = get_ai_client(default_provider)
+        
+        data = request.get_json(silent=True) or {}
+        keywords = data.get('keywords') or xhs_config.get('keywords', ['AI人工智能'])
+        style = xhs_config.get('content_style', 'casual')
+        all_results = search_references(config, keywords)
+        # 一批内有多条，时间戳精确到微秒再加序号，避免与同一秒内生成的其他条目重名
+        id_prefix = f"gen_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        
+        if default_provider != 'openai':
+            items = []
+            for i, (keyword, search_results) in enumerate(zip(keywords, all_results)):
+                content = generate_with_ai(client, model, search_results, keyword, style)
+                if content and content.get('title'):
+                    item = build_generated_item(f"{id_prefix}_{i}", keyword, default_provider, model, content, search_results)
+                    items.append(finalize_generated_item(item, xhs_config))
+            
+            return jsonify({
+                'success': True,
+                'message': f'生成了 {len(items)} 条内容',
+                'items': items
+            })
+        
+        placeholders = []
+        lines = []
+        for i, (keyword, search_results) in enumerate(zip(keywords, all_results)):
+            item = build_generated_item(f"{id_prefix}_{i}", keyword, default_provider, model, None, search_results)
+            item['status'] = 'batching'
+            placeholders.append(item)
+            
+            system_prompt, user_prompt = build_ai_prompts(search_results, keyword, style)
+            lines.append(json.dumps({
+                'custom_id': item['id'],
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': model,
+                    'messages': [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    'temperature': 0.7,
+                    'max_tokens': 2000
+                }
+            }, ensure_ascii=False))
+        
+        batch_file = client.files.create(
+            file=('batch.jsonl', '\n'.join(lines).encode('utf-8')),
+            purpose='batch'
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        
+        for item in placeholders:
+            item['batch_id'] = batch.id
+        queue_store.upsert_many(placeholders)
+        start_batch_poller()
+        
+        log_action('GENERATE_BATCH', f"BatchID: {batch.id}, 关键词: {len(keywords)} 个")
+        return jsonify({
+            'success': True,
+            'message': f'已提交批量生成任务，共 {len(placeholders)} 条',
+            'batch_id': batch.id,
+            'items': placeholders
+        })
+        
+    except Exception as e:
+        log_action('GENERATE_BATCH_ERROR', f"Error: {str(e)}")
+        return jsonify({'success': False, 'message': f'批量生成失败: {str(e)}'}), 500
+
+
+# 批处理结果轮询间隔（秒）
+BATCH_POLL_INTERVAL = 60
+_batch_poller_lock = threading.Lock()
+_batch_poller_running = False
+
+def start_batch_poller():
+    """启动批处理轮询线程（已在运行时不重复启动）"""
+    global _batch_poller_running
+    with _batch_poller_lock:
+        if _batch_poller_running:
+            return
+        _batch_poller_running = True
+    threading.Thread(target=poll_generation_batches, daemon=True).start()
+
+def poll_generation_batches():
+    """
+    后台轮询 OpenAI 批处理任务，完成后补全队列中的占位条目
+    队列中没有 batching 状态的条目时退出
+    """
+    global _batch_poller_running
+    
+    while True:
+        time.sleep(BATCH_POLL_INTERVAL)
+        
+        # 与 start_batch_poller 共用锁：检查到无任务并退出的同时不会有新任务漏掉轮询
+        with _batch_poller_lock:
+            batches = {}
+            for item in load_queue('batching'):
+                batches.setdefault(item['batch_id'], []).append(item)
+            if not batches:
+                _batch_poller_running = False
+                return
+        
+        for batch_id, items in batches.items():
+            try:
+                check_generation_batch(batch_id, items)
+            except Exception as e:
+                log_action('GENERATE_BATCH_POLL_ERROR', f"BatchID: {batch_id}, Error: {str(e)}")
+
+def check_generation_batch(batch_id: str, items: List[Dict]):
+    """检查一个批处理任务，已结束时把结果写回对应的占位条目"""
+    client, _ = get_ai_client('openai')
+    batch = client.batches.retrieve(batch_id)
+    
+    if batch.status in ('failed', 'expired', 'cancelled'):
+        for item in items:
+            update_queue_item(item['id'], {'status': 'failed', 'error': f'批处理任务 {batch.status}'})
+        log_action('GENERATE_BATCH_FAIL', f"BatchID: {batch_id}, Status: {batch.status}")
+        return
+    
+    if batch.status != 'completed':
+        return
+    
+    outputs = {}
+    if batch.output_file_id:
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            try:
+                outputs[record['custom_id']] = record['response']['body']['choices'][0]['message']['content']
+            except (KeyError, IndexError, TypeError):
+                continue
+    
+    xhs_config = load_config().get('xiaohongshu', {})
+    for item in items:
+        try:
+            content = parse_ai_result(outputs.get(item['id'], ''))
+        except ValueError:
+            content = None
+        
+        if not content or not content.get('title'):
+            update_queue_item(item['id'], {'status': 'failed', 'error': '批处理未返回有效内容'})
+            continue
+        
+        item.update(content)
+        item['status'] = 'pending'
+        finalize_generated_item(item, xhs_config)
+    
+    log_action('GENERATE_BATCH_DONE', f"BatchID: {batch_id}, 条目: {len(items)}")
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """获取配置"""
-    config = load_config()
+    # 缓存的配置字典在请求间共享，复制一份再补充前端字段
+    config = dict(load_config())
     mcp_config = config.get('mcp', {})
     scheduler_config = config.get('scheduler', {})
     config['mcpApiKey'] = mcp_config.get('api_key', '')
@@ -636,6 +1162,7 @@ def save_config_api():
         
         if 'providers' in data:
             existing_config['providers'] = data.get('providers')
+            clear_ai_clients()
         
         if 'keywords' in data:
             if 'xiaohongshu' not in existing_config:
@@ -661,8 +1188,12 @@ def save_config_api():
                 existing_config['scheduler']['interval'] = data.get('interval', 60)
         
         import yaml
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            yaml.dump(existing_config, f, allow_unicode=True, default_flow_style=False)
+        # 配置改动少，替换前刷盘，确保保存成功后掉电也不会丢失
+        write_file_atomic(
+            CONFIG_FILE,
+            yaml.dump(existing_config, allow_unicode=True, default_flow_style=False).encode('utf-8'),
+            fsync=True
+        )
         
         clear_config_cache()
         logger.info("配置已保存")
@@ -671,6 +1202,31 @@ def save_config_api():
         logger.error(f"保存配置失败: {e}")
         return jsonify({'success': False, 'message': f'保存失败: {str(e)}'}), 500
 
+def tail_lines(path: Path, count: int, chunk_size: int = 64 * 1024) -> List[str]:
+    """
+    读取文本文件的最后 count 行，结果与 readlines()[-count:] 一致
+    从文件末尾按块向前读，只读到足够的行为止，耗时与文件大小无关
+    """
+    with open(path, 'rb') as f:
+        if count <= 0:
+            data, pos = f.read(), 0
+        else:
+            pos = f.seek(0, os.SEEK_END)
+            data = b''
+            # 攒够 count + 1 个换行才能确定最早一行的起点（末行可能没有换行符）
+            while pos > 0 and data.count(b'\n') <= count:
+                step = min(chunk_size, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+            if pos > 0:
+                # 丢掉开头被截断的半行（可能从多字节字符中间开始）
+                data = data[data.index(b'\n') + 1:]
+    
+    # 用 TextIOWrapper 解码，保持与文本模式 readlines() 相同的换行处理
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').readlines()
+    return lines[-count:]
+
 @app.route('/api/logs')
 def get_logs():
     """获取日志"""
@@ -680,10 +1236,7 @@ def get_logs():
         if not log_file.exists():
             return jsonify([])
         
-        with open(log_file, 'r', encoding='utf-8') as f:
-            all_lines = f.readlines()
-        
-        return jsonify(all_lines[-lines:])
+        return jsonify(tail_lines(log_file, lines))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -748,6 +1301,8 @@ def mark_news_used(news_id):
         from src.news_collector import NewsCollector
         collector = NewsCollector()
         collector.mark_as_used(news_id)
+        # 收集器按请求创建，返回前立即落盘，不等延迟写回
+        collector.flush()
         
         return jsonify({'success': True, 'message': '已标记为已使用'})
     except Exception as e:
@@ -798,8 +1353,7 @@ def sync_feishu():
     if not feishu_client or not feishu_client.enabled:
         return jsonify({'success': False, 'message': '飞书集成未启用'}), 400
     
-    if not mcp_publisher:
-        init_mcp()
+    ensure_mcp()
     
     try:
         records = feishu_client.get_pending_records()
@@ -807,47 +1361,7 @@ def sync_feishu():
         if not records:
             return jsonify({'success': True, 'message': '没有待发布的已审核内容', 'published': 0})
         
-        published_count = 0
-        for record in records:
-            fields = record.get('fields', {})
-            record_id = record.get('record_id')
-            
-            title = fields.get('标题', '')
-            content = fields.get('正文', '')
-            tags_str = fields.get('标签', '')
-            tags = [t.strip() for t in tags_str.split(',') if t.strip()]
-            
-            if not title or not content:
-                continue
-            
-            try:
-                result = mcp_publisher.publish_note(
-                    title=title,
-                    content=content,
-                    image_paths=[],
-                    tags=tags
-                )
-                
-                if result.get('success'):
-                    feishu_client.update_record_status(
-                        record_id=record_id,
-                        status='已发布',
-                        note_id=result.get('note_id'),
-                        share_url=result.get('share_url')
-                    )
-                    
-                    # 发送成功通知
-                    if feishu_notifier:
-                        feishu_notifier.send_publish_success(title, result.get('share_url', ''))
-                    
-                    published_count += 1
-                    log_action('FEISHU_PUBLISH', f"标题: {title[:30]}..., NoteID: {result.get('note_id')}")
-                else:
-                    feishu_client.update_record_status(record_id, '发布失败')
-                    log_action('FEISHU_PUBLISH_FAIL', f"标题: {title[:30]}...")
-                    
-            except Exception as e:
-                log_action('FEISHU_PUBLISH_ERROR', f"标题: {title[:30]}..., Error: {str(e)}")
+        published_count, _ = publish_feishu_records(records, 'FEISHU_PUBLISH')
         
         return jsonify({
             'success': True,
@@ -860,60 +1374,114 @@ def sync_feishu():
         return jsonify({'success': False, 'message': f'同步失败: {str(e)}'}), 500
 
 
+def publish_feishu_records(records: List[Dict], action: str) -> Tuple[int, int]:
+    """
+    发布飞书表格中已审核的记录，并把发布结果写回飞书
+    
+    各条记录在发布线程池 PUBLISH_EXECUTOR 中并发发布，
+    状态更新先放入缓冲区，全部发布完成后一次批量提交；发布失败（含异常）的记录标记为「发布失败」
+    
+    Args:
+        records: 飞书记录列表
+        action: 操作日志前缀
+        
+    Returns:
+        (发布成功的条数, 写回了状态的记录数)；后者为 0 表示这一轮没有任何记录离开「已通过」
+    """
+    notes = []
+    for record in records:
+        fields = record.get('fields', {})
+        title = fields.get('标题', '')
+        content = fields.get('正文', '')
+        tags_str = fields.get('标签', '')
+        tags = [t.strip() for t in tags_str.split(',') if t.strip()]
+        
+        if title and content:
+            notes.append((record.get('record_id'), title, content, tags))
+    
+    # 发布器不可用时保留记录原状态，等发布器恢复后再发布，不把记录标记为发布失败
+    if not notes or mcp_publisher is None:
+        return 0, 0
+    
+    def publish_one(note):
+        _, title, content, tags = note
+        try:
+            return mcp_publisher.publish_note(
+                title=title,
+                content=content,
+                image_paths=[],
+                tags=tags
+            )
+        except Exception as e:
+            log_action(f'{action}_ERROR', f"标题: {title[:30]}..., Error: {str(e)}")
+            return None
+    
+    results = list(PUBLISH_EXECUTOR.map(publish_one, notes))
+    
+    published_count = 0
+    for (record_id, title, _, _), result in zip(notes, results):
+        # 发布异常或发布器未返回结果时同样标记为发布失败，使记录离开「已通过」，不再被反复轮询重试
+        if result and result.get('success'):
+            feishu_client.update_record_status_batched(
+                record_id=record_id,
+                status='已发布',
+                note_id=result.get('note_id'),
+                share_url=result.get('share_url')
+            )
+            
+            # 发送成功通知
+            if feishu_notifier:
+                feishu_notifier.send_publish_success(title, result.get('share_url', ''))
+            
+            published_count += 1
+            log_action(action, f"标题: {title[:30]}..., NoteID: {result.get('note_id')}")
+        else:
+            feishu_client.update_record_status_batched(record_id, '发布失败')
+            log_action(f'{action}_FAIL', f"标题: {title[:30]}...")
+    
+    feishu_client.flush_updates()
+    return published_count, len(notes)
+
+
+# 飞书轮询的最短 / 最长间隔（秒）：有新记录时回到最短间隔，空闲时按指数退避逐步拉长
+FEISHU_POLL_MIN_INTERVAL = 10
+FEISHU_POLL_MAX_INTERVAL = 300
+_feishu_poll_wakeup = threading.Event()
+
+def wake_feishu_poller():
+    """唤醒飞书轮询线程立即检查一次（收到审核回调等事件时调用）"""
+    _feishu_poll_wakeup.set()
+
 def poll_feishu_approved():
     """
     后台轮询飞书已审核内容
-    每 5 分钟检查一次
+    
+    作为审核回调之外的兜底：有记录时每 10 秒检查一次，连续空闲时间隔按指数退避
+    增长到最多 5 分钟；收到审核回调时会被立即唤醒
     """
     global feishu_client, mcp_publisher
     
+    miss_count = 0
     while True:
         try:
-            time.sleep(300)  # 5 分钟
+            interval = min(FEISHU_POLL_MAX_INTERVAL, FEISHU_POLL_MIN_INTERVAL * 2 ** miss_count)
+            if _feishu_poll_wakeup.wait(interval):
+                miss_count = 0
+            _feishu_poll_wakeup.clear()
             
             if not feishu_client or not feishu_client.enabled:
                 continue
             
-            if not mcp_publisher:
-                init_mcp()
+            ensure_mcp()
             
-            # 获取已审核记录
+            # 获取并发布已审核记录；只有确实写回了记录状态才回到最短间隔，
+            # 无法发布的记录（缺标题/正文、发布器不可用）留在「已通过」时继续退避
             records = feishu_client.get_pending_records()
-            
-            for record in records:
-                fields = record.get('fields', {})
-                record_id = record.get('record_id')
-                
-                title = fields.get('标题', '')
-                content = fields.get('正文', '')
-                tags_str = fields.get('标签', '')
-                tags = [t.strip() for t in tags_str.split(',') if t.strip()]
-                
-                if not title or not content:
-                    continue
-                
-                # 发布
-                result = mcp_publisher.publish_note(
-                    title=title,
-                    content=content,
-                    image_paths=[],
-                    tags=tags
-                )
-                
-                if result.get('success'):
-                    feishu_client.update_record_status(
-                        record_id=record_id,
-                        status='已发布',
-                        note_id=result.get('note_id'),
-                        share_url=result.get('share_url')
-                    )
-                    
-                    if feishu_notifier:
-                        feishu_notifier.send_publish_success(title, result.get('share_url', ''))
-                    
-                    log_action('FEISHU_AUTO_PUBLISH', f"标题: {title[:30]}...")
-                else:
-                    feishu_client.update_record_status(record_id, '发布失败')
+            updated = publish_feishu_records(records, 'FEISHU_AUTO_PUBLISH')[1] if records else 0
+            if updated:
+                miss_count = 0
+            elif FEISHU_POLL_MIN_INTERVAL * 2 ** miss_count < FEISHU_POLL_MAX_INTERVAL:
+                miss_count += 1
                     
         except Exception as e:
             log_action('FEISHU_POLL_ERROR', f"Error: {str(e)}")
@@ -947,8 +1515,7 @@ def send_approval_card():
     if not user_id and not chat_id:
         return jsonify({'success': False, 'message': '需要指定 user_id 或 chat_id'}), 400
     
-    queue = load_queue()
-    item = next((q for q in queue if q['id'] == content_id), None)
+    item = get_queue_item(content_id)
     
     if not item:
         return jsonify({'success': False, 'message': '内容不存在'}), 404
@@ -973,70 +1540,243 @@ def send_approval_card():
         message_id = feishu_approval_bot.send_to_chat(chat_id, content)
     
     if message_id:
-        item['feishu_message_id'] = message_id
-        save_queue(queue)
+        update_queue_item(content_id, {'feishu_message_id': message_id})
         log_action('FEISHU_SEND_APPROVAL', f"ID: {content_id}, To: {user_id or chat_id}")
         return jsonify({'success': True, 'message_id': message_id})
     else:
         return jsonify({'success': False, 'message': '发送失败'}), 500
 
 
+# 飞书审核通过的内容先进入待发布队列，由后台线程每 APPROVAL_BATCH_WINDOW 秒（最多
+# APPROVAL_BATCH_SIZE 条）取出一批：一次查询读出整批内容，并发发布，结果在一个事务中写回
+APPROVAL_BATCH_WINDOW = 0.2
+APPROVAL_BATCH_SIZE = 32
+_approval_queue = SimpleQueue()
+_approval_worker_lock = threading.Lock()
+_approval_worker_started = False
+
+def enqueue_approved_publish(content_id: str, statuses=('pending', 'approved'),
+                             notify=None, action: str = 'FEISHU_PUBLISH'):
+    """
+    把飞书上审核通过的内容加入待发布队列（回调接口无需等待发布完成）
+    
+    Args:
+        content_id: 内容ID
+        statuses: 允许发布的内容状态
+        notify: 发布成功后的通知函数 notify(content_id, note_id, share_url)
+        action: 操作日志前缀
+    """
+    global _approval_worker_started
+    _approval_queue.put((content_id, tuple(statuses), notify, action))
+    with _approval_worker_lock:
+        if not _approval_worker_started:
+            threading.Thread(target=_approval_worker, daemon=True, name='approval-publisher').start()
+            _approval_worker_started = True
+
+def _drain_approvals() -> List[tuple]:
+    """阻塞等待第一条，再在时间窗口内收集同一批的其余条目"""
+    batch = [_approval_queue.get()]
+    deadline = time.monotonic() + APPROVAL_BATCH_WINDOW
+    while len(batch) < APPROVAL_BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_approval_queue.get(timeout=remaining))
+        except Empty:
+            break
+    return batch
+
+def _approval_worker():
+    """待发布队列消费线程"""
+    while True:
+        batch = _drain_approvals()
+        try:
+            publish_approved_batch(batch)
+        except Exception as e:
+            logger.error(f"批量发布审核通过的内容异常: {e}")
+
+def publish_approved_batch(batch: List[tuple]):
+    """发布一批审核通过的内容 [(content_id, statuses, notify, action), ...]"""
+    global mcp_publisher
+    
+    # 同一批内重复的 ID、以及正在别处发布的 ID 都会在登记时被跳过
+    claimed = [job for job in batch if claim_publish(job[0])]
+    try:
+        items = queue_store.get_many([job[0] for job in claimed])
+        jobs = [job for job in claimed if job[0] in items and items[job[0]]['status'] in job[1]]
+        if not jobs:
+            return
+        
+        ensure_mcp()
+        if not mcp_publisher:
+            return
+        
+        def publish_one(job):
+            content_id, _, _, action = job
+            item = items[content_id]
+            try:
+                return mcp_publisher.publish_note(
+                    title=item['title'],
+                    content=item['content'],
+                    image_paths=item.get('images', []),
+                    tags=item.get('tags', [])
+                )
+            except Exception as e:
+                log_action(f'{action}_ERROR', f"ID: {content_id}, Error: {str(e)}")
+                return None
+        
+        results = list(PUBLISH_EXECUTOR.map(publish_one, jobs))
+        
+        published_at = now_iso()
+        updates = {}
+        succeeded = []
+        for job, result in zip(jobs, results):
+            if result is None:
+                continue
+            content_id, _, _, action = job
+            if not result.get('success'):
+                log_action(f'{action}_FAIL', f"ID: {content_id}, Error: {result.get('error', '未知错误')}")
+                continue
+            updates[content_id] = {
+                'status': 'published',
+                'published_at': published_at,
+                'note_id': result.get('note_id'),
+                'share_url': result.get('share_url')
+            }
+            succeeded.append((job, result))
+        
+        queue_store.update_many(updates)
+        
+        def notify_one(entry):
+            (content_id, _, notify, action), result = entry
+            if notify:
+                try:
+                    notify(content_id, result.get('note_id'), result.get('share_url', ''))
+                except Exception as e:
+                    logger.warning(f"发送飞书发布通知失败: {e}")
+            log_action(action, f"ID: {content_id}, NoteID: {result.get('note_id')}")
+        
+        list(BACKGROUND_EXECUTOR.map(notify_one, succeeded))
+    finally:
+        for job in claimed:
+            release_publish(job[0])
+
+
+# 飞书 URL 验证请求体只有 challenge / token / type 几个字段，匹配到时不必解析整个 JSON；
+# 匹配到的值不含引号和反斜杠，可以直接拼成响应体，不经过 jsonify 序列化
+_CHALLENGE_RE = re.compile(rb'"challenge"\s*:\s*"([^"\\]+)"')
+
+def challenge_response(raw: bytes):
+    """URL 验证请求直接返回 {"challenge": ...} 响应；不是验证请求时返回 None"""
+    if b'"event"' in raw:
+        return None
+    match = _CHALLENGE_RE.search(raw)
+    if not match:
+        return None
+    return app.response_class(b'{"challenge":"' + match.group(1) + b'"}', mimetype='application/json')
+
+# 卡片操作响应缓存 {(接口, 内容ID, 操作): (记录时间, 响应)}：
+# - 飞书在超时未收到应答时会重推同一次按钮点击，CARD_ACTION_REPLAY_TTL 秒内同一内容的同一操作
+#   直接返回上次的响应，不再重复处理卡片和入队发布
+# - 飞书接口异常导致处理失败时，CARD_ACTION_STALE_TTL 秒内有过成功响应的，返回该响应而不是报错
+CARD_ACTION_REPLAY_TTL = 10
+CARD_ACTION_STALE_TTL = 3600
+_card_action_cache = TTLCache(maxsize=1024, ttl=CARD_ACTION_STALE_TTL)
+_card_action_lock = threading.Lock()
+
+def get_cached_card_action(key: tuple, max_age: Optional[float] = CARD_ACTION_REPLAY_TTL) -> Optional[Dict]:
+    """
+    取出已处理过的卡片操作响应
+    
+    Args:
+        key: (接口, 内容ID, 操作)
+        max_age: 只返回该秒数内记录的响应；None 表示缓存中有就返回
+    """
+    with _card_action_lock:
+        entry = _card_action_cache.get(key)
+    if entry is None:
+        return None
+    recorded_at, response = entry
+    if max_age is not None and time.monotonic() - recorded_at > max_age:
+        return None
+    return response
+
+def cache_card_action(key: tuple, response: Dict):
+    """记录卡片操作响应"""
+    with _card_action_lock:
+        _card_action_cache[key] = (time.monotonic(), response)
+
+def run_card_handler(key: tuple, handler, payload) -> tuple:
+    """
+    调用卡片处理函数；处理失败时如有同一操作之前成功的响应，则记录警告并返回该响应
+    
+    Returns:
+        (响应, 是否为之前缓存的响应)
+    """
+    try:
+        return handler(payload), False
+    except Exception as e:
+        stale = get_cached_card_action(key, max_age=None)
+        if stale is None:
+            raise
+        logger.warning(f"处理卡片操作失败，返回上次的响应 {key}: {e}")
+        return stale, True
+
+def parse_card_action(event_data: Dict) -> Optional[tuple]:
+    """从卡片按钮点击事件中取出 (内容ID, 操作)；不是按钮点击事件或缺少按钮值时返回 None"""
+    # 按固定结构逐层取字段，缺失时直接返回，不为每层创建 {} 默认值
+    header = event_data.get('header')
+    if not header or header.get('event_type') != 'card.action.trigger':
+        return None
+    event = event_data.get('event')
+    action = event.get('action') if event else None
+    value = action.get('value') if action else None
+    if not value:
+        return None
+    return value.get('content_id'), value.get('action')
+
 @app.route('/api/feishu/callback', methods=['POST'])
 def feishu_card_callback():
     """
     接收飞书卡片按钮点击回调
     """
-    global feishu_approval_bot, mcp_publisher
+    global feishu_approval_bot
     
     if not feishu_approval_bot:
         return jsonify({'error': '飞书审核机器人未初始化'}), 500
     
     try:
+        challenge = challenge_response(request.get_data(cache=True))
+        if challenge is not None:
+            return challenge
+        
         event_data = request.get_json()
         
         if event_data.get('challenge'):
             return jsonify({'challenge': event_data['challenge']})
         
-        event_type = event_data.get('header', {}).get('event_type')
+        card_action = parse_card_action(event_data)
         
-        if event_type == 'card.action.trigger':
-            action_value = event_data.get('event', {}).get('action', {}).get('value', {})
-            action_type = action_value.get('action')
-            content_id = action_value.get('content_id')
+        if card_action:
+            content_id, action_type = card_action
+            key = ('callback', content_id, action_type)
+            cached = get_cached_card_action(key)
+            if cached is not None:
+                return jsonify(cached)
             
-            response = feishu_approval_bot.handle_card_callback(event_data.get('event', {}))
+            response, stale = run_card_handler(
+                key, feishu_approval_bot.handle_card_callback, event_data.get('event', {})
+            )
+            if stale:
+                return jsonify(response)
             
             if action_type == 'approve':
-                queue = load_queue()
-                item = next((q for q in queue if q['id'] == content_id), None)
-                
-                if item and item['status'] in ['pending', 'approved']:
-                    if not mcp_publisher:
-                        init_mcp()
-                    
-                    if mcp_publisher:
-                        result = mcp_publisher.publish_note(
-                            title=item['title'],
-                            content=item['content'],
-                            image_paths=item.get('images', []),
-                            tags=item.get('tags', [])
-                        )
-                        
-                        if result.get('success'):
-                            item['status'] = 'published'
-                            item['published_at'] = datetime.now().isoformat()
-                            item['note_id'] = result.get('note_id')
-                            item['share_url'] = result.get('share_url')
-                            save_queue(queue)
-                            
-                            feishu_approval_bot.update_card_published(
-                                content_id,
-                                result.get('note_id'),
-                                result.get('share_url', '')
-                            )
-                            
-                            log_action('FEISHU_PUBLISH', f"ID: {content_id}, NoteID: {result.get('note_id')}")
+                # 发布耗时较长，加入待发布队列由后台批量发布，回调立即返回卡片响应
+                enqueue_approved_publish(content_id, notify=feishu_approval_bot.update_card_published)
+                wake_feishu_poller()
             
+            cache_card_action(key, response)
             return jsonify(response)
         
         return jsonify({})
@@ -1052,72 +1792,57 @@ def feishu_webhook():
     接收飞书事件推送
     用于处理机器人卡片按钮点击事件
     """
-    global feishu_event_handler, mcp_publisher
+    global feishu_event_handler
     
     try:
+        # 验证请求（如果是挑战请求）
+        challenge = challenge_response(request.get_data(cache=True))
+        if challenge is not None:
+            return challenge
+        
         event_data = request.get_json()
         
-        # 验证请求（如果是挑战请求）
         if event_data.get('challenge'):
             return jsonify({'challenge': event_data['challenge']})
         
         # 处理事件
         if feishu_event_handler:
-            response = feishu_event_handler.handle_event(event_data)
+            card_action = parse_card_action(event_data)
+            if card_action:
+                content_id, action_type = card_action
+                key = ('webhook', content_id, action_type)
+                cached = get_cached_card_action(key)
+                if cached is not None:
+                    return jsonify(cached)
+            
+            if card_action:
+                response, stale = run_card_handler(key, feishu_event_handler.handle_event, event_data)
+                if stale:
+                    return jsonify(response)
+            else:
+                response = feishu_event_handler.handle_event(event_data)
             
             # 处理通过/拒绝操作
-            event_type = event_data.get('header', {}).get('event_type')
-            if event_type == 'card.action.trigger':
-                action = event_data.get('event', {}).get('action', {})
-                action_value = action.get('value', {})
-                action_type = action_value.get('action')
-                content_id = action_value.get('content_id')
-                
+            if card_action:
                 if action_type == 'approve':
-                    # 查找并发布内容
-                    queue = load_queue()
-                    item = next((q for q in queue if q['id'] == content_id), None)
-                    
-                    if item and item['status'] == 'pending':
-                        if not mcp_publisher:
-                            init_mcp()
-                        
-                        result = mcp_publisher.publish_note(
-                            title=item['title'],
-                            content=item['content'],
-                            image_paths=item.get('images', []),
-                            tags=item.get('tags', [])
-                        )
-                        
-                        if result.get('success'):
-                            item['status'] = 'published'
-                            item['published_at'] = datetime.now().isoformat()
-                            item['note_id'] = result.get('note_id')
-                            item['share_url'] = result.get('share_url')
-                            save_queue(queue)
-                            
-                            # 更新飞书机器人消息
-                            if feishu_bot:
-                                feishu_bot.send_publish_success_notification(
-                                    content_id, 
-                                    result.get('note_id'), 
-                                    result.get('share_url', '')
-                                )
-                            
-                            log_action('FEISHU_BOT_PUBLISH', f"ID: {content_id}, NoteID: {result.get('note_id')}")
-                        else:
-                            return jsonify({'toast': {'type': 'error', 'content': '发布失败，请重试'}})
+                    # 加入待发布队列由后台批量发布，立即应答飞书，避免超时重推导致重复发布；
+                    # 发布成功后由机器人另行通知
+                    enqueue_approved_publish(
+                        content_id, ('pending',),
+                        notify=feishu_bot.send_publish_success_notification if feishu_bot else None,
+                        action='FEISHU_BOT_PUBLISH'
+                    )
                 
                 elif action_type == 'reject':
                     # 删除内容
-                    queue = load_queue()
-                    queue = [q for q in queue if q['id'] != content_id]
-                    save_queue(queue)
+                    remove_queue_item(content_id)
                     
                     if feishu_bot:
                         feishu_bot.send_reject_notification(content_id)
                     
                     log_action('FEISHU_BOT_REJECT', f"ID: {content_id}")
+                
+                cache_card_action(key, response)
             
             return jsonify(response)
         
@@ -1128,12 +1853,61 @@ def feishu_webhook():
         return jsonify({'error': str(e)}), 500
 
 
+# 重启前提交的批处理任务继续轮询
+if queue_store.count('batching'):
+    start_batch_poller()
+
+# 飞书轮询进程锁：以多进程方式部署（如 gunicorn 多个 worker）时每个进程都会加载本模块，
+# 只有拿到锁的进程启动轮询线程，避免多个进程同时轮询飞书触发限流；进程退出时锁自动释放
+FEISHU_POLLER_LOCK = DATA_DIR / 'feishu_poller.lock'
+_feishu_poller_lock_file = None
+
+def acquire_feishu_poller_lock() -> bool:
+    """尝试获取飞书轮询进程锁（不阻塞），不支持文件锁的平台直接返回 True"""
+    global _feishu_poller_lock_file
+    if fcntl is None:
+        return True
+    lock_file = open(FEISHU_POLLER_LOCK, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    # 保持文件打开，锁在进程存活期间一直有效
+    _feishu_poller_lock_file = lock_file
+    return True
+
 # 启动飞书轮询线程（如果启用）
 if feishu_client and feishu_client.enabled:
-    poll_thread = threading.Thread(target=poll_feishu_approved, daemon=True)
-    poll_thread.start()
-    logger.info("飞书轮询线程已启动")
+    if acquire_feishu_poller_lock():
+        poll_thread = threading.Thread(target=poll_feishu_approved, daemon=True)
+        poll_thread.start()
+        logger.info("飞书轮询线程已启动")
+    else:
+        logger.info("其他进程已在轮询飞书，本进程不启动轮询线程")
+
+# 启动时即创建 MCP 发布器对象（以 gunicorn 等方式加载时不会执行 __main__）；
+# 这里只构造对象、不发起网络请求，与 MCP 服务端的连接仍在首次发布时建立。
+# 设置 MCP_EAGER=0 时改为首次使用时再创建
+if os.getenv('MCP_EAGER', '1') == '1':
+    ensure_mcp()
 
 if __name__ == '__main__':
-    init_mcp()
-    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 8080)), debug=os.getenv('FLASK_DEBUG', 'true').lower() == 'true')
+    ensure_mcp()
+    port = int(os.getenv('PORT', 8080))
+    debug = os.getenv('FLASK_DEBUG', 'true').lower() == 'true'
+    
+    # 各接口大部分时间在等待 AI / MCP / 飞书的网络响应，非调试模式下优先用 waitress
+    # 的线程池服务（可选依赖），同一时刻可处理更多在途请求；未安装时回退到 Flask 自带服务器
+    serve = None
+    if not debug:
+        try:
+            from waitress import serve
+        except ImportError:
+            pass
+    
+    if serve is not None:
+        logger.info("使用 waitress 启动 Web 服务")
+        serve(app, host='0.0.0.0', port=port, threads=int(os.getenv('WEB_THREADS', 32)))
+    else:
+        app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)